@@ -0,0 +1,195 @@
+"""
+End-to-end benchmark on the offline fake backends: the full art and
+modification graphs (sequentially, and `--runs` at a time on one event loop
+through the async graphs), collection save/load and timeline rendering at
+several history sizes, with throughput and p50/p95/p99 latency per stage.
+
+Run from the repository root:
+    python -m benchmarks.bench_end_to_end [--runs 20] [--history-sizes 1,10,50]
+        [--llm-latency 0.05] [--image-latency 0.2] [--failure-rate 0.05]
+
+No network access or API tokens are needed: the LLM and image backends are
+the stand-ins from utils.fake_backend, and all files (generated images,
+collections, checkpoints) go to a temporary working directory. Caches are
+disabled so every run does the full amount of work.
+"""
+import os
+import sys
+import time
+import asyncio
+import shutil
+import logging
+import argparse
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _configure_environment(args, work_dir):
+    # Must run before the utils modules are imported; they read their settings at import time.
+    os.environ.update({
+        "ARTISELF_LLM_BACKEND": "fake",
+        "ARTISELF_IMAGE_BACKEND": "fake",
+        "ARTISELF_HEDGE_BACKEND": "none",
+        "ARTISELF_FAKE_LLM_LATENCY": str(args.llm_latency),
+        "ARTISELF_FAKE_IMAGE_LATENCY": str(args.image_latency),
+        "ARTISELF_FAKE_FAILURE_RATE": str(args.failure_rate),
+        "ARTISELF_GENERATION_CACHE": "0",
+        "ARTISELF_ANALYSIS_CACHE": "0",
+        "ARTISELF_CHECKPOINT_DB": os.path.join(work_dir, "data", "checkpoints.sqlite3"),
+    })
+    # The app uses paths relative to the repository root; mirror the ones it needs in the work dir.
+    os.makedirs(os.path.join(work_dir, "images"), exist_ok=True)
+    shutil.copy(os.path.join(REPO_ROOT, "images", "example_image.png"), os.path.join(work_dir, "images"))
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(work_dir)
+
+
+def _percentile(samples, fraction):
+    # Nearest-rank percentile of sorted samples.
+    index = max(0, min(len(samples) - 1, int(round(fraction * len(samples) + 0.5)) - 1))
+    return samples[index]
+
+
+class Stage:
+    """Latency samples and failures recorded for one benchmark stage."""
+    def __init__(self, name):
+        self.name = name
+        self.samples = []
+        self.failures = 0
+
+    def run(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            self.failures += 1
+            print(f"  {self.name}: {type(e).__name__}: {e}")
+            return None
+        finally:
+            self.samples.append(time.perf_counter() - start)
+
+    async def arun(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            self.failures += 1
+            print(f"  {self.name}: {type(e).__name__}: {e}")
+            return None
+        finally:
+            self.samples.append(time.perf_counter() - start)
+
+    def report(self):
+        samples = sorted(self.samples)
+        total = sum(samples)
+        throughput = len(samples) / total if total else float("inf")
+        print(f"{self.name:<36} n {len(samples):4d}  fail {self.failures:3d}  {throughput:9.2f} ops/s  "
+              f"p50 {_percentile(samples, 0.50) * 1000:9.2f} ms  p95 {_percentile(samples, 0.95) * 1000:9.2f} ms  "
+              f"p99 {_percentile(samples, 0.99) * 1000:9.2f} ms")
+
+
+def _grow_history(history, size, generate_artwork_with_modification, stage):
+    """Grow an art history to `size` entries by chaining modification runs, timing each one."""
+    while len(history) < size:
+        previous = history[-1]
+        state = stage.run(generate_artwork_with_modification, history[0]["concept"], previous["concept"],
+                          previous["image_url"], iteration=len(history),
+                          modification_history=[dict(item) for item in history])
+        if state is None:
+            continue
+        history.append({
+            "concept": state["refined_concept"],
+            "image_url": state["current_image_url"],
+            "modification_type": state["modification_type"],
+            "image_analysis": state.get("image_analysis") or "",
+            "iteration": len(history),
+        })
+    return history
+
+
+async def _run_concurrently(stage, fn, calls):
+    """Run every call of an async graph at once on one event loop; returns the wall time."""
+    start = time.perf_counter()
+    await asyncio.gather(*(stage.arun(fn, *args, **kwargs) for args, kwargs in calls))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="graph runs and collection round trips per stage")
+    parser.add_argument("--history-sizes", default="1,10,50")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="mean injected LLM latency (s)")
+    parser.add_argument("--image-latency", type=float, default=0.0, help="mean injected image latency (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of backend calls that fail")
+    args = parser.parse_args()
+    history_sizes = sorted(int(size) for size in args.history_sizes.split(","))
+
+    work_dir = tempfile.mkdtemp(prefix="artiself-bench-")
+    _configure_environment(args, work_dir)
+
+    from utils.art_graph import generate_artwork, agenerate_artwork
+    from utils.modification_engine import generate_artwork_with_modification, agenerate_artwork_with_modification
+    from utils.collection_util import save_collection, load_collection, list_collections
+    from utils.timeline_visualization import visualize_art_history
+    # Streamlit warns about every call made outside `streamlit run`.
+    logging.disable(logging.WARNING)
+
+    stages = {}
+
+    def stage(name):
+        return stages.setdefault(name, Stage(name))
+
+    try:
+        results = []
+        for i in range(args.runs):
+            result = stage("generate_artwork").run(generate_artwork, f"benchmark concept {i}")
+            if result:
+                results.append(result)
+        if not results:
+            print("Every generation failed; nothing left to benchmark.")
+            return
+
+        history = [{"concept": results[0]["art_concept"], "image_url": results[0]["current_image_url"],
+                    "iteration": 0}]
+        for size in history_sizes:
+            _grow_history(history, size, generate_artwork_with_modification,
+                          stage("generate_artwork_with_modification"))
+            for i in range(args.runs):
+                stage(f"save_collection[{size}]").run(
+                    save_collection, f"bench {size} {i}", "benchmark collection", history)
+            collection_ids = [c["id"] for c in stage(f"list_collections[{size}]").run(list_collections) or []
+                              if c["name"].startswith(f"bench {size} ")]
+            for collection_id in collection_ids:
+                stage(f"load_collection[{size}]").run(load_collection, collection_id)
+            for _ in range(args.runs):
+                stage(f"timeline[{size}]").run(visualize_art_history, history)
+
+        # The same graphs through ainvoke, all runs in flight at once; a node that blocks
+        # the event loop shows up here as wall time close to the sum of the latencies.
+        latest = history[-1]
+        wall_times = {
+            "agenerate_artwork": asyncio.run(_run_concurrently(
+                stage("agenerate_artwork"), agenerate_artwork,
+                [((f"benchmark concept {i}",), {}) for i in range(args.runs)])),
+            "agenerate_artwork_with_modification": asyncio.run(_run_concurrently(
+                stage("agenerate_artwork_with_modification"), agenerate_artwork_with_modification,
+                [((history[0]["concept"], latest["concept"], latest["image_url"]),
+                  {"iteration": len(history), "modification_history": [dict(item) for item in history]})
+                 for _ in range(args.runs)])),
+        }
+
+        print(f"\nfake backends: llm latency {args.llm_latency}s, image latency {args.image_latency}s, "
+              f"failure rate {args.failure_rate:.0%}")
+        for result_stage in stages.values():
+            result_stage.report()
+        for name, wall_time in wall_times.items():
+            print(f"{name} x{args.runs} concurrent: {wall_time * 1000:.2f} ms wall, "
+                  f"{args.runs / wall_time:.2f} runs/s")
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
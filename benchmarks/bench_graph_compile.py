@@ -0,0 +1,53 @@
+"""
+Micro-benchmark: per-request overhead of building vs reusing the LangGraph workflows.
+
+Run from the repository root:
+    python -m benchmarks.bench_graph_compile [--runs 200]
+
+No network access or API tokens are needed; only graph construction and
+lookup are timed, not invoke().
+"""
+import os
+import time
+import argparse
+import statistics
+
+os.environ.setdefault("REPLICATE_API_TOKEN", "benchmark")
+
+from utils.graph_registry import invalidate_graphs
+from utils.art_graph import create_art_graph, get_art_graph
+from utils.modification_engine import create_modification_graph, get_modification_graph
+
+
+def _time_calls(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<46} mean {statistics.mean(samples):9.4f} ms   p50 {statistics.median(samples):9.4f} ms   p95 {p95:9.4f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    invalidate_graphs()
+    for label, build, cached in [
+        ("art graph", create_art_graph, get_art_graph),
+        ("modification graph", create_modification_graph, get_modification_graph),
+    ]:
+        _report(f"{label}: build + compile per call", _time_calls(build, args.runs))
+        cached()  # warm the registry
+        _report(f"{label}: registry lookup", _time_calls(cached, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: size and preparation time of the image payload sent to LLaVA, with
+and without downscaling/re-encoding, plus optional live analysis latency.
+
+Run from the repository root:
+    python -m benchmarks.bench_image_analysis_payload [--runs 20] [--live] [IMAGE ...]
+
+Without arguments it measures images/example_image.png and a synthetic
+1024x1024 render (the size Stability returns). --live also times real
+analyze_image calls for both payloads; it needs REPLICATE_API_TOKEN and
+bypasses the analysis cache.
+"""
+import os
+import io
+import time
+import base64
+import argparse
+import statistics
+import tempfile
+
+os.environ.setdefault("REPLICATE_API_TOKEN", "benchmark")
+os.environ["ARTISELF_ANALYSIS_CACHE"] = "0"
+
+import numpy as np
+from PIL import Image
+
+import utils.image_analysis as image_analysis
+
+
+def _original_input(image_path):
+    # What _analysis_input sent before preprocessing: the raw file, labelled as PNG.
+    with open(image_path, "rb") as f:
+        image_b64 = base64.b64encode(f.read()).decode("utf-8")
+    return {"image": f"data:image/png;base64,{image_b64}", **image_analysis.ANALYSIS_PARAMS}
+
+
+def _synthetic_image(directory):
+    path = os.path.join(directory, "synthetic_1024.png")
+    rng = np.random.default_rng(0)
+    # Smooth gradients plus noise compress roughly like a real render.
+    y, x = np.mgrid[0:1024, 0:1024]
+    base = np.stack([x / 4, y / 4, (x + y) / 8], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    Image.fromarray(pixels).save(path)
+    return path
+
+
+def _time_ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, samples
+
+
+def _report(label, payload, samples):
+    print(f"  {label:<10} payload {len(payload['image']) / 1024:10.1f} KiB   "
+          f"prepare p50 {statistics.median(samples):8.2f} ms   max {max(samples):8.2f} ms")
+
+
+def _live(label, image_path, build_input, runs):
+    client = image_analysis.get_llm_client()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        image_analysis.collect_output(client.run(image_analysis.ANALYSIS_MODEL, input=build_input(image_path)))
+        samples.append(time.perf_counter() - start)
+    print(f"  {label:<10} analysis p50 {statistics.median(samples):7.2f} s   max {max(samples):7.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--live", action="store_true", help="also time real LLaVA calls (uses API credits)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        images = args.images or ["images/example_image.png", _synthetic_image(tmp_dir)]
+        for image_path in images:
+            with Image.open(image_path) as img:
+                print(f"{image_path} ({img.width}x{img.height}, {os.path.getsize(image_path) / 1024:.1f} KiB on disk)")
+            for label, build_input in [("original", _original_input), ("resized", image_analysis._analysis_input)]:
+                payload, samples = _time_ms(lambda: build_input(image_path), args.runs)
+                _report(label, payload, samples)
+            if args.live:
+                live_runs = max(1, min(args.runs, 3))
+                for label, build_input in [("original", _original_input), ("resized", image_analysis._analysis_input)]:
+                    _live(label, image_path, build_input, live_runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import streamlit as st
 import os
+import uuid
 from styles.styles import style_global, style_buttons, create_artwork_styles
 from styles.empty_state import empty_state_html
-from utils.art_graph import generate_artwork
+from utils.job_queue import get_job_queue, SUCCEEDED, FINISHED_STATUSES
+from utils.image_generators.registry import get_capabilities, get_latency_stats
+from utils.thumbnails import get_thumbnail
 from streamlit.components.v1 import html
 
 def configure_page():
@@ -60,24 +63,58 @@ def display_input_section():
     )
     return art_concept
 
-def handle_artwork_generation(art_concept):
-    """Generate the artwork using the provided concept and update session state."""
+def get_session_id():
+    """Stable id of this browser session; a retried run resumes its interrupted checkpoint only within it."""
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+def handle_artwork_generation(art_concept, num_variants=1):
+    """Submit the artwork generation as a background job; progress is shown by display_generation_job."""
     if art_concept:
-        with st.spinner("Creating your artwork... This may take a moment as we craft your vision."):
-            result = generate_artwork(art_concept)
-            st.session_state.generation_result = result
-            st.session_state.refined_concept = result["art_concept"]
-            st.session_state.artwork_image_path = result["current_image_url"]
-
-            # Add generated artwork to art history
-            st.session_state.art_history.append({
-                "concept": result["art_concept"],
-                "image_url": result["current_image_url"],
-                "iteration": 0
-            })
+        st.session_state.generation_job_id = get_job_queue().submit(
+            "generate_artwork", concept=art_concept, num_variants=num_variants, session_id=get_session_id()
+        )
     else:
         st.warning("Please enter an artistic concept first.")
 
+def apply_generation_result(result):
+    """Store a finished generation in session state and art history."""
+    st.session_state.generation_result = result
+    st.session_state.refined_concept = result["art_concept"]
+    st.session_state.artwork_image_path = result["current_image_url"]
+
+    # Add generated artwork to art history
+    st.session_state.art_history.append({
+        "concept": result["art_concept"],
+        "image_url": result["current_image_url"],
+        "iteration": 0
+    })
+
+@st.fragment(run_every=1)
+def display_generation_job():
+    """Poll the running generation job, showing progress and the concept as it is written."""
+    job_id = st.session_state.get("generation_job_id")
+    if not job_id:
+        return
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.session_state.generation_job_id = None
+        return
+
+    if job["status"] in FINISHED_STATUSES:
+        st.session_state.generation_job_id = None
+        if job["status"] == SUCCEEDED:
+            apply_generation_result(job["result"])
+        else:
+            st.session_state.generation_error = job["error"] or "The generation was interrupted."
+        st.rerun()
+
+    st.progress(job["progress"], text=f"Creating your artwork... {job['message']}")
+    if job["partial"]:
+        st.markdown("#### Refining your concept")
+        st.write(job["partial"])
+
 def display_artwork_result(result):
     """Display the generated artwork and its refined concept in two columns."""
     st.subheader("Your Generated Artwork")
@@ -107,6 +144,30 @@ def display_artwork_result(result):
         except Exception as e:
             st.error(f"Error displaying image: {e}")
 
+def select_candidate(image_path):
+    """Make one of the generated variants the current artwork."""
+    st.session_state.artwork_image_path = image_path
+    if st.session_state.generation_result:
+        st.session_state.generation_result["current_image_url"] = image_path
+    if st.session_state.art_history:
+        st.session_state.art_history[-1]["image_url"] = image_path
+
+def display_candidates(result):
+    """Let the user pick which of the generated variants to continue with."""
+    candidates = [path for path in result.get("candidate_images", []) if os.path.exists(path)]
+    if len(candidates) < 2:
+        return
+    st.markdown("#### Variants")
+    st.caption("All variants came from the same generation. Pick the one you want to evolve.")
+    for col, image_path in zip(st.columns(len(candidates)), candidates):
+        with col:
+            st.image(get_thumbnail(image_path), use_container_width=True)
+            is_current = image_path == result["current_image_url"]
+            if st.button("Selected" if is_current else "Use this", key=f"candidate-{image_path}",
+                         disabled=is_current, use_container_width=True):
+                select_candidate(image_path)
+                st.rerun()
+
 def display_next_steps():
     """Display buttons to evolve or regenerate artwork."""
     st.markdown('<div class="action-buttons">', unsafe_allow_html=True)
@@ -127,6 +188,21 @@ def display_next_steps():
             st.rerun()
     st.markdown('</div>', unsafe_allow_html=True)
 
+def display_backend_latency():
+    """Show the image backends' latency percentiles in the sidebar while hedging is on."""
+    stats = get_latency_stats()
+    if not stats:
+        return
+    with st.sidebar.expander("Image backend latency"):
+        for name, backend in stats["backends"].items():
+            if backend["count"]:
+                st.markdown(f"**{name}**: {backend['count']} requests, p50 {backend['p50']:.1f}s, "
+                            f"p95 {backend['p95']:.1f}s, p99 {backend['p99']:.1f}s")
+            else:
+                st.markdown(f"**{name}**: no requests yet")
+        st.caption(f"Hedging after {stats['hedge_delay']:.1f}s; {stats['hedges']} hedged requests, "
+                   f"{stats['hedge_wins']} won by the secondary backend.")
+
 def display_empty_state():
     """Show an inspirational empty state when no artwork has been generated."""
     html(empty_state_html, height=600)
@@ -135,13 +211,29 @@ def main():
     configure_page()
     initialize_session_state()
     display_page_header()
+    display_backend_latency()
     
     # Display input area and capture the artistic concept
     art_concept = display_input_section()
 
     # If user clicks "Generate Artwork", handle artwork generation
-    if st.button("Generate Artwork", type="primary", use_container_width=True):
-        handle_artwork_generation(art_concept)
+    generating = bool(st.session_state.get("generation_job_id"))
+    max_variants = get_capabilities()["max_outputs"]
+    num_variants = 1
+    if max_variants > 1:
+        num_variants = st.slider(
+            "Variants", min_value=1, max_value=max_variants, value=1,
+            help="Render several images of the refined concept in one generation and pick your favorite."
+        )
+    if st.button("Generate Artwork", type="primary", use_container_width=True, disabled=generating):
+        handle_artwork_generation(art_concept, num_variants)
+
+    if st.session_state.get("generation_job_id"):
+        display_generation_job()
+        return
+    if st.session_state.get("generation_error"):
+        st.error(f"Artwork generation failed: {st.session_state.generation_error}")
+        st.session_state.generation_error = None
 
     # Display artwork result if available; otherwise, show an inspirational empty state
     if st.session_state.generation_result or st.session_state.artwork_image_path:
@@ -150,6 +242,7 @@ def main():
             "current_image_url": st.session_state.artwork_image_path
         }
         display_artwork_result(result)
+        display_candidates(result)
         display_next_steps()
     else:
         display_empty_state()
@@ -1,7 +1,9 @@
 import streamlit as st
 import os
+import uuid
 from styles.styles import style_global, style_custom, style_buttons, create_artwork_styles
-from utils.modification_engine import generate_artwork_with_modification
+from utils.modification_engine import FAST_ANALYSIS
+from utils.job_queue import get_job_queue, SUCCEEDED, FINISHED_STATUSES
 
 # --- Page Setup & Styling ---
 def configure_page():
@@ -94,22 +96,91 @@ def display_modification_options(mod_options, strategy_desc):
     )
 
 # --- Apply Modification ---
+def get_session_id():
+    """Stable id of this browser session; a retried run resumes its interrupted checkpoint only within it."""
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
 def apply_modification(latest_artwork, modification_strategy, user_feedback):
-    original_concept = st.session_state.art_history[0]["concept"]
-    current_concept = latest_artwork["concept"]
-    current_image = latest_artwork["image_url"]
-    iteration = latest_artwork.get("iteration", 0) + 1
-
-    return generate_artwork_with_modification(
-        original_concept=original_concept,
-        current_concept=current_concept,
-        current_image_url=current_image,
+    """Submit the modification as a background job and remember its id."""
+    art_history = st.session_state.art_history
+    st.session_state.modification_job_id = get_job_queue().submit(
+        "modify_artwork",
+        original_concept=art_history[0]["concept"],
+        current_concept=latest_artwork["concept"],
+        current_image_url=latest_artwork["image_url"],
+        modification_type=modification_strategy,
+        iteration=latest_artwork.get("iteration", 0) + 1,
+        feedback=user_feedback,
+        # The job appends to its own copy; the session history is replaced when it finishes.
+        modification_history=list(art_history),
+        fast_analysis=st.session_state.fast_analysis,
+        session_id=get_session_id()
+    )
+
+def start_evolution(latest_artwork, modification_strategy, user_feedback, iterations):
+    """Submit an autonomous run of several modification iterations as one background job."""
+    art_history = st.session_state.art_history
+    st.session_state.modification_job_id = get_job_queue().submit(
+        "evolve_artwork",
+        iterations=iterations,
+        original_concept=art_history[0]["concept"],
+        current_concept=latest_artwork["concept"],
+        current_image_url=latest_artwork["image_url"],
         modification_type=modification_strategy,
-        iteration=iteration,
+        iteration=latest_artwork.get("iteration", 0) + 1,
         feedback=user_feedback,
-        modification_history=st.session_state.art_history
+        modification_history=list(art_history),
+        fast_analysis=st.session_state.fast_analysis,
+        session_id=get_session_id()
     )
 
+@st.fragment(run_every=1)
+def display_modification_job(strategy_titles):
+    """Poll the running modification job, showing progress and the concept (or candidates) as they arrive."""
+    job_id = st.session_state.get("modification_job_id")
+    if not job_id:
+        return
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.session_state.modification_job_id = None
+        return
+
+    if job["status"] in FINISHED_STATUSES:
+        st.session_state.modification_job_id = None
+        if job["kind"] == "explore_strategies":
+            # Candidates rendered before a failure are still worth choosing from.
+            if job["result"]:
+                st.session_state.strategy_candidates = job["result"]["candidates"]
+            if job["status"] != SUCCEEDED:
+                st.session_state.modification_error = job["error"] or "Exploring the strategies was interrupted."
+        elif job["status"] == SUCCEEDED:
+            st.session_state.art_history = job["result"]["modification_history"]
+            st.session_state.modification_result = job["result"]
+        else:
+            # Evolution runs checkpoint each finished iteration; keep those even if a later one failed.
+            if job["result"]:
+                st.session_state.art_history = job["result"]["modification_history"]
+            st.session_state.modification_error = job["error"] or "The modification was interrupted."
+        st.rerun()
+
+    if job["kind"] == "explore_strategies":
+        st.markdown("---")
+        st.header("Exploring All Strategies")
+        st.progress(job["progress"], text=job["message"])
+        candidates = (job["result"] or {}).get("candidates", [])
+        for i in range(0, len(candidates), 4):
+            for col, entry in zip(st.columns(4), candidates[i:i+4]):
+                with col:
+                    st.image(entry["image_url"], caption=strategy_titles[entry["modification_type"]])
+        return
+
+    st.progress(job["progress"], text=f"Applying artistic process modification... {job['message']}")
+    if job["partial"]:
+        st.markdown("#### Writing the modified concept")
+        st.write(job["partial"])
+
 def display_modification_result(result):
     st.markdown("---")
     col1, col2 = st.columns(2)
@@ -132,6 +203,45 @@ def display_modification_result(result):
         """, unsafe_allow_html=True
     )
 
+# --- Explore All Strategies ---
+def explore_all(latest_artwork, user_feedback):
+    """Submit a job that renders a candidate for every strategy; its candidates appear as they complete."""
+    art_history = st.session_state.art_history
+    st.session_state.strategy_candidates = None
+    st.session_state.modification_job_id = get_job_queue().submit(
+        "explore_strategies",
+        original_concept=art_history[0]["concept"],
+        current_concept=latest_artwork["concept"],
+        current_image_url=latest_artwork["image_url"],
+        iteration=latest_artwork.get("iteration", 0) + 1,
+        feedback=user_feedback,
+        modification_history=list(art_history),
+        fast_analysis=st.session_state.fast_analysis
+    )
+
+def display_strategy_candidates(strategy_titles):
+    """Show the explored candidates and let the user continue from one of them."""
+    candidates = st.session_state.get("strategy_candidates")
+    if not candidates:
+        return
+    st.markdown("---")
+    st.header("Candidate Directions")
+    for i in range(0, len(candidates), 4):
+        cols = st.columns(4)
+        for col, entry in zip(cols, candidates[i:i+4]):
+            with col:
+                title = strategy_titles[entry["modification_type"]]
+                st.image(entry["image_url"], caption=title)
+                with st.expander("Concept"):
+                    st.write(entry["concept"])
+                if st.button("Continue with this", key=f"candidate_{entry['modification_type']}", use_container_width=True):
+                    st.session_state.art_history.append(entry)
+                    st.session_state.strategy_candidates = None
+                    st.rerun()
+    if st.button("Discard candidates", use_container_width=True):
+        st.session_state.strategy_candidates = None
+        st.rerun()
+
 # --- Main Function ---
 def main():
     configure_page()
@@ -199,6 +309,11 @@ def main():
         "Your guidance:", height=100, label_visibility="collapsed",
         placeholder="Example: 'I'd like to explore more vibrant colors' or 'Try a more minimalist approach'"
     )
+    st.checkbox(
+        "Fast analysis", value=FAST_ANALYSIS, key="fast_analysis",
+        help="Describe the current artwork from locally measured colors, lighting and composition "
+             "instead of the slower AI image analysis."
+    )
     
     # Map the selected option to the backend modification type
     strategy_map = {
@@ -213,11 +328,41 @@ def main():
         "Artistic Breakthrough (Create something significantly new but connected)": "concept_modification"
     }
     selected_strategy = strategy_map[st.session_state.selected_strategy]
+    strategy_titles = {mod_type: option.split(" (")[0] for option, mod_type in strategy_map.items() if mod_type}
     
-    if st.button("Apply Modification", type="primary", use_container_width=True):
-        with st.spinner("Applying artistic process modification..."):
-            result = apply_modification(latest_artwork, selected_strategy, user_feedback)
-            display_modification_result(result)
+    col1, col2 = st.columns(2)
+    with col1:
+        apply_clicked = st.button("Apply Modification", type="primary", use_container_width=True,
+                                  disabled=bool(st.session_state.get("modification_job_id")))
+    with col2:
+        explore_clicked = st.button("Explore All Strategies", type="primary", use_container_width=True,
+                                    help="Render one candidate per strategy in parallel, then pick a direction.",
+                                    disabled=bool(st.session_state.get("modification_job_id")))
+
+    with st.expander("Autonomous Evolution"):
+        st.write("Run several iterations in a row with the selected strategy, without clicking Apply each time. "
+                 "The run stops early if an image fails to generate.")
+        evolve_iterations = st.number_input("Iterations", min_value=2, max_value=50, value=5, step=1)
+        evolve_clicked = st.button("Start Evolution Run", use_container_width=True,
+                                   disabled=bool(st.session_state.get("modification_job_id")))
+
+    if apply_clicked:
+        apply_modification(latest_artwork, selected_strategy, user_feedback)
+    elif explore_clicked:
+        explore_all(latest_artwork, user_feedback)
+    elif evolve_clicked:
+        start_evolution(latest_artwork, selected_strategy, user_feedback, int(evolve_iterations))
+
+    if st.session_state.get("modification_job_id"):
+        display_modification_job(strategy_titles)
+    elif st.session_state.get("modification_error"):
+        st.error(f"Modification failed: {st.session_state.modification_error}")
+        st.session_state.modification_error = None
+    elif st.session_state.get("modification_result"):
+        # Shown once, right after the job finishes, like the inline result used to be
+        display_modification_result(st.session_state.pop("modification_result"))
+
+    display_strategy_candidates(strategy_titles)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,12 +1,12 @@
 import streamlit as st
 import os
-import json
+import time
 import datetime
-import base64
-from io import BytesIO
-from PIL import Image
 from styles.styles import style_global, style_custom, style_buttons, collection_styles
-from utils.collection_util import list_collections, load_collection, delete_collection
+from utils.collection_util import (list_collections, load_collection, delete_collection, export_collections,
+                                   import_collections, search_collections, new_export_path, ARCHIVE_FORMATS,
+                                   ARCHIVE_DOWNLOAD_LIMIT)
+from utils.thumbnails import get_thumbnail
 
 def configure_page():
     """Configure page settings and apply styles."""
@@ -79,88 +79,6 @@ def format_date(date_str):
     except:
         return date_str
 
-def encode_image_to_base64(image_path, max_size=(300, 300)):
-    """
-    Encode an image to base64 string with optional resizing.
-    
-    Args:
-        image_path: Path to the image file
-        max_size: Maximum width and height for resizing
-        
-    Returns:
-        Base64 encoded string of the image
-    """
-    try:
-        if not os.path.exists(image_path):
-            print(f"Image file not found: {image_path}")
-            return ""
-            
-        with Image.open(image_path) as img:
-            # Resize the image while preserving aspect ratio
-            img.thumbnail(max_size)
-            
-            # Convert to RGB if RGBA to avoid PNG transparency issues
-            if img.mode == 'RGBA':
-                img = img.convert('RGB')
-                
-            # Save to a BytesIO object
-            buffered = BytesIO()
-            img.save(buffered, format="JPEG", quality=85)
-            
-            # Encode to base64
-            img_str = base64.b64encode(buffered.getvalue()).decode()
-            return img_str
-    except Exception as e:
-        print(f"Error encoding image to base64: {e}")
-        return ""
-
-def get_collection_thumbnails(collection_id, max_thumbnails=3):
-    """Get multiple images from a collection to show the evolution."""
-    collection_dir = os.path.join("collections", collection_id)
-    metadata_file = os.path.join(collection_dir, "metadata.json")
-    
-    if os.path.exists(metadata_file):
-        try:
-            with open(metadata_file, "r") as f:
-                metadata = json.load(f)
-            
-            art_history = metadata.get("art_history", [])
-            if not art_history:
-                return []
-                
-            # Get first, middle and last images for a good overview of evolution
-            thumbnails = []
-            
-            # Always include first image
-            if len(art_history) > 0 and "image_url" in art_history[0]:
-                img_rel_path = art_history[0]["image_url"]
-                full_path = os.path.join(collection_dir, img_rel_path)
-                if os.path.exists(full_path):
-                    thumbnails.append(full_path)
-            
-            # Add middle image if collection has more than 2 images
-            if len(art_history) > 2:
-                middle_idx = len(art_history) // 2
-                if "image_url" in art_history[middle_idx]:
-                    img_rel_path = art_history[middle_idx]["image_url"]
-                    full_path = os.path.join(collection_dir, img_rel_path)
-                    if os.path.exists(full_path):
-                        thumbnails.append(full_path)
-            
-            # Always include last image
-            if len(art_history) > 1 and "image_url" in art_history[-1]:
-                img_rel_path = art_history[-1]["image_url"]
-                full_path = os.path.join(collection_dir, img_rel_path)
-                if os.path.exists(full_path):
-                    thumbnails.append(full_path)
-                
-            return thumbnails
-            
-        except Exception as e:
-            print(f"Error getting collection thumbnails: {e}")
-    
-    return []
-
 def display_collections():
     """Display all saved collections in a grid layout."""
     collections = list_collections()
@@ -186,6 +104,8 @@ def display_collections():
         if st.button("+ Create New", key="new_collection", use_container_width=True, type="primary"):
             st.switch_page("pages/01_Create_Artworks.py")
     
+    display_search_results()
+    
     # Instead of building one big HTML string, generate individual cards and use st.columns for layout
     num_cols = 3  # Number of columns in the grid
     
@@ -218,8 +138,8 @@ def display_collections():
                     </div>
                 """, unsafe_allow_html=True)
                 
-                # Get thumbnails for the collection
-                thumbnails = get_collection_thumbnails(collection["id"], max_thumbnails=3)
+                # First, middle and last images from the catalog give a quick overview of the evolution
+                thumbnails = [path for path in collection["previews"] if os.path.exists(path)]
                 
                 # Display thumbnails
                 if thumbnails:
@@ -227,31 +147,31 @@ def display_collections():
                     if len(thumbnails) == 1:
                         thumb_cols = st.columns(1)
                         with thumb_cols[0]:
-                            st.image(thumbnails[0], caption="Single Image", use_container_width=True)
+                            st.image(get_thumbnail(thumbnails[0]), caption="Single Image", use_container_width=True)
                     elif len(thumbnails) == 2:
                         thumb_cols = st.columns([1, 0.2, 1])
                         with thumb_cols[0]:
-                            st.image(thumbnails[0], caption="First", use_container_width=True)
+                            st.image(get_thumbnail(thumbnails[0]), caption="First", use_container_width=True)
                         with thumb_cols[1]:
                             st.markdown("<div style='display:flex;align-items:center;justify-content:center;height:50%'><span style='font-size:24px;color:#3B82F6;'>→</span></div>", unsafe_allow_html=True)
                         with thumb_cols[2]:
-                            st.image(thumbnails[1], caption="Latest", use_container_width=True)
+                            st.image(get_thumbnail(thumbnails[1]), caption="Latest", use_container_width=True)
                     elif len(thumbnails) == 3:
                         thumb_cols = st.columns([1, 0.2, 1, 0.2, 1])
                         with thumb_cols[0]:
-                            st.image(thumbnails[0], caption="First", use_container_width=True)
+                            st.image(get_thumbnail(thumbnails[0]), caption="First", use_container_width=True)
                         with thumb_cols[1]:
                             st.markdown("<div style='display:flex;align-items:center;justify-content:center;height:50%'><span style='font-size:24px;color:#3B82F6;'>→</span></div>", unsafe_allow_html=True)
                         with thumb_cols[2]:
-                            st.image(thumbnails[1], caption="Middle", use_container_width=True)
+                            st.image(get_thumbnail(thumbnails[1]), caption="Middle", use_container_width=True)
                         with thumb_cols[3]:
                             st.markdown("<div style='display:flex;align-items:center;justify-content:center;height:100%'><span style='font-size:24px;color:#3B82F6;'>→</span></div>", unsafe_allow_html=True)
                         with thumb_cols[4]:
-                            st.image(thumbnails[2], caption="Latest", use_container_width=True)
+                            st.image(get_thumbnail(thumbnails[2]), caption="Latest", use_container_width=True)
                 else:
                     # Fallback to single thumbnail if available
                     if collection["thumbnail"] and os.path.exists(collection["thumbnail"]):
-                        st.image(collection["thumbnail"], use_container_width=True)
+                        st.image(get_thumbnail(collection["thumbnail"]), use_container_width=True)
                 
                 # Action buttons with Streamlit's button components
                 btn_cols = st.columns(2)
@@ -373,6 +293,89 @@ def show_delete_dialog():
                 else:
                     st.error("Failed to delete the collection.")
 
+def display_search_results():
+    """Search box over every saved iteration, with the matching artworks listed below it."""
+    query = st.text_input("🔍 Search artworks", key="collection_search",
+                          placeholder="Search concepts, feedback, image analyses and modification types")
+    if not query.strip():
+        return
+    start = time.perf_counter()
+    hits = search_collections(query)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if not hits:
+        st.info(f"No artworks match '{query}'.")
+        return
+    st.caption(f"{len(hits)} matching artworks ({elapsed_ms:.0f} ms)")
+    for i, hit in enumerate(hits):
+        image_col, text_col, button_col = st.columns([1, 4, 1])
+        with image_col:
+            if hit["image_url"] and os.path.exists(hit["image_url"]):
+                st.image(get_thumbnail(hit["image_url"]), use_container_width=True)
+        with text_col:
+            modification = hit["modification_type"] or ("Initial Creation" if hit["iteration"] == 0 else "")
+            st.markdown(f"**{hit['collection_name']}** · Iteration {hit['iteration'] + 1}"
+                        + (f" · {modification}" if modification else ""))
+            st.markdown(hit["snippet"])
+        with button_col:
+            if st.button("📂 Load", key=f"search_load_{i}", use_container_width=True):
+                load_collection_to_session(hit["collection_id"])
+    st.markdown("---")
+
+def display_archive_tools():
+    """Export collections to an archive, or import an archive exported on another host."""
+    collections = list_collections()
+    with st.expander("📦 Export / Import Collections"):
+        export_col, import_col = st.columns(2)
+        with export_col:
+            st.markdown("**Export**")
+            if not collections:
+                st.caption("No collections to export yet.")
+            else:
+                names = {c["id"]: f"{c['name']} ({c['artwork_count']} artworks)" for c in collections}
+                selected = st.multiselect("Collections", list(names), default=list(names),
+                                          format_func=names.get, key="export_ids")
+                archive_format = st.radio("Format", ARCHIVE_FORMATS, horizontal=True, key="export_format")
+                if st.button("Prepare Archive", use_container_width=True, disabled=not selected):
+                    # The archive is streamed to disk; only archives small enough to hold in memory
+                    # are handed to the browser, larger ones stay on the server
+                    archive_path = new_export_path(archive_format)
+                    try:
+                        with st.spinner("Exporting collections..."):
+                            counts = export_collections(selected, archive_path, archive_format)
+                        summary = f"{counts['collections']} collections, {counts['images']} images"
+                        if os.path.getsize(archive_path) <= ARCHIVE_DOWNLOAD_LIMIT:
+                            with open(archive_path, "rb") as f:
+                                st.download_button(f"⬇️ Download ({summary})", f,
+                                                   file_name=f"artiself_collections.{archive_format}",
+                                                   use_container_width=True, type="primary")
+                            os.remove(archive_path)
+                        else:
+                            st.info(f"The archive ({summary}) is too large to download through the browser. "
+                                    f"Copy it from `{archive_path}` on the server.")
+                    except Exception as e:
+                        st.error(f"Error exporting collections: {e}")
+                        if os.path.exists(archive_path):
+                            os.remove(archive_path)
+        with import_col:
+            st.markdown("**Import**")
+            # Uploads are held in memory (up to Streamlit's server.maxUploadSize);
+            # an archive already on the server is streamed from disk instead
+            archive = st.file_uploader("Collection archive", type=["zip", "tar"], key="import_archive")
+            archive_path = st.text_input("...or path of an archive on the server", key="import_path").strip()
+            source = archive_path or archive
+            if source and st.button("Import Collections", use_container_width=True, type="primary"):
+                try:
+                    if archive_path and not os.path.isfile(archive_path):
+                        raise ValueError(f"No archive at {archive_path}")
+                    with st.spinner("Importing collections..."):
+                        result = import_collections(source)
+                    st.success(f"Imported {len(result['imported'])} collections "
+                               f"({result['images_written']} new images, {result['images_skipped']} already stored).")
+                    if result["skipped"]:
+                        st.info(f"Skipped {len(result['skipped'])} collections that already exist.")
+                except Exception as e:
+                    st.error(f"Error importing collections: {e}")
+
 def init_session_state():
     """Initialize session state variables."""
     if "show_delete_dialog" not in st.session_state:
@@ -388,6 +391,7 @@ def main():
     if st.session_state.get("show_delete_dialog"):
         show_delete_dialog()
     
+    display_archive_tools()
     display_collections()
 
 if __name__ == "__main__":
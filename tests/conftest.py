@@ -0,0 +1,36 @@
+import os
+import sys
+import shutil
+import tempfile
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix="artiself-tests-")
+
+# Must happen before the utils modules are imported; they read their settings at import time.
+os.environ.update({
+    "ARTISELF_LLM_BACKEND": "fake",
+    "ARTISELF_IMAGE_BACKEND": "fake",
+    "ARTISELF_HEDGE_BACKEND": "none",
+    "ARTISELF_FAKE_LLM_LATENCY": "0",
+    "ARTISELF_FAKE_IMAGE_LATENCY": "0",
+    "ARTISELF_FAKE_FAILURE_RATE": "0",
+    "ARTISELF_FAST_ANALYSIS": "1",
+    "ARTISELF_GENERATION_CACHE": "0",
+    "ARTISELF_ANALYSIS_CACHE": "0",
+    "ARTISELF_CHECKPOINT_DB": os.path.join(WORK_DIR, "data", "checkpoints.sqlite3"),
+})
+sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture(autouse=True)
+def work_dir(monkeypatch):
+    """Run each test in a scratch copy of the paths the app uses relative to the repository root."""
+    os.makedirs(os.path.join(WORK_DIR, "images"), exist_ok=True)
+    shutil.copy(os.path.join(REPO_ROOT, "images", "example_image.png"), os.path.join(WORK_DIR, "images"))
+    monkeypatch.chdir(WORK_DIR)
+    return WORK_DIR
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
@@ -0,0 +1,36 @@
+import os
+import pytest
+from utils import analysis_cache, http_transport, image_analysis
+
+IMAGE = os.path.join("images", "example_image.png")
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(analysis_cache, "ANALYSIS_CACHE_ENABLED", True)
+    monkeypatch.setattr(analysis_cache, "ANALYSIS_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_cache_hit_needs_no_client(monkeypatch):
+    first = image_analysis.analyze_image(IMAGE)
+
+    def no_client():
+        raise RuntimeError("no API token")
+
+    monkeypatch.setattr(image_analysis, "get_llm_client", no_client)
+    assert image_analysis.analyze_image(IMAGE) == first
+
+
+def test_backends_do_not_share_entries(monkeypatch):
+    fake_key = image_analysis._cache_key(IMAGE)
+    monkeypatch.setattr(http_transport, "LLM_BACKEND", "replicate")
+    assert image_analysis._cache_key(IMAGE) != fake_key
+
+
+def test_entries_are_written_atomically(cache_dir):
+    key = image_analysis._cache_key(IMAGE)
+    analysis_cache.put_cached_analysis(key, "model", "first")
+    analysis_cache.put_cached_analysis(key, "model", "second")
+    assert analysis_cache.get_cached_analysis(key) == "second"
+    assert os.listdir(cache_dir) == [f"{key}.json"]
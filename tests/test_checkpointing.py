@@ -0,0 +1,74 @@
+import time
+import threading
+import pytest
+from utils import art_graph, checkpointing
+from utils.checkpointing import run_thread_id
+from utils.image_generators import fake_image_generator
+
+
+def test_thread_ids_are_per_session():
+    assert run_thread_id("art", "session-a", "a fox", 1) == run_thread_id("art", "session-a", "a fox", 1)
+    assert run_thread_id("art", "session-a", "a fox", 1) != run_thread_id("art", "session-b", "a fox", 1)
+    # Without a session every run is on its own thread
+    assert run_thread_id("art", None, "a fox", 1) != run_thread_id("art", None, "a fox", 1)
+
+
+@pytest.mark.parametrize("sessions", [("session-a", "session-b"), ("session-a", "session-a")])
+def test_identical_concurrent_runs_never_resume_each_other(monkeypatch, capsys, sessions):
+    # Slow renders keep the first run in flight while the second one starts
+    monkeypatch.setattr(fake_image_generator, "FAKE_IMAGE_LATENCY", 0.3)
+    results = []
+
+    def run(session_id):
+        results.append(art_graph.generate_artwork("a fox in the snow", session_id=session_id))
+
+    threads = [threading.Thread(target=run, args=(session_id,)) for session_id in sessions]
+    for thread in threads:
+        thread.start()
+        # Let the first run checkpoint its concept and start rendering
+        time.sleep(0.15)
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 2
+    assert "Resuming run" not in capsys.readouterr().out
+
+
+def test_retry_from_the_same_session_resumes_the_interrupted_run(monkeypatch, capsys):
+    generator = art_graph.get_image_generator()
+    original = generator.generate_images
+    calls = []
+
+    def fail_once(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("render timed out")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(generator, "generate_images", fail_once)
+    with pytest.raises(RuntimeError):
+        art_graph.generate_artwork("a heron at dusk", session_id="session-a")
+
+    result = art_graph.generate_artwork("a heron at dusk", session_id="session-a")
+
+    assert "Resuming run" in capsys.readouterr().out
+    assert result["current_image_url"]
+    assert len(calls) == 2
+
+
+def test_abandoned_runs_are_pruned(monkeypatch):
+    generator = art_graph.get_image_generator()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("render timed out")
+
+    monkeypatch.setattr(generator, "generate_images", fail)
+    with pytest.raises(RuntimeError):
+        art_graph.generate_artwork("a lighthouse in fog", session_id="session-a")
+    checkpointer = checkpointing.get_checkpointer()
+    thread_id = run_thread_id("art", "session-a", "a lighthouse in fog", 1)
+    assert checkpointer.get_tuple({"configurable": {"thread_id": thread_id}})
+
+    monkeypatch.setattr(checkpointing, "CHECKPOINT_TTL_HOURS", 0)
+    checkpointing._prune_stale_threads(checkpointer)
+    assert checkpointer.get_tuple({"configurable": {"thread_id": thread_id}}) is None
@@ -0,0 +1,45 @@
+import os
+import sys
+import subprocess
+import pytest
+from utils import blob_store, collection_util
+from utils.concept_index import refresh_concept_index, similar_concepts
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMAGE = "images/example_image.png"
+
+
+@pytest.fixture(autouse=True)
+def fresh_catalog(monkeypatch):
+    monkeypatch.setattr(collection_util, "_catalog_cache", None)
+
+
+def test_failed_save_leaves_nothing_behind(monkeypatch):
+    def fail(collection_id, metadata):
+        raise OSError("disk full")
+    monkeypatch.setattr(collection_util, "_catalog_upsert", fail)
+
+    assert not collection_util.save_collection("broken", "", [{"concept": "a fox", "image_url": IMAGE}])
+
+    assert not [name for name in os.listdir(collection_util.COLLECTIONS_DIR) if name.startswith("broken_")]
+    assert not any(holders for holders in blob_store._load_refs().values())
+    assert not [name for name in os.listdir(blob_store.BLOB_DIR) if name.endswith(".tmp")]
+
+
+def test_saved_concepts_reach_the_concept_index():
+    assert collection_util.save_collection("foxes", "", [{"concept": "a red fox asleep in fresh snow",
+                                                          "image_url": IMAGE}])
+
+    refresh_concept_index()
+
+    assert [entry["concept"] for entry in similar_concepts("a fox in the snow")] == ["a red fox asleep in fresh snow"]
+
+
+def test_concept_retrieval_does_not_import_streamlit(work_dir):
+    code = ("import sys, utils.modification_engine, utils.concept_index as index\n"
+            "index.refresh_concept_index()\n"
+            "index.similar_concepts('a fox in the snow')\n"
+            "sys.exit('streamlit' in sys.modules)")
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT}
+    assert subprocess.run([sys.executable, "-c", code], cwd=work_dir, env=env).returncode == 0
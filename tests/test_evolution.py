@@ -0,0 +1,71 @@
+import itertools
+from utils import modification_engine
+from utils.fake_backend import get_fake_llm_client
+from utils.image_generators.base import FALLBACK_IMAGE
+
+
+class SelectionLLM:
+    """Fake LLM client that answers strategy selection prompts from a fixed sequence of numbers."""
+    def __init__(self, answers):
+        self._answers = itertools.cycle(answers)
+        self._client = get_fake_llm_client()
+        self.selections = 0
+
+    def run(self, model, input):
+        if "Return only the number" in input["prompt"]:
+            self.selections += 1
+            return [next(self._answers)]
+        return self._client.run(model, input)
+
+    def stream(self, model, input):
+        return self._client.stream(model, input)
+
+
+def _evolve(modification_type=None, iteration=1, iterations=4):
+    return list(modification_engine.evolve_artwork(
+        "a lighthouse", "a lighthouse in fog", "images/example_image.png", iterations,
+        modification_type=modification_type, iteration=iteration))
+
+
+def test_ai_recommended_evolution_selects_a_strategy_every_round(monkeypatch):
+    llm = SelectionLLM(["5", "7", "2", "8"])
+    monkeypatch.setattr(modification_engine, "get_llm", lambda: llm)
+
+    states = _evolve()
+
+    assert llm.selections == 4
+    assert [entry["modification_type"] for entry in states[-1]["modification_history"]] == [
+        "subject_modification", "structure_modification", "unsystematic_change", "concept_modification"
+    ]
+
+
+def test_evolution_from_the_first_artwork_only_reproduces_once(monkeypatch):
+    llm = SelectionLLM(["3"])
+    monkeypatch.setattr(modification_engine, "get_llm", lambda: llm)
+
+    states = _evolve(iteration=0, iterations=3)
+
+    assert [entry["modification_type"] for entry in states[-1]["modification_history"]] == [
+        "no_modification", "idea_based_change", "idea_based_change"
+    ]
+    assert llm.selections == 2
+
+
+def test_requested_strategy_is_applied_every_round(monkeypatch):
+    llm = SelectionLLM(["1"])
+    monkeypatch.setattr(modification_engine, "get_llm", lambda: llm)
+
+    states = _evolve(modification_type="quantitative_modification", iterations=3)
+
+    assert llm.selections == 0
+    assert {entry["modification_type"] for entry in states[-1]["modification_history"]} == {"quantitative_modification"}
+
+
+def test_failed_render_stops_the_run_and_says_why(monkeypatch):
+    generator = modification_engine.get_image_generator()
+    monkeypatch.setattr(generator, "generate_image", lambda *args, **kwargs: FALLBACK_IMAGE)
+
+    states = _evolve(modification_type="no_modification", iterations=3)
+
+    assert len(states) == 1
+    assert states[0]["messages"][-1].content == "Image generation failed, stopping the evolution run."
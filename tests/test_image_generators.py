@@ -0,0 +1,46 @@
+import sys
+import types
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from utils.image_generators import registry
+from utils.image_generators.base import BaseImageGenerator, FALLBACK_IMAGE
+from utils.image_generators.hedged_image_generator import HedgedImageGenerator
+
+
+class IncompleteGenerator(BaseImageGenerator):
+    name = "incomplete"
+
+
+class FailingGenerator(BaseImageGenerator):
+    name = "failing"
+
+    def generate_image(self, prompt, width=None, height=None, seed=None):
+        return FALLBACK_IMAGE
+
+
+def test_backend_without_generate_image_is_rejected(monkeypatch):
+    module = types.ModuleType("incomplete_backend")
+    module.ImageGenerator = IncompleteGenerator
+    monkeypatch.setitem(sys.modules, "incomplete_backend", module)
+    monkeypatch.setattr(registry, "BACKENDS", dict(registry.BACKENDS))
+    registry.register_backend("incomplete", "incomplete_backend")
+
+    with pytest.raises(TypeError, match="generate_image"):
+        registry.create_backend("incomplete")
+    with pytest.raises(TypeError):
+        IncompleteGenerator()
+
+
+def test_fake_backend_implements_the_interface():
+    assert registry.create_backend("fake").generate_image("a fox in the snow")
+
+
+def test_hedge_counters_survive_concurrent_generations():
+    generator = HedgedImageGenerator(("failing", FailingGenerator()), ("fake", registry.create_backend("fake")))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(generator.generate_image, [f"prompt {i}" for i in range(32)]))
+
+    assert FALLBACK_IMAGE not in results
+    stats = generator.latency_stats()
+    assert stats["hedges"] == stats["hedge_wins"] == 32
@@ -0,0 +1,28 @@
+import time
+from utils.job_queue import JobQueue, SUCCEEDED, FINISHED_STATUSES, _explore_strategies_job
+from utils.modification_engine import STRATEGY_NODES
+
+IMAGE = "images/example_image.png"
+
+
+def wait_for(queue, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in FINISHED_STATUSES:
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+
+def test_explore_all_strategies_runs_as_a_job(work_dir):
+    queue = JobQueue(db_path=f"{work_dir}/data/jobs-test.sqlite3")
+    queue.register("explore_strategies", _explore_strategies_job, host="api.replicate.com")
+    job_id = queue.submit("explore_strategies", original_concept="a fox in the snow",
+                          current_concept="a fox in the snow", current_image_url=IMAGE, iteration=1,
+                          modification_history=[{"concept": "a fox in the snow", "image_url": IMAGE, "iteration": 0}])
+
+    job = wait_for(queue, job_id)
+
+    assert job["status"] == SUCCEEDED
+    assert sorted(entry["modification_type"] for entry in job["result"]["candidates"]) == sorted(STRATEGY_NODES)
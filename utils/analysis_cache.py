@@ -0,0 +1,76 @@
+import os
+import json
+import uuid
+import hashlib
+import datetime
+from typing import Any, Dict, Optional
+
+ANALYSIS_CACHE_DIR = os.environ.get("ARTISELF_ANALYSIS_CACHE_DIR", "collections/_analysis_cache")
+# Set ARTISELF_ANALYSIS_CACHE=0 to always call the analysis model.
+ANALYSIS_CACHE_ENABLED = os.environ.get("ARTISELF_ANALYSIS_CACHE", "1") != "0"
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def analysis_cache_key(image_path: str, backend: str, model: str, params: Dict[str, Any]) -> Optional[str]:
+    """
+    Build the cache key for analyzing a local image.
+
+    The key covers the image bytes rather than its path, so copies of the same
+    render (e.g. inside a saved collection) share one entry, plus the backend
+    that serves the model (so the offline fake never answers for the real one),
+    the model version and every other model input such as the prompt.
+
+    Returns:
+        str: The key, or None if the image is not a readable local file.
+    """
+    if not ANALYSIS_CACHE_ENABLED or not os.path.isfile(image_path):
+        return None
+    try:
+        image_hash = _file_sha256(image_path)
+    except OSError:
+        return None
+    payload = json.dumps({"image": image_hash, "backend": backend, "model": model, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(ANALYSIS_CACHE_DIR, f"{key}.json")
+
+
+def get_cached_analysis(key: Optional[str]) -> Optional[str]:
+    """Return the stored analysis for `key`, or None on a miss."""
+    if not key:
+        return None
+    try:
+        with open(_entry_path(key), "r") as f:
+            return json.load(f)["analysis"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def put_cached_analysis(key: Optional[str], model: str, analysis: str):
+    """Store a successful analysis under `key`."""
+    if not key or not analysis:
+        return
+    entry_path = _entry_path(key)
+    # Unique per writer, so concurrent analyses of the same image don't write into one file
+    tmp_path = f"{entry_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.makedirs(ANALYSIS_CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump({"model": model, "analysis": analysis,
+                       "created_at": datetime.datetime.now().isoformat()}, f)
+        os.replace(tmp_path, entry_path)
+    except OSError as e:
+        print(f"Error writing analysis cache entry: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
@@ -1,41 +1,45 @@
-from typing import List, TypedDict
+import asyncio
+from typing import List, TypedDict, Optional
 from langchain.schema import BaseMessage, HumanMessage, AIMessage
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableConfig
 import os
 from dotenv import load_dotenv
-import replicate
-from utils.image_generators.replicate_image_generator import ImageGenerator
+from utils.http_transport import get_llm_client, get_async_llm_client, collect_output, acollect_output
+from utils.image_generators.registry import get_image_generator
+from utils.graph_registry import get_compiled_graph
+from utils.checkpointing import get_checkpointer, invoke_resumable, run_thread_id
+from utils.thumbnails import create_thumbnails
+from utils.token_stream import TokenCallback, get_token_callback, token_config, stream_llm, astream_llm
 
 # Load environment variables
 load_dotenv()
 REPLICATE_API_TOKEN = os.environ.get("REPLICATE_API_TOKEN")
+LLM_MODEL = "ibm-granite/granite-3.2-8b-instruct"
 
 # Define the state schema
 class GraphState(TypedDict):
     messages: List[BaseMessage]
     art_concept: str
     current_image_url: str
+    candidate_images: List[str]
+    num_variants: int
     iteration: int
 
-# Initialize the Replicate client and model
+# Shared Replicate client (pooled connections, reused across node invocations)
 def get_llm():
-    if not REPLICATE_API_TOKEN:
-        raise ValueError("REPLICATE_API_TOKEN environment variable is not set")    
-    return replicate.Client(api_token=REPLICATE_API_TOKEN)
+    return get_llm_client()
+
+def get_async_llm():
+    return get_async_llm_client()
 
 # Define tools
 tools = []
 
 # Define the nodes for the graph
-def concept_development(state: GraphState) -> GraphState:
-    """Refine the initial concept provided by the user."""
-    client = get_llm()
-    
-    messages = state["messages"]
-    concept = state["art_concept"]
-    
+def _concept_prompt(concept: str) -> str:
     # Prompt to refine the art concept
-    prompt = f"""
+    return f"""
     I need to create an artistic concept based on this initial idea: {concept}
     
     Please refine this concept in a way that would work well for an AI image generator.
@@ -47,52 +51,81 @@ def concept_development(state: GraphState) -> GraphState:
     
     Provide a description of around 150 words that could be used as a prompt for image generation.
     """
-    
-    # Run the Granite model from Replicate
-    output = client.run(
-        "ibm-granite/granite-3.2-8b-instruct",
-        input={
-            "prompt": prompt,
-            "max_new_tokens": 250,
-            "temperature": 0.7,
-            "top_p": 0.9,
-        }
-    )
-    
-    # Convert the output to a string if it's not already
-    if isinstance(output, list):
-        refined_concept = "".join(output)
-    else:
-        refined_concept = str(output)
-    
+
+CONCEPT_LLM_INPUT = {
+    "max_new_tokens": 250,
+    "temperature": 0.7,
+    "top_p": 0.9,
+}
+
+def _apply_refined_concept(state: GraphState, prompt: str, refined_concept: str) -> GraphState:
     # Update the state with the refined concept and messages
     state["art_concept"] = refined_concept
     state["messages"].append(HumanMessage(content=prompt))
     state["messages"].append(AIMessage(content=refined_concept))
+    return state
+
+def concept_development(state: GraphState, config: Optional[RunnableConfig] = None) -> GraphState:
+    """Refine the initial concept provided by the user, streaming tokens to `on_token` if given."""
+    client = get_llm()
+    prompt = _concept_prompt(state["art_concept"])
+    model_input = {"prompt": prompt, **CONCEPT_LLM_INPUT}
+    on_token = get_token_callback(config)
+    
+    # Run the Granite model from Replicate
+    if on_token:
+        refined_concept = stream_llm(client, LLM_MODEL, model_input, on_token)
+    else:
+        refined_concept = collect_output(client.run(LLM_MODEL, input=model_input))
     
+    return _apply_refined_concept(state, prompt, refined_concept)
+
+async def aconcept_development(state: GraphState, config: Optional[RunnableConfig] = None) -> GraphState:
+    """Async counterpart of concept_development."""
+    client = get_async_llm()
+    prompt = _concept_prompt(state["art_concept"])
+    model_input = {"prompt": prompt, **CONCEPT_LLM_INPUT}
+    on_token = get_token_callback(config)
+    if on_token:
+        refined_concept = await astream_llm(client, LLM_MODEL, model_input, on_token)
+    else:
+        refined_concept = await acollect_output(await client.async_run(LLM_MODEL, input=model_input))
+    return _apply_refined_concept(state, prompt, refined_concept)
+
+def _apply_images(state: GraphState, image_urls: List[str]) -> GraphState:
+    create_thumbnails(image_urls)
+    # The first variant is the default pick; the others are offered as alternatives.
+    state["current_image_url"] = image_urls[0]
+    state["candidate_images"] = image_urls
+    state["messages"].append(AIMessage(content=f"Generated images: {', '.join(image_urls)}"))
     return state
 
 def create_image(state: GraphState) -> GraphState:
-    """Generate an image based on the refined concept."""
+    """Generate `num_variants` images from the refined concept in a single model call."""
     concept = state["art_concept"]
     
-    # Instantiate the image generator class and generate the image
-    image_generator = ImageGenerator()
-    image_url = image_generator.generate_image(concept)
+    # Fetch the shared image generator (with hedging, if configured) and generate the images
+    image_generator = get_image_generator()
+    image_urls = image_generator.generate_images(concept, num_outputs=state.get("num_variants", 1))
     
-    # Update the state with the generated image URL (or file path)
-    state["current_image_url"] = image_url
-    state["messages"].append(AIMessage(content=f"Generated image: {image_url}"))
-    return state
+    # Update the state with the generated image URLs (or file paths)
+    return _apply_images(state, image_urls)
+
+async def acreate_image(state: GraphState) -> GraphState:
+    """Async counterpart of create_image."""
+    image_generator = get_image_generator()
+    image_urls = await image_generator.agenerate_images(state["art_concept"], num_outputs=state.get("num_variants", 1))
+    # Thumbnailing decodes and resizes every image; keep it off the event loop
+    return await asyncio.to_thread(_apply_images, state, image_urls)
 
 # Define the graph
-def create_art_graph():
+def _build_art_graph(concept_node, image_node, checkpointer=None):
     # Define the graph
     workflow = StateGraph(GraphState)
     
     # Add nodes
-    workflow.add_node("concept_development", concept_development)
-    workflow.add_node("create_image", create_image)
+    workflow.add_node("concept_development", concept_node)
+    workflow.add_node("create_image", image_node)
     
     # Define edges
     workflow.add_edge("concept_development", "create_image")
@@ -102,20 +135,46 @@ def create_art_graph():
     workflow.set_entry_point("concept_development")
     
     # Compile the graph
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
-# Function to run the graph
-def generate_artwork(concept: str):
-    # Initialize the state
-    state = {
+def create_art_graph():
+    return _build_art_graph(concept_development, create_image, checkpointer=get_checkpointer())
+
+def create_async_art_graph():
+    """Same workflow as create_art_graph, with nodes that await their remote calls."""
+    return _build_art_graph(aconcept_development, acreate_image)
+
+def get_art_graph():
+    """Return the compiled art graph, building it once per process."""
+    return get_compiled_graph("art", create_art_graph)
+
+def get_async_art_graph():
+    """Return the compiled async art graph, building it once per process."""
+    return get_compiled_graph("art_async", create_async_art_graph)
+
+def _initial_state(concept: str, num_variants: int = 1) -> GraphState:
+    return {
         "messages": [],
         "art_concept": concept,
         "current_image_url": "",
+        "candidate_images": [],
+        "num_variants": num_variants,
         "iteration": 0
     }
-    
-    # Create and run the graph
-    graph = create_art_graph()
-    result = graph.invoke(state)
+
+# Function to run the graph
+def generate_artwork(concept: str, on_token: Optional[TokenCallback] = None, num_variants: int = 1,
+                     session_id: Optional[str] = None):
+    # Fetch the compiled graph and run it; `num_variants` images come back in result["candidate_images"]
+    # A retry from the same session resumes an interrupted run (see run_thread_id)
+    graph = get_art_graph()
+    result = invoke_resumable(graph, _initial_state(concept, num_variants),
+                              run_thread_id("art", session_id, concept, num_variants),
+                              config=token_config(on_token))
     
     return result
+
+async def agenerate_artwork(concept: str, on_token: Optional[TokenCallback] = None, num_variants: int = 1):
+    """Run the art graph on the event loop via ainvoke."""
+    graph = get_async_art_graph()
+    return await graph.ainvoke(_initial_state(concept, num_variants), config=token_config(on_token))
@@ -0,0 +1,253 @@
+import os
+import re
+import json
+import uuid
+import shutil
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterable, List, Optional
+from utils.thumbnails import create_thumbnail, thumbnail_path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no reflinks, fall back to copying
+    fcntl = None
+
+# Content-addressed image store shared by all collections.
+BLOB_DIR = os.environ.get("ARTISELF_BLOB_DIR", os.path.join("collections", "_blobs"))
+REFS_FILE = os.path.join(BLOB_DIR, "refs.json")
+BLOB_WORKERS = int(os.environ.get("ARTISELF_BLOB_WORKERS", 8))
+HASH_CHUNK_SIZE = 1024 * 1024
+# "aa/<sha256>.<ext>": keys coming from outside (e.g. imported archives) must not escape BLOB_DIR
+BLOB_KEY_PATTERN = re.compile(r"([0-9a-f]{2})/\1[0-9a-f]{62}\.[a-z0-9]{1,5}")
+# Linux ioctl that makes `dst` share `src`'s extents (copy-on-write) on btrfs, XFS and similar.
+FICLONE = 0x40049409
+
+# Guards the refs file and blob deletion (saves and deletes may run concurrently)
+_refs_lock = threading.RLock()
+_executor = ThreadPoolExecutor(max_workers=BLOB_WORKERS, thread_name_prefix="blobs")
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def blob_path(key: str) -> str:
+    """Return the file path of a blob key (e.g. "ab/ab12...ef.png")."""
+    return os.path.join(BLOB_DIR, *key.split("/"))
+
+
+def blob_key(image_path: str) -> str:
+    """
+    Return the blob key of an image file: its SHA-256 plus extension, sharded by the first two hex digits.
+
+    Images already in the store are recognized by path, so they are not re-hashed.
+    """
+    if is_blob(image_path):
+        return os.path.relpath(os.path.normpath(image_path), BLOB_DIR).replace(os.sep, "/")
+    digest = _file_digest(image_path)
+    extension = os.path.splitext(image_path)[1].lower() or ".png"
+    return f"{digest[:2]}/{digest}{extension}"
+
+
+def is_blob(image_path: str) -> bool:
+    """Return True if `image_path` points into the blob store."""
+    blob_dir = os.path.abspath(BLOB_DIR)
+    return os.path.commonpath([blob_dir, os.path.abspath(image_path)]) == blob_dir
+
+
+def _clone_file(source_path: str, target_path: str):
+    """Copy a file, sharing its data blocks with the source where the filesystem allows."""
+    with open(source_path, "rb") as src, open(target_path, "wb") as dst:
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return
+            except OSError:
+                pass
+        shutil.copyfileobj(src, dst, HASH_CHUNK_SIZE)
+
+
+def _materialize(source_path: str, key: str):
+    """
+    Make sure the blob for `key` exists, creating it from `source_path`.
+
+    Tries a hard link first (instant, no extra space; generated images are
+    never modified in place), then a reflink, then a plain copy. The blob
+    appears atomically under its final name.
+    """
+    target_path = blob_path(key)
+    if os.path.exists(target_path):
+        return
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    tmp_path = os.path.join(os.path.dirname(target_path), f".incoming-{uuid.uuid4().hex}")
+    try:
+        try:
+            os.link(source_path, tmp_path)
+        except OSError:
+            _clone_file(source_path, tmp_path)
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_blob(key: str, source: BinaryIO, size: Optional[int] = None) -> bool:
+    """
+    Stream a blob from a file object into the store, verifying it against its key.
+
+    The data is hashed while it is copied in chunks, so blobs of any size use
+    constant memory. Nothing is written if the blob is already stored.
+
+    Args:
+        key: Blob key the data claims to have (see blob_key).
+        source: Readable binary file object positioned at the blob's data.
+        size: Expected size in bytes, if known.
+
+    Returns:
+        bool: True if the blob was written, False if it was already stored.
+
+    Raises:
+        ValueError: If the key is malformed or the data does not match it.
+    """
+    if not BLOB_KEY_PATTERN.fullmatch(key):
+        raise ValueError(f"Invalid blob key '{key}'")
+    target_path = blob_path(key)
+    if os.path.exists(target_path):
+        return False
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    tmp_path = os.path.join(os.path.dirname(target_path), f".incoming-{uuid.uuid4().hex}")
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                f.write(chunk)
+                written += len(chunk)
+        if digest.hexdigest() != key.split("/")[1].split(".")[0] or (size is not None and written != size):
+            raise ValueError(f"Blob {key} does not match its content hash")
+        os.replace(tmp_path, target_path)
+        return True
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _load_refs() -> Dict[str, List[str]]:
+    try:
+        with open(REFS_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_refs(refs: Dict[str, List[str]]):
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    # Unique per writer: the lock only covers this process, and other processes may share the store
+    fd, tmp_path = tempfile.mkstemp(dir=BLOB_DIR, prefix=".refs.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(refs, f)
+        os.replace(tmp_path, REFS_FILE)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _add_refs(refs: Dict[str, List[str]], collection_id: str, keys: Iterable[str]):
+    for key in keys:
+        holders = refs.setdefault(key, [])
+        if collection_id not in holders:
+            holders.append(collection_id)
+
+
+def _remove_blob(key: str):
+    path = blob_path(key)
+    for file_path in (path, thumbnail_path(path)):
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+
+def set_collection_refs(collection_id: str, keys: Iterable[str]) -> List[str]:
+    """
+    Make `keys` the exact set of blobs referenced by a collection.
+
+    Blobs no longer referenced by any collection are deleted.
+
+    Returns:
+        list: Keys of the deleted blobs.
+    """
+    keys = set(keys)
+    removed = []
+    with _refs_lock:
+        refs = _load_refs()
+        _add_refs(refs, collection_id, keys)
+        for key in [key for key, holders in refs.items() if collection_id in holders and key not in keys]:
+            refs[key].remove(collection_id)
+            if not refs[key]:
+                del refs[key]
+                removed.append(key)
+        _write_refs(refs)
+        # Deleted while holding the lock, so a concurrent save that refs the same blob recreates it after.
+        for key in removed:
+            _remove_blob(key)
+    return removed
+
+
+def release_collection(collection_id: str) -> List[str]:
+    """Drop all of a collection's references, deleting blobs that are no longer used."""
+    return set_collection_refs(collection_id, [])
+
+
+def ingest_images(collection_id: str, image_paths: Iterable[str]) -> Dict[str, str]:
+    """
+    Store images in the blob store on behalf of a collection.
+
+    Hashing and copying run in parallel. The collection's references are
+    recorded before the blobs are written, so a concurrent delete of another
+    collection can never remove a blob this one is about to use. Images that
+    are already stored cost a hash (or nothing, if passed by blob path).
+
+    Args:
+        collection_id: Collection that will reference the images.
+        image_paths: Existing image files to store.
+
+    Returns:
+        dict: Maps each stored image path to its blob key (see blob_path). Missing files are left out.
+    """
+    image_paths = list(dict.fromkeys(path for path in image_paths if path and os.path.isfile(path)))
+
+    def hash_image(path: str) -> Optional[str]:
+        try:
+            return blob_key(path)
+        except OSError as e:
+            print(f"Error reading image {path}: {e}")
+            return None
+
+    keys = dict(zip(image_paths, _executor.map(hash_image, image_paths)))
+    keys = {path: key for path, key in keys.items() if key}
+    with _refs_lock:
+        refs = _load_refs()
+        _add_refs(refs, collection_id, keys.values())
+        _write_refs(refs)
+
+    def store_image(item):
+        path, key = item
+        _materialize(path, key)
+        if not os.path.exists(thumbnail_path(blob_path(key))):
+            create_thumbnail(blob_path(key))
+
+    list(_executor.map(store_image, keys.items()))
+    return keys
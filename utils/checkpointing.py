@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+CHECKPOINT_DB = os.environ.get("ARTISELF_CHECKPOINT_DB", "data/checkpoints.sqlite3")
+# Set ARTISELF_CHECKPOINTS=0 to run the graphs without durable checkpoints.
+CHECKPOINTS_ENABLED = os.environ.get("ARTISELF_CHECKPOINTS", "1") != "0"
+# Checkpoints of runs that failed and were never retried are dropped after this many hours
+CHECKPOINT_TTL_HOURS = float(os.environ.get("ARTISELF_CHECKPOINT_TTL_HOURS", 24))
+
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+# thread id -> [lock, number of runs holding or waiting for it]; one run per thread at a time
+_thread_locks: Dict[str, List[Any]] = {}
+_thread_locks_guard = threading.Lock()
+
+
+def get_checkpointer():
+    """
+    Return the process-wide SQLite checkpointer for the sync graphs.
+
+    LangGraph saves the state after every node, so an interrupted run can be
+    resumed from its last completed node instead of starting over.
+
+    Returns:
+        A SqliteSaver, or None if checkpointing is disabled or unavailable.
+    """
+    global _checkpointer
+    if not CHECKPOINTS_ENABLED:
+        return None
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            try:
+                from langgraph.checkpoint.sqlite import SqliteSaver
+            except ImportError:
+                print("langgraph-checkpoint-sqlite is not installed; runs will not be resumable.")
+                return None
+            db_dir = os.path.dirname(CHECKPOINT_DB)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            _checkpointer = SqliteSaver(sqlite3.connect(CHECKPOINT_DB, check_same_thread=False))
+            with _checkpointer.cursor() as cur:
+                # When each thread's latest run started, so abandoned threads can be found
+                cur.execute("CREATE TABLE IF NOT EXISTS thread_runs "
+                            "(thread_id TEXT PRIMARY KEY, started_at REAL NOT NULL)")
+            _prune_stale_threads(_checkpointer)
+        return _checkpointer
+
+
+def _prune_stale_threads(checkpointer):
+    """
+    Delete the checkpoints of threads whose last run started more than CHECKPOINT_TTL_HOURS ago.
+
+    Completed runs delete their own thread; this catches failed runs that were
+    never retried. Threads without a recorded start (written before starts
+    were recorded) are pruned too.
+    """
+    cutoff = time.time() - CHECKPOINT_TTL_HOURS * 3600
+    try:
+        with checkpointer.cursor() as cur:
+            cur.execute(
+                "SELECT thread_id FROM thread_runs WHERE started_at < ? "
+                "UNION SELECT DISTINCT thread_id FROM checkpoints "
+                "WHERE thread_id NOT IN (SELECT thread_id FROM thread_runs)",
+                (cutoff,)
+            )
+            stale = [row[0] for row in cur.fetchall()]
+        for thread_id in stale:
+            _delete_thread(checkpointer, thread_id)
+        if stale:
+            print(f"Pruned checkpoints of {len(stale)} abandoned runs")
+    except sqlite3.Error as e:
+        print(f"Error pruning old checkpoints: {e}")
+
+
+def _record_run_start(checkpointer, thread_id: str):
+    with checkpointer.cursor() as cur:
+        cur.execute("INSERT OR REPLACE INTO thread_runs (thread_id, started_at) VALUES (?, ?)",
+                    (thread_id, time.time()))
+
+
+def _delete_thread(checkpointer, thread_id: str):
+    checkpointer.delete_thread(thread_id)
+    with checkpointer.cursor() as cur:
+        cur.execute("DELETE FROM thread_runs WHERE thread_id = ?", (thread_id,))
+
+
+def run_thread_id(kind: str, session_id: Optional[str], *inputs: Any) -> str:
+    """
+    Derive a checkpoint thread id from the requesting session and a run's inputs.
+
+    Ids are deterministic per session, so retrying the same request from the
+    same session lands on the same thread and picks up where the interrupted
+    run stopped, while identical requests from other sessions get threads of
+    their own. Without a session id every run gets a fresh thread.
+    """
+    if session_id is None:
+        session_id = uuid.uuid4().hex
+    payload = json.dumps([kind, session_id, *inputs], sort_keys=True, default=str)
+    return f"{kind}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]}"
+
+
+def _thread_config(thread_id: str, config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    config = dict(config or {})
+    config["configurable"] = {**config.get("configurable", {}), "thread_id": thread_id}
+    return config
+
+
+@contextmanager
+def _exclusive_thread(thread_id: str):
+    """Hold the thread's lock, so a second run of the same thread waits instead of resuming the first mid-flight."""
+    with _thread_locks_guard:
+        entry = _thread_locks.setdefault(thread_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _thread_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _thread_locks[thread_id]
+
+
+def _resume_input(graph, state: Dict[str, Any], config: Dict[str, Any]):
+    # A pending next node means the previous run on this thread stopped part-way.
+    snapshot = graph.get_state(config)
+    if snapshot.next:
+        print(f"Resuming run {config['configurable']['thread_id']} at {', '.join(snapshot.next)}")
+        return None
+    return state
+
+
+def invoke_resumable(graph, state: Dict[str, Any], thread_id: str, config: Optional[Dict[str, Any]] = None):
+    """
+    Run a compiled graph, resuming the thread's unfinished run if there is one.
+
+    The thread's checkpoints are dropped once the run completes, so the next
+    request with the same inputs starts fresh; those of runs that fail and are
+    never retried are pruned after CHECKPOINT_TTL_HOURS. Runs of the same
+    thread in this process take turns.
+    """
+    if graph.checkpointer is None:
+        return graph.invoke(state, config=config)
+    config = _thread_config(thread_id, config)
+    with _exclusive_thread(thread_id):
+        _record_run_start(graph.checkpointer, thread_id)
+        result = graph.invoke(_resume_input(graph, state, config), config=config)
+        _delete_thread(graph.checkpointer, thread_id)
+    return result
+
+
+def stream_resumable(graph, state: Dict[str, Any], thread_id: str, config: Optional[Dict[str, Any]] = None,
+                     stream_mode: str = "updates") -> Iterator[Any]:
+    """Streaming counterpart of invoke_resumable."""
+    if graph.checkpointer is None:
+        yield from graph.stream(state, config=config, stream_mode=stream_mode)
+        return
+    config = _thread_config(thread_id, config)
+    with _exclusive_thread(thread_id):
+        _record_run_start(graph.checkpointer, thread_id)
+        yield from graph.stream(_resume_input(graph, state, config), config=config, stream_mode=stream_mode)
+        _delete_thread(graph.checkpointer, thread_id)
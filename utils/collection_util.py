@@ -1,11 +1,43 @@
+import io
 import os
 import json
+import time
+import sqlite3
 import datetime
-from typing import List, Dict, Any, Optional
+import tempfile
+import tarfile
+import zipfile
+from typing import List, Dict, Any, BinaryIO, Iterator, Optional, Tuple
 import streamlit as st
 import shutil
+import threading
+from utils.blob_store import (BLOB_KEY_PATTERN, HASH_CHUNK_SIZE, blob_key, blob_path, ingest_images,
+                              set_collection_refs, release_collection, write_blob)
+from utils.search_index import index_collection, index_iterations, indexed_collections, remove_collection, search
+from utils.concept_index import request_concept_index_refresh
 
 COLLECTIONS_DIR = "collections"
+CATALOG_FILE = os.path.join(COLLECTIONS_DIR, "catalog.json")
+# Iterations added by update_collection are appended here instead of rewriting metadata.json
+JOURNAL_FILE = "journal.jsonl"
+# Fold the journal into metadata.json once it holds this many entries
+JOURNAL_COMPACT_ENTRIES = int(os.environ.get("ARTISELF_JOURNAL_COMPACT_ENTRIES", 100))
+# Layout of the archives written by export_collections
+ARCHIVE_FORMATS = ("zip", "tar")
+ARCHIVE_VERSION = 1
+ARCHIVE_MANIFEST = "manifest.json"
+ARCHIVE_BLOB_DIR = "_blobs"
+# Exports from the Collections page are written here; only the latest one is kept
+EXPORT_DIR = os.environ.get("ARTISELF_EXPORT_DIR", os.path.join(COLLECTIONS_DIR, "_exports"))
+# Streamlit holds a download in memory, so larger archives are left in EXPORT_DIR instead
+ARCHIVE_DOWNLOAD_LIMIT = int(os.environ.get("ARTISELF_ARCHIVE_DOWNLOAD_MB", 200)) * 1024 * 1024
+
+# Guards read-modify-write cycles on the catalog (background jobs may save concurrently)
+_catalog_lock = threading.RLock()
+# (mtime, catalog) of the last catalog read, so unchanged catalogs are not re-parsed
+_catalog_cache = None
+# Whether the search index was checked against the catalog since the process started
+_search_index_synced = False
 
 def ensure_collections_dir():
     """Ensure the collections directory exists."""
@@ -15,6 +47,203 @@ def ensure_collections_dir():
         with open(os.path.join(COLLECTIONS_DIR, ".gitkeep"), "w") as f:
             pass
 
+def _write_json_atomic(path: str, data: Any, indent: Optional[int] = None):
+    """Write JSON to a temp file and rename it into place, so readers never see a partial file."""
+    # A unique temp name per writer, so concurrent saves never interleave in one temp file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f".{os.path.basename(path)}.",
+                                    suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=indent)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _preview_indices(count: int) -> List[int]:
+    """Indices of the first, middle and last artworks of a history with `count` entries."""
+    indices = []
+    if count:
+        indices.append(0)
+    if count > 2:
+        indices.append(count // 2)
+    if count > 1:
+        indices.append(count - 1)
+    return indices
+
+def _preview_paths(art_history: List[Dict[str, Any]]) -> List[str]:
+    """Relative image paths of the first, middle and last artworks, for collection cards."""
+    return [art_history[i]["image_url"] for i in _preview_indices(len(art_history)) if art_history[i].get("image_url")]
+
+def _read_journal(collection_dir: str) -> List[Dict[str, Any]]:
+    """Read a collection's journal entries, skipping a line torn by a crash mid-append."""
+    entries = []
+    try:
+        with open(os.path.join(collection_dir, JOURNAL_FILE), "r") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return entries
+
+def _read_collection(collection_dir: str) -> Dict[str, Any]:
+    """
+    Read a collection's metadata with its journal applied; image paths stay relative.
+
+    Journal entries only apply to the metadata generation they were written
+    against and only at the position they were appended at, so replaying a
+    journal that was already compacted, or left over from a full rewrite,
+    changes nothing.
+    """
+    with open(os.path.join(collection_dir, "metadata.json"), "r") as f:
+        metadata = json.load(f)
+    art_history = metadata.setdefault("art_history", [])
+    generation = metadata.get("generation", 0)
+    for entry in _read_journal(collection_dir):
+        if entry.get("generation") == generation and entry.get("index") == len(art_history):
+            art_history.append(entry["item"])
+            metadata["updated_at"] = entry["updated_at"]
+    metadata["artwork_count"] = len(art_history)
+    return metadata
+
+def _append_journal(collection_dir: str, entries: List[Dict[str, Any]]):
+    """Durably append entries to a collection's journal, one JSON object per line."""
+    with open(os.path.join(collection_dir, JOURNAL_FILE), "ab+") as f:
+        data = "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+        # Start on a fresh line if a crash left a torn entry at the end
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+def _write_snapshot(collection_dir: str, metadata: Dict[str, Any]):
+    """
+    Atomically replace metadata.json and start a new journal generation.
+
+    The old journal is removed afterwards; if that doesn't happen, its entries
+    belong to the previous generation and are ignored.
+    """
+    metadata["generation"] = metadata.get("generation", 0) + 1
+    metadata["artwork_count"] = len(metadata.get("art_history", []))
+    _write_json_atomic(os.path.join(collection_dir, "metadata.json"), metadata, indent=2)
+    try:
+        os.remove(os.path.join(collection_dir, JOURNAL_FILE))
+    except FileNotFoundError:
+        pass
+
+def compact_collection(collection_id: str):
+    """Fold a collection's journal into its metadata.json."""
+    collection_dir = os.path.join(COLLECTIONS_DIR, collection_id)
+    with _catalog_lock:
+        _write_snapshot(collection_dir, _read_collection(collection_dir))
+
+def _catalog_entry(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarize a collection's metadata into its catalog entry."""
+    art_history = metadata.get("art_history", [])
+    return {
+        "name": metadata.get("name", "Unnamed Collection"),
+        "description": metadata.get("description", ""),
+        "created_at": metadata.get("created_at", ""),
+        "updated_at": metadata.get("updated_at", ""),
+        "artwork_count": len(art_history),
+        "previews": _preview_paths(art_history)
+    }
+
+def rebuild_catalog() -> Dict[str, Dict[str, Any]]:
+    """
+    Rebuild the catalog by scanning every collection's metadata.json.
+
+    Only needed when the catalog is missing (e.g. collections created by an
+    older version or copied in by hand); normal saves keep it up to date.
+
+    Returns:
+        The rebuilt catalog, keyed by collection ID
+    """
+    ensure_collections_dir()
+    catalog = {}
+    with _catalog_lock:
+        for item in os.listdir(COLLECTIONS_DIR):
+            metadata_file = os.path.join(COLLECTIONS_DIR, item, "metadata.json")
+            if not os.path.exists(metadata_file):
+                continue
+            try:
+                catalog[item] = _catalog_entry(_read_collection(os.path.join(COLLECTIONS_DIR, item)))
+            except Exception as e:
+                st.warning(f"Error reading collection {item}: {e}")
+        _write_catalog(catalog)
+    return catalog
+
+def _write_catalog(catalog: Dict[str, Dict[str, Any]]):
+    global _catalog_cache
+    _write_json_atomic(CATALOG_FILE, catalog)
+    _catalog_cache = (os.path.getmtime(CATALOG_FILE), catalog)
+
+def _load_catalog() -> Dict[str, Dict[str, Any]]:
+    global _catalog_cache
+    with _catalog_lock:
+        if not os.path.exists(CATALOG_FILE):
+            return rebuild_catalog()
+        mtime = os.path.getmtime(CATALOG_FILE)
+        if _catalog_cache and _catalog_cache[0] == mtime:
+            return _catalog_cache[1]
+        try:
+            with open(CATALOG_FILE, "r") as f:
+                catalog = json.load(f)
+        except Exception:
+            return rebuild_catalog()
+        _catalog_cache = (mtime, catalog)
+        return catalog
+
+def _catalog_upsert(collection_id: str, metadata: Dict[str, Any]):
+    with _catalog_lock:
+        catalog = dict(_load_catalog())
+        catalog[collection_id] = _catalog_entry(metadata)
+        _write_catalog(catalog)
+
+def _catalog_remove(collection_id: str):
+    with _catalog_lock:
+        catalog = dict(_load_catalog())
+        if catalog.pop(collection_id, None) is not None:
+            _write_catalog(catalog)
+
+def _update_search_index(update, *args):
+    """Apply a search index update; the index is rebuilt from the collections, so failures never fail a save."""
+    try:
+        update(*args)
+    except sqlite3.Error as e:
+        print(f"Error updating search index: {e}")
+        return
+    # Bring the saved concepts the strategies draw on up to date without slowing down the save
+    request_concept_index_refresh()
+
+def _collection_item(item: Dict[str, Any], collection_dir: str, stored: Dict[str, str]) -> Dict[str, Any]:
+    """Copy an art history item with its image path made relative to the collection directory."""
+    item_copy = item.copy()
+    image_path = item.get("image_url")
+    if image_path in stored:
+        item_copy["image_url"] = os.path.relpath(blob_path(stored[image_path]), collection_dir)
+    elif image_path and os.path.abspath(image_path).startswith(os.path.abspath(collection_dir) + os.sep):
+        # Image of an older collection layout that has gone missing; keep its relative path
+        item_copy["image_url"] = os.path.relpath(image_path, collection_dir)
+    return item_copy
+
+def _discard_partial_collection(collection_id: str, collection_dir: str):
+    """Undo a save that failed part-way, so it leaves no blob references, files or catalog entry behind."""
+    try:
+        release_collection(collection_id)
+        _catalog_remove(collection_id)
+        _update_search_index(remove_collection, collection_id)
+    except Exception as e:
+        print(f"Error cleaning up collection {collection_id}: {e}")
+    shutil.rmtree(collection_dir, ignore_errors=True)
+
 def save_collection(name: str, description: str, art_history: List[Dict[str, Any]]) -> bool:
     """
     Save an art history collection to disk.
@@ -41,26 +270,14 @@ def save_collection(name: str, description: str, art_history: List[Dict[str, Any
     collection_dir = os.path.join(COLLECTIONS_DIR, collection_id)
     os.makedirs(collection_dir, exist_ok=True)
     
-    # Create images directory within the collection
-    images_dir = os.path.join(collection_dir, "images")
-    os.makedirs(images_dir, exist_ok=True)
-    
-    # Copy the image files to the collection directory
-    processed_art_history = []
-    for item in art_history:
-        if "image_url" in item and os.path.exists(item["image_url"]):
-            # Get just the filename from the path
-            image_filename = os.path.basename(item["image_url"])
-            # Create a path within the collection
-            collection_image_path = os.path.join(images_dir, image_filename)
-            # Copy the image file
-            shutil.copy2(item["image_url"], collection_image_path)
-            # Update the path in the art history
-            item_copy = item.copy()
-            item_copy["image_url"] = os.path.join("images", image_filename)
-            processed_art_history.append(item_copy)
-        else:
-            processed_art_history.append(item)
+    try:
+        # Reference the images from the shared blob store; only images not stored yet are copied
+        stored = ingest_images(collection_id, [item.get("image_url") for item in art_history])
+    except Exception as e:
+        _discard_partial_collection(collection_id, collection_dir)
+        st.error(f"Error saving collection images: {e}")
+        return False
+    processed_art_history = [_collection_item(item, collection_dir, stored) for item in art_history]
     
     # Create the metadata file
     metadata = {
@@ -72,10 +289,12 @@ def save_collection(name: str, description: str, art_history: List[Dict[str, Any
     }
     
     try:
-        with open(os.path.join(collection_dir, "metadata.json"), "w") as f:
-            json.dump(metadata, f, indent=2)
+        _write_json_atomic(os.path.join(collection_dir, "metadata.json"), metadata, indent=2)
+        _catalog_upsert(collection_id, metadata)
+        _update_search_index(index_collection, collection_id, processed_art_history)
         return True
     except Exception as e:
+        _discard_partial_collection(collection_id, collection_dir)
         st.error(f"Error saving collection: {e}")
         return False
 
@@ -83,56 +302,30 @@ def list_collections() -> List[Dict[str, Any]]:
     """
     List all available collections.
     
+    Reads the collection catalog rather than every collection's metadata.
+    
     Returns:
         List of dictionaries with collection info
     """
-    ensure_collections_dir()
-    
     collections = []
-    for item in os.listdir(COLLECTIONS_DIR):
-        collection_dir = os.path.join(COLLECTIONS_DIR, item)
-        metadata_file = os.path.join(collection_dir, "metadata.json")
-        
-        if os.path.isdir(collection_dir) and os.path.exists(metadata_file):
-            try:
-                with open(metadata_file, "r") as f:
-                    metadata = json.load(f)
-                
-                collections.append({
-                    "id": item,
-                    "name": metadata.get("name", "Unnamed Collection"),
-                    "description": metadata.get("description", ""),
-                    "created_at": metadata.get("created_at", ""),
-                    "updated_at": metadata.get("updated_at", ""),
-                    "artwork_count": len(metadata.get("art_history", [])),
-                    "thumbnail": get_collection_thumbnail(item)
-                })
-            except Exception as e:
-                st.warning(f"Error reading collection {item}: {e}")
+    for collection_id, entry in _load_catalog().items():
+        collection_dir = os.path.join(COLLECTIONS_DIR, collection_id)
+        previews = [os.path.normpath(os.path.join(collection_dir, path)) for path in entry.get("previews", [])]
+        collections.append({
+            "id": collection_id,
+            "name": entry.get("name", "Unnamed Collection"),
+            "description": entry.get("description", ""),
+            "created_at": entry.get("created_at", ""),
+            "updated_at": entry.get("updated_at", ""),
+            "artwork_count": entry.get("artwork_count", 0),
+            "thumbnail": previews[0] if previews else None,
+            "previews": previews
+        })
     
     # Sort by created date, newest first
     collections.sort(key=lambda x: x.get("created_at", ""), reverse=True)
     return collections
 
-def get_collection_thumbnail(collection_id: str) -> Optional[str]:
-    """Get the first image from a collection to use as thumbnail."""
-    collection_dir = os.path.join(COLLECTIONS_DIR, collection_id)
-    metadata_file = os.path.join(collection_dir, "metadata.json")
-    
-    if os.path.exists(metadata_file):
-        try:
-            with open(metadata_file, "r") as f:
-                metadata = json.load(f)
-            
-            art_history = metadata.get("art_history", [])
-            if art_history and "image_url" in art_history[0]:
-                # Return the full path to the image
-                img_rel_path = art_history[0]["image_url"]
-                return os.path.join(collection_dir, img_rel_path)
-        except Exception:
-            pass
-    return None
-
 def load_collection(collection_id: str) -> Dict[str, Any]:
     """
     Load a collection by ID.
@@ -148,14 +341,13 @@ def load_collection(collection_id: str) -> Dict[str, Any]:
     
     if os.path.exists(metadata_file):
         try:
-            with open(metadata_file, "r") as f:
-                metadata = json.load(f)
+            metadata = _read_collection(collection_dir)
             
             # Update the image paths to be absolute
             art_history = metadata.get("art_history", [])
             for item in art_history:
-                if "image_url" in item:
-                    item["image_url"] = os.path.join(collection_dir, item["image_url"])
+                if item.get("image_url"):
+                    item["image_url"] = os.path.normpath(os.path.join(collection_dir, item["image_url"]))
             
             metadata["art_history"] = art_history
             return metadata
@@ -179,16 +371,126 @@ def delete_collection(collection_id: str) -> bool:
     if os.path.exists(collection_dir):
         try:
             shutil.rmtree(collection_dir)
+            _catalog_remove(collection_id)
+            release_collection(collection_id)
+            _update_search_index(remove_collection, collection_id)
             return True
         except Exception as e:
             st.error(f"Error deleting collection: {e}")
     
     return False
 
+def sync_search_index():
+    """
+    Index collections the search index is missing or behind on, and drop ones that no longer exist.
+
+    Run once per process by the index_collections job; searches run it
+    themselves if it hasn't finished yet.
+    """
+    global _search_index_synced
+    catalog = _load_catalog()
+    indexed = indexed_collections()
+    for collection_id, entry in catalog.items():
+        if indexed.get(collection_id, 0) != entry.get("artwork_count", 0):
+            try:
+                art_history = _read_collection(os.path.join(COLLECTIONS_DIR, collection_id))["art_history"]
+            except Exception as e:
+                print(f"Error reading collection {collection_id} for the search index: {e}")
+                continue
+            index_collection(collection_id, art_history)
+    for collection_id in indexed.keys() - catalog.keys():
+        remove_collection(collection_id)
+    _search_index_synced = True
+
+def search_collections(query: str, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Search every iteration's concept, feedback, image analysis and modification type.
+    
+    Saves and updates keep the index current; collections it has not seen
+    (e.g. saved by an older version or copied in by hand) are indexed on the
+    first search.
+    
+    Args:
+        query: Words to look for
+        limit: Maximum number of hits
+    
+    Returns:
+        List of hits, best first, each with the collection ID and name, the
+        iteration's position, its absolute image path, modification type and
+        a snippet with the matching words in bold
+    """
+    try:
+        if not _search_index_synced:
+            sync_search_index()
+        hits = search(query, limit)
+    except sqlite3.Error as e:
+        st.error(f"Error searching collections: {e}")
+        return []
+    catalog = _load_catalog()
+    results = []
+    for hit in hits:
+        entry = catalog.get(hit["collection_id"])
+        if entry is None:
+            continue
+        collection_dir = os.path.join(COLLECTIONS_DIR, hit["collection_id"])
+        results.append({
+            **hit,
+            "collection_name": entry.get("name", "Unnamed Collection"),
+            "image_url": os.path.normpath(os.path.join(collection_dir, hit["image_url"])) if hit["image_url"] else None
+        })
+    return results
+
+def _read_generation(collection_dir: str) -> int:
+    with open(os.path.join(collection_dir, "metadata.json"), "r") as f:
+        return json.load(f).get("generation", 0)
+
+def _append_iterations(collection_id: str, collection_dir: str, art_history: List[Dict[str, Any]]) -> bool:
+    """
+    Append the iterations added since the last save to the collection's journal.
+
+    Only the new items and the preview images are touched. Returns False (and
+    writes nothing) unless the saved history is a prefix of `art_history`,
+    judged by its length and last image.
+    """
+    entry = _load_catalog().get(collection_id)
+    saved_count = entry.get("artwork_count", 0) if entry else 0
+    if not saved_count or len(art_history) <= saved_count or not entry.get("previews"):
+        return False
+
+    indices = sorted({saved_count - 1, *range(saved_count, len(art_history)), *_preview_indices(len(art_history))})
+    stored = ingest_images(collection_id, [art_history[i].get("image_url") for i in indices])
+    items = {i: _collection_item(art_history[i], collection_dir, stored) for i in indices}
+    if items[saved_count - 1].get("image_url") != entry["previews"][-1]:
+        return False
+
+    metadata_generation = _read_generation(collection_dir)
+    updated_at = datetime.datetime.now().isoformat()
+    _append_journal(collection_dir, [
+        {"generation": metadata_generation, "index": i, "item": items[i], "updated_at": updated_at}
+        for i in range(saved_count, len(art_history))
+    ])
+    catalog = dict(_load_catalog())
+    catalog[collection_id] = {
+        **entry,
+        "updated_at": updated_at,
+        "artwork_count": len(art_history),
+        "previews": [items[i]["image_url"] for i in _preview_indices(len(art_history)) if items[i].get("image_url")]
+    }
+    _write_catalog(catalog)
+    _update_search_index(index_iterations, collection_id, saved_count,
+                         [items[i] for i in range(saved_count, len(art_history))])
+
+    if len(_read_journal(collection_dir)) >= JOURNAL_COMPACT_ENTRIES:
+        compact_collection(collection_id)
+    return True
+
 def update_collection(collection_id: str, art_history: List[Dict[str, Any]]) -> bool:
     """
     Update an existing collection with new artwork history.
     
+    When iterations were only added, they are appended to the collection's
+    journal (one small write); otherwise metadata.json is rewritten.
+    
     Args:
         collection_id: ID of the collection to update
         art_history: New art history to save
@@ -196,59 +498,259 @@ def update_collection(collection_id: str, art_history: List[Dict[str, Any]]) ->
     Returns:
         bool: True if updated successfully, False otherwise
     """
-    collection_dir = os.path.join("collections", collection_id)
+    collection_dir = os.path.join(COLLECTIONS_DIR, collection_id)
     metadata_file = os.path.join(collection_dir, "metadata.json")
     
     if not os.path.exists(metadata_file):
         return False
         
     try:
-        # Read existing metadata
-        with open(metadata_file, "r") as f:
-            metadata = json.load(f)
-        
-        # Create images directory within the collection if it doesn't exist
-        images_dir = os.path.join(collection_dir, "images")
-        os.makedirs(images_dir, exist_ok=True)
-        
-        # Copy any new image files to the collection directory and fix paths
-        processed_art_history = []
-        
-        for item in art_history:
-            item_copy = item.copy()
+        with _catalog_lock:
+            if _append_iterations(collection_id, collection_dir, art_history):
+                return True
+
+            # Read existing metadata
+            metadata = _read_collection(collection_dir)
             
-            if "image_url" in item and item["image_url"]:
-                image_path = item["image_url"]
-                
-                # Check if this is already a path within our collection
-                collection_path_prefix = os.path.join("collections", collection_id)
-                
-                if collection_path_prefix in image_path:
-                    # This is already a collection image - extract just the filename
-                    filename = os.path.basename(image_path)
-                    # Store just the relative path within the collection
-                    item_copy["image_url"] = os.path.join("images", filename)
-                elif os.path.exists(image_path):
-                    # This is a new image from outside the collection - copy it
-                    filename = os.path.basename(image_path)
-                    target_path = os.path.join(images_dir, filename)
-                    shutil.copy2(image_path, target_path)
-                    # Store just the relative path within the collection
-                    item_copy["image_url"] = os.path.join("images", filename)
+            # Store new images in the blob store; images already there are only referenced
+            stored = ingest_images(collection_id, [item.get("image_url") for item in art_history])
+            processed_art_history = [_collection_item(item, collection_dir, stored) for item in art_history]
             
-            processed_art_history.append(item_copy)
-        
-        # Update the metadata
-        metadata["art_history"] = processed_art_history
-        metadata["updated_at"] = datetime.datetime.now().isoformat()
-        metadata["artwork_count"] = len(processed_art_history)
-        
-        # Save the updated metadata
-        with open(metadata_file, "w") as f:
-            json.dump(metadata, f, indent=2)
+            # Update the metadata
+            metadata["art_history"] = processed_art_history
+            metadata["updated_at"] = datetime.datetime.now().isoformat()
+            
+            # Save the updated metadata
+            _write_snapshot(collection_dir, metadata)
+            _catalog_upsert(collection_id, metadata)
+            _update_search_index(index_collection, collection_id, processed_art_history)
+            # Release blobs of images that were removed from the history
+            set_collection_refs(collection_id, stored.values())
             
         return True
     except Exception as e:
         print(f"Error updating collection: {e}")
         st.error(f"Error updating collection: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def _open_archive(target, mode: str, archive_format: str):
+    """Open a zip or tar archive at a path or on a binary file object for streaming."""
+    if archive_format == "zip":
+        return zipfile.ZipFile(target, mode, allowZip64=True)
+    if isinstance(target, (str, os.PathLike)):
+        return tarfile.open(name=target, mode=f"{mode}|*" if mode == "r" else f"{mode}|")
+    return tarfile.open(fileobj=target, mode=f"{mode}|*" if mode == "r" else f"{mode}|")
+
+def _write_member(archive, name: str, source: BinaryIO, size: int, compress: bool = True):
+    """Stream `size` bytes from `source` into the archive under `name`."""
+    if isinstance(archive, zipfile.ZipFile):
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        # PNGs are already compressed; deflating them again only costs CPU
+        info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        info.file_size = size
+        with archive.open(info, "w", force_zip64=True) as dst:
+            shutil.copyfileobj(source, dst, HASH_CHUNK_SIZE)
+    else:
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(time.time())
+        archive.addfile(info, source)
+
+def _write_json_member(archive, name: str, data: Any):
+    encoded = json.dumps(data, indent=2).encode("utf-8")
+    _write_member(archive, name, io.BytesIO(encoded), len(encoded))
+
+def _archive_members(archive) -> Iterator[Tuple[str, BinaryIO, int]]:
+    """Yield (name, file object, size) for each file in an archive, in archive order."""
+    if isinstance(archive, zipfile.ZipFile):
+        for info in archive.infolist():
+            if not info.is_dir():
+                with archive.open(info) as f:
+                    yield info.filename, f, info.file_size
+    else:
+        for member in archive:
+            if member.isfile():
+                yield member.name, archive.extractfile(member), member.size
+
+def export_collections(collection_ids: List[str], target, archive_format: str = "zip") -> Dict[str, int]:
+    """
+    Stream collections and their images into a zip or tar archive.
+
+    The archive holds a manifest.json listing the collections and blobs, then
+    each collection's metadata (journal applied) as <id>/metadata.json, then
+    every image once under _blobs/<blob key>. Images are copied in chunks, so
+    memory use does not grow with the size of the collections, and `target`
+    may be a non-seekable stream.
+
+    Args:
+        collection_ids: IDs of the collections to export
+        target: Path or writable binary file object
+        archive_format: "zip" or "tar"
+
+    Returns:
+        Dict with the number of exported collections and images
+    """
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format '{archive_format}'; use one of: {', '.join(ARCHIVE_FORMATS)}")
+    collections = {}
+    sources = {}
+    for collection_id in collection_ids:
+        collection_dir = os.path.join(COLLECTIONS_DIR, collection_id)
+        metadata = _read_collection(collection_dir)
+        for key in ("generation", "artwork_count"):
+            metadata.pop(key, None)
+        for item in metadata["art_history"]:
+            image_path = os.path.normpath(os.path.join(collection_dir, item.get("image_url") or ""))
+            if item.get("image_url") and os.path.isfile(image_path):
+                # Older collections keep their own images/ directory; their images are hashed here
+                key = blob_key(image_path)
+                sources.setdefault(key, image_path)
+                item["image_url"] = f"../{ARCHIVE_BLOB_DIR}/{key}"
+        collections[collection_id] = metadata
+
+    manifest = {
+        "format": ARCHIVE_VERSION,
+        "exported_at": datetime.datetime.now().isoformat(),
+        "collections": list(collections),
+        "blobs": {key: os.path.getsize(path) for key, path in sources.items()}
+    }
+    with _open_archive(target, "w", archive_format) as archive:
+        # The manifest and metadata come first, so an import can read them before any image arrives
+        _write_json_member(archive, ARCHIVE_MANIFEST, manifest)
+        for collection_id, metadata in collections.items():
+            _write_json_member(archive, f"{collection_id}/metadata.json", metadata)
+        for key, path in sources.items():
+            with open(path, "rb") as f:
+                _write_member(archive, f"{ARCHIVE_BLOB_DIR}/{key}", f, manifest["blobs"][key], compress=False)
+    return {"collections": len(collections), "images": len(sources)}
+
+def new_export_path(archive_format: str) -> str:
+    """
+    Return the path for a new export archive in EXPORT_DIR, removing earlier exports.
+
+    Args:
+        archive_format: "zip" or "tar"
+
+    Returns:
+        Absolute path of the archive to write
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    for name in os.listdir(EXPORT_DIR):
+        try:
+            os.remove(os.path.join(EXPORT_DIR, name))
+        except OSError as e:
+            print(f"Error removing old export {name}: {e}")
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.abspath(os.path.join(EXPORT_DIR, f"artiself_collections_{timestamp}.{archive_format}"))
+
+def _import_collection_id(collection_id: Any) -> bool:
+    """Whether an archive's collection ID can safely be used as a directory name."""
+    return (isinstance(collection_id, str) and collection_id == os.path.basename(collection_id)
+            and collection_id not in ("", ".", "..") and not collection_id.startswith(("_", ".")))
+
+def _imported_item(item: Any, collection_dir: str, stored: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Copy an imported art history item, pointing its image at the blob store.
+
+    Only references to images shipped in the archive are kept; any other
+    image_url (an absolute path, a ../../ path) is blanked, so an archive
+    can't make the pages open files outside the blob store.
+    """
+    item_copy = dict(item) if isinstance(item, dict) else {}
+    image_url = item_copy.get("image_url")
+    if isinstance(image_url, str) and image_url in stored:
+        item_copy["image_url"] = os.path.relpath(blob_path(stored[image_url]), collection_dir)
+    else:
+        item_copy["image_url"] = ""
+    return item_copy
+
+def import_collections(source) -> Dict[str, Any]:
+    """
+    Import collections from an archive written by export_collections.
+
+    Images are streamed into the blob store in chunks and verified against
+    their SHA-256 (which is their blob key); images the store already has are
+    skipped without being read. Image paths that are not blobs shipped in the
+    archive are blanked. Collections that already exist here keep their
+    current contents, so an interrupted import can simply be re-run.
+
+    Args:
+        source: Path or seekable binary file object of a zip or tar archive
+
+    Returns:
+        Dict with the imported and skipped collection IDs and the number of
+        images written and skipped
+
+    Raises:
+        ValueError: If the archive is malformed or an image fails verification
+    """
+    ensure_collections_dir()
+    if zipfile.is_zipfile(source):
+        archive_format = "zip"
+    else:
+        archive_format = "tar"
+        if hasattr(source, "seek"):
+            source.seek(0)
+    result = {"imported": [], "skipped": [], "images_written": 0, "images_skipped": 0}
+    prefix = f"../{ARCHIVE_BLOB_DIR}/"
+    # collection ID -> (metadata, blob keys) of the collections to create; only their images are stored
+    pending = {}
+    wanted = set()
+    try:
+        with _open_archive(source, "r", archive_format) as archive:
+            manifest = None
+            for name, f, size in _archive_members(archive):
+                if manifest is None:
+                    if name != ARCHIVE_MANIFEST:
+                        raise ValueError("Not an ArtiSelf collection archive: manifest.json must come first")
+                    manifest = json.load(f)
+                    if manifest.get("format") != ARCHIVE_VERSION:
+                        raise ValueError(f"Unsupported archive format {manifest.get('format')}")
+                    blobs = manifest.get("blobs", {})
+                    continue
+                collection_id, _, member = name.partition("/")
+                if collection_id == ARCHIVE_BLOB_DIR:
+                    if member not in wanted:
+                        continue
+                    if write_blob(member, f, blobs.get(member)):
+                        result["images_written"] += 1
+                    else:
+                        result["images_skipped"] += 1
+                elif member == "metadata.json" and collection_id in manifest.get("collections", []):
+                    if not _import_collection_id(collection_id):
+                        raise ValueError(f"Invalid collection ID '{collection_id}'")
+                    if os.path.exists(os.path.join(COLLECTIONS_DIR, collection_id)):
+                        result["skipped"].append(collection_id)
+                        continue
+                    metadata = json.load(f)
+                    keys = {str(item.get("image_url"))[len(prefix):] for item in metadata.get("art_history", [])
+                            if str(item.get("image_url")).startswith(prefix)}
+                    # Only well-formed keys the archive ships; anything else could point outside the store
+                    keys = [key for key in keys if key in blobs and BLOB_KEY_PATTERN.fullmatch(key)]
+                    # Reference the blobs before any arrive, so a concurrent delete can't collect one we skip
+                    set_collection_refs(collection_id, keys)
+                    pending[collection_id] = (metadata, keys)
+                    wanted.update(keys)
+            if manifest is None:
+                raise ValueError("Not an ArtiSelf collection archive: manifest.json is missing")
+
+        for collection_id, (metadata, keys) in pending.items():
+            missing = [key for key in keys if not os.path.exists(blob_path(key))]
+            if missing:
+                raise ValueError(f"Archive is missing {len(missing)} image(s) of collection '{collection_id}'")
+            collection_dir = os.path.join(COLLECTIONS_DIR, collection_id)
+            stored = {prefix + key: key for key in keys}
+            metadata["art_history"] = [_imported_item(item, collection_dir, stored)
+                                       for item in metadata.get("art_history", [])]
+            os.makedirs(collection_dir, exist_ok=True)
+            _write_json_atomic(os.path.join(collection_dir, "metadata.json"), metadata, indent=2)
+            _catalog_upsert(collection_id, metadata)
+            _update_search_index(index_collection, collection_id, metadata["art_history"])
+            result["imported"].append(collection_id)
+    except BaseException:
+        # Drop the references of collections that were not written, so their blobs can be collected
+        for collection_id in pending:
+            if collection_id not in result["imported"]:
+                release_collection(collection_id)
+        raise
+    return result
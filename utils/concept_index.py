@@ -0,0 +1,241 @@
+import os
+import re
+import zlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from utils.search_index import index_version, indexed_concepts
+
+# Retrieved prior concepts handed to the "build on previous ideas" style strategies
+SIMILAR_CONCEPTS = int(os.environ.get("ARTISELF_SIMILAR_CONCEPTS", 3))
+# Words and word pairs are hashed into this many features, so the index needs no vocabulary
+HASH_DIM = 1 << 18
+
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in into is it its of on or that the their this to was
+were will with which while who your you our we they them his her he she not no so than then there these
+those over under very can more most such each other new
+""".split())
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+# Rebuilds run on a background thread; a request made while one runs is picked up when it finishes
+_refresh_requested = False
+_refresher = None
+_refresh_lock = threading.Lock()
+
+Vector = Tuple[np.ndarray, np.ndarray]
+
+
+def _vectorize(text: str) -> Vector:
+    """Hashed term ids (words and adjacent word pairs) and their log-scaled counts."""
+    words = [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS and len(word) > 1]
+    terms = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if not terms:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    ids = np.fromiter((zlib.crc32(term.encode("utf-8")) % HASH_DIM for term in terms), dtype=np.int64,
+                      count=len(terms))
+    ids, counts = np.unique(ids, return_counts=True)
+    return ids, (1.0 + np.log(counts)).astype(np.float32)
+
+
+class ConceptIndex:
+    """
+    TF-IDF index over art concepts, held in NumPy arrays.
+
+    Documents are stored as term-sorted postings (term id, document, weight),
+    so a query is a binary search per query term, a gather and a weighted
+    bincount over the postings it shares terms with, followed by a partial sort.
+    """
+    def __init__(self, entries: Iterable[Dict[str, Any]] = (), cache: Optional[Dict[str, Vector]] = None):
+        """
+        Args:
+            entries: Art history items; each needs a "concept" and is returned as-is by `similar`.
+            cache: Vectors of a previous index, so its concepts are not tokenized again.
+        """
+        self._entries: List[Dict[str, Any]] = []
+        self._vectors: List[Vector] = []
+        self._cache: Dict[str, Vector] = {}
+        for entry in entries:
+            concept = entry.get("concept") or ""
+            if concept in self._cache:
+                continue
+            vector = cache.get(concept) if cache else None
+            if vector is None:
+                vector = _vectorize(concept)
+            self._cache[concept] = vector
+            if len(vector[0]):
+                self._entries.append(entry)
+                self._vectors.append(vector)
+        self._build()
+
+    def _build(self):
+        lengths = np.array([len(ids) for ids, _ in self._vectors], dtype=np.int64)
+        ids = np.concatenate([ids for ids, _ in self._vectors]) if self._vectors else np.empty(0, np.int64)
+        tf = np.concatenate([tf for _, tf in self._vectors]) if self._vectors else np.empty(0, np.float32)
+        docs = np.repeat(np.arange(len(self._vectors)), lengths)
+        # Smoothed IDF, so terms the corpus has never seen still count
+        df = np.bincount(ids, minlength=HASH_DIM)
+        self._idf = (np.log((1.0 + len(self._vectors)) / (1.0 + df)) + 1.0).astype(np.float32)
+        weights = tf * self._idf[ids]
+        norms = np.sqrt(np.bincount(docs, weights=weights ** 2, minlength=len(self._vectors)))
+        weights = weights / norms[docs] if len(weights) else weights
+        # Postings sorted by term, so a query only touches the documents sharing one of its terms
+        order = np.argsort(ids, kind="stable")
+        self._terms, self._docs, self._weights = ids[order], docs[order], weights[order].astype(np.float32)
+
+    def _query_vector(self, text: str) -> Optional[Vector]:
+        """Term ids and unit-length TF-IDF weights of `text`, or None if it has no terms."""
+        ids, tf = _vectorize(text)
+        if not len(ids):
+            return None
+        weights = tf * self._idf[ids]
+        return ids, weights / np.linalg.norm(weights)
+
+    def _scores(self, query: Vector) -> np.ndarray:
+        """Cosine similarity of every indexed concept to the query."""
+        ids, weights = query
+        starts = np.searchsorted(self._terms, ids, side="left")
+        ends = np.searchsorted(self._terms, ids, side="right")
+        postings = [np.arange(start, end) for start, end in zip(starts, ends) if end > start]
+        if not postings:
+            return np.zeros(len(self._entries), dtype=np.float32)
+        postings = np.concatenate(postings)
+        query_weights = np.repeat(weights, ends - starts)
+        return np.bincount(self._docs[postings], weights=self._weights[postings] * query_weights,
+                           minlength=len(self._entries))
+
+    def _score(self, query: Vector, text: str) -> float:
+        """Cosine similarity of a concept that is not in the index to the query."""
+        ids, tf = self._cache.get(text) or _vectorize(text)
+        if not len(ids):
+            return 0.0
+        weights = tf * self._idf[ids]
+        _, in_query, in_text = np.intersect1d(query[0], ids, assume_unique=True, return_indices=True)
+        return float(query[1][in_query] @ weights[in_text]) / float(np.linalg.norm(weights))
+
+    def similar(self, text: str, k: int = SIMILAR_CONCEPTS, extra: Iterable[Dict[str, Any]] = (),
+                exclude: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """
+        Return the k entries whose concepts are most similar (cosine over TF-IDF) to `text`.
+
+        Args:
+            text: Concept to compare against
+            k: Maximum number of entries
+            extra: Entries to rank alongside the indexed ones (e.g. the current session's
+                history), weighted with the index's IDF; preferred over an indexed entry
+                with the same concept
+            exclude: Concepts never to return, such as `text` itself
+
+        Returns:
+            Up to k entries sharing at least one term with `text`, most similar first
+        """
+        query = self._query_vector(text)
+        if query is None or k <= 0:
+            return []
+        exclude = set(exclude) | {text}
+        candidates = []
+        extra_concepts = set()
+        for entry in extra:
+            concept = entry.get("concept") or ""
+            if concept in exclude or concept in extra_concepts:
+                continue
+            extra_concepts.add(concept)
+            score = self._score(query, concept)
+            if score > 0:
+                candidates.append((score, entry))
+        scores = self._scores(query)
+        # Only the best k plus the skipped concepts can make the cut, so skip a full sort
+        top = min(len(scores), k + len(exclude) + len(extra_concepts))
+        if top:
+            best = np.argpartition(-scores, top - 1)[:top]
+            for i in best:
+                concept = self._entries[i].get("concept")
+                if scores[i] > 0 and concept not in exclude and concept not in extra_concepts:
+                    candidates.append((float(scores[i]), self._entries[i]))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        return [entry for _, entry in candidates[:k]]
+
+
+def refresh_concept_index() -> ConceptIndex:
+    """
+    Rebuild the process-wide index from the concepts in the search index.
+
+    Only concepts the previous index hasn't seen are tokenized; queries
+    already running keep using the previous index.
+    """
+    global _index, _index_version
+    version = index_version()
+    with _index_lock:
+        cache = _index._cache if _index else None
+    index = ConceptIndex(indexed_concepts(), cache=cache)
+    with _index_lock:
+        _index, _index_version = index, version
+    return index
+
+
+def _refresh_in_background():
+    global _refresh_requested, _refresher
+    while True:
+        with _refresh_lock:
+            if not _refresh_requested:
+                _refresher = None
+                return
+            _refresh_requested = False
+        try:
+            refresh_concept_index()
+        except Exception as e:
+            print(f"Error rebuilding the concept index: {e}")
+
+
+def request_concept_index_refresh():
+    """Rebuild the index on a background thread, e.g. after a collection was saved."""
+    global _refresh_requested, _refresher
+    with _refresh_lock:
+        _refresh_requested = True
+        if _refresher is None:
+            _refresher = threading.Thread(target=_refresh_in_background, name="concept-index", daemon=True)
+            _refresher.start()
+
+
+def get_concept_index() -> ConceptIndex:
+    """
+    Return the process-wide index of the concepts saved in collections.
+
+    Never builds the index on the caller's thread: it is built at startup (see
+    the index_collections job) and refreshed in the background whenever the
+    search index changes. Until the first build finishes, an empty index is
+    returned.
+    """
+    with _index_lock:
+        index, current = _index, _index_version == index_version()
+    if index is None or not current:
+        request_concept_index_refresh()
+    return index or ConceptIndex()
+
+
+def similar_concepts(text: str, history: Iterable[Dict[str, Any]] = (), k: int = SIMILAR_CONCEPTS,
+                     exclude: Iterable[str] = ()) -> List[Dict[str, Any]]:
+    """
+    Retrieve the prior ideas most relevant to a concept, from the session history and saved collections.
+
+    Falls back to the session history alone if the saved concepts can't be read
+    or haven't been indexed yet.
+
+    Args:
+        text: Current concept
+        history: Art history items of the current session
+        k: Number of ideas to return
+        exclude: Concepts never to return besides `text`
+
+    Returns:
+        Up to k art history items (saved ones carry only "concept" and "modification_type"), most relevant first
+    """
+    try:
+        index = get_concept_index()
+    except Exception as e:
+        print(f"Error loading saved concepts: {e}")
+        index = ConceptIndex()
+    return index.similar(text, k, extra=history, exclude=exclude)
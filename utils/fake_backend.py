@@ -0,0 +1,125 @@
+"""
+Offline stand-ins for the Replicate language models and image backends.
+
+Select them with ARTISELF_LLM_BACKEND=fake and ARTISELF_IMAGE_BACKEND=fake to
+run the full graphs without network access or API tokens. Text is derived
+deterministically from the prompt; latency and failures are injected at the
+configured rates so queueing, retries and fallbacks can be exercised locally.
+"""
+import os
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, List
+
+# Mean injected latency per call in seconds; individual calls vary log-normally around it.
+FAKE_LLM_LATENCY = float(os.environ.get("ARTISELF_FAKE_LLM_LATENCY", 0))
+FAKE_IMAGE_LATENCY = float(os.environ.get("ARTISELF_FAKE_IMAGE_LATENCY", 0))
+FAKE_LATENCY_JITTER = float(os.environ.get("ARTISELF_FAKE_LATENCY_JITTER", 0.5))
+# Fraction of calls that fail.
+FAKE_FAILURE_RATE = float(os.environ.get("ARTISELF_FAKE_FAILURE_RATE", 0))
+FAKE_SEED = int(os.environ.get("ARTISELF_FAKE_SEED", 0))
+
+_VOCABULARY = (
+    "luminous", "layered", "misty", "geometric", "organic", "vivid", "muted", "textured", "flowing",
+    "fractured", "serene", "turbulent", "golden", "cobalt", "crimson", "verdant", "twilight", "dawn",
+    "shadows", "reflections", "horizon", "spirals", "brushstrokes", "silhouettes", "gradients",
+    "architecture", "forest", "ocean", "city", "figures", "composition", "foreground", "background",
+    "palette", "contrast", "atmosphere", "light", "depth", "rhythm", "balance", "movement", "mood",
+)
+
+_random = random.Random(FAKE_SEED)
+_random_lock = threading.Lock()
+
+
+class FakeBackendError(RuntimeError):
+    """Raised for failures injected by FAKE_FAILURE_RATE."""
+
+
+def _draw_delay(mean: float) -> float:
+    if mean <= 0:
+        return 0.0
+    with _random_lock:
+        return mean * _random.lognormvariate(0, FAKE_LATENCY_JITTER)
+
+
+def _draw_failure() -> bool:
+    if FAKE_FAILURE_RATE <= 0:
+        return False
+    with _random_lock:
+        return _random.random() < FAKE_FAILURE_RATE
+
+
+def simulate_call(mean_latency: float):
+    """Sleep for an injected latency, then raise FakeBackendError at the configured failure rate."""
+    delay = _draw_delay(mean_latency)
+    if delay:
+        time.sleep(delay)
+    if _draw_failure():
+        raise FakeBackendError("injected fake backend failure")
+
+
+async def asimulate_call(mean_latency: float):
+    """Async counterpart of simulate_call."""
+    delay = _draw_delay(mean_latency)
+    if delay:
+        await asyncio.sleep(delay)
+    if _draw_failure():
+        raise FakeBackendError("injected fake backend failure")
+
+
+def prompt_seed(*parts: Any) -> int:
+    """Stable 64-bit seed derived from a prompt and any other render parameters."""
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def fake_text(model: str, model_input: Dict[str, Any]) -> List[str]:
+    """
+    Deterministic model output for a given model and input.
+
+    Returns:
+        list: The tokens of the output, each a word followed by a space.
+    """
+    prompt = model_input.get("prompt", "")
+    rng = random.Random(prompt_seed(model, prompt))
+    if "Return only the number" in prompt:
+        # Strategy selection expects one of its numbered options
+        return [str(rng.randint(1, 8))]
+    max_tokens = model_input.get("max_new_tokens") or model_input.get("max_tokens") or 250
+    length = max(8, min(int(max_tokens) // 2, 150))
+    return [f"{rng.choice(_VOCABULARY)} " for _ in range(length)]
+
+
+class FakeLLMClient:
+    """Drop-in replacement for the parts of replicate.Client the LLM nodes and image analysis use."""
+
+    def run(self, model: str, input: Dict[str, Any]) -> List[str]:
+        simulate_call(FAKE_LLM_LATENCY)
+        return fake_text(model, input)
+
+    def stream(self, model: str, input: Dict[str, Any]) -> Iterator[str]:
+        simulate_call(FAKE_LLM_LATENCY)
+        yield from fake_text(model, input)
+
+    async def async_run(self, model: str, input: Dict[str, Any]) -> List[str]:
+        await asimulate_call(FAKE_LLM_LATENCY)
+        return fake_text(model, input)
+
+    async def async_stream(self, model: str, input: Dict[str, Any]) -> AsyncIterator[str]:
+        await asimulate_call(FAKE_LLM_LATENCY)
+
+        async def tokens():
+            for token in fake_text(model, input):
+                yield token
+        return tokens()
+
+
+_llm_client = FakeLLMClient()
+
+
+def get_fake_llm_client() -> FakeLLMClient:
+    """Return the shared fake LLM client."""
+    return _llm_client
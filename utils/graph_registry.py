@@ -0,0 +1,41 @@
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# Compiled LangGraph workflows, keyed by name. Compiled graphs hold no per-run
+# state, so one instance can serve every request in the process.
+_graphs: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def get_compiled_graph(name: str, builder: Callable[[], Any]):
+    """
+    Return the compiled graph registered under `name`, building it on first use.
+
+    Args:
+        name: Registry key for the graph
+        builder: Zero-argument function that builds and compiles the graph
+
+    Returns:
+        The compiled graph
+    """
+    graph = _graphs.get(name)
+    if graph is not None:
+        return graph
+    with _lock:
+        if name not in _graphs:
+            _graphs[name] = builder()
+        return _graphs[name]
+
+
+def invalidate_graphs(name: Optional[str] = None):
+    """
+    Drop compiled graphs so the next request rebuilds them.
+
+    Args:
+        name: Graph to drop, or None to drop every registered graph
+    """
+    with _lock:
+        if name is None:
+            _graphs.clear()
+        else:
+            _graphs.pop(name, None)
@@ -0,0 +1,154 @@
+import os
+import asyncio
+import threading
+import weakref
+from typing import Optional, Dict, Any
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+REPLICATE_API_TOKEN = os.environ.get("REPLICATE_API_TOKEN")
+
+# Pool and timeout settings shared by every outbound call the app makes.
+HTTP_POOL_SIZE = int(os.environ.get("ARTISELF_HTTP_POOL_SIZE", 16))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("ARTISELF_HTTP_CONNECT_TIMEOUT", 10))
+HTTP_READ_TIMEOUT = float(os.environ.get("ARTISELF_HTTP_READ_TIMEOUT", 120))
+HTTP_MAX_RETRIES = int(os.environ.get("ARTISELF_HTTP_MAX_RETRIES", 2))
+# "replicate", or "fake" for the offline stand-in in utils.fake_backend.
+LLM_BACKEND = os.environ.get("ARTISELF_LLM_BACKEND", "replicate")
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_replicate_client = None
+# Async clients are bound to the event loop that created them, so keep one set per loop.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+
+class _TimeoutSession(requests.Session):
+    """A requests.Session that applies the default timeouts unless a call overrides them."""
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        return super().request(method, url, **kwargs)
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide pooled HTTP session.
+
+    Connections are kept alive and reused across image downloads and uploads,
+    so each request after the first skips the TCP and TLS handshakes.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            session = _TimeoutSession()
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+                max_retries=HTTP_MAX_RETRIES,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def get_replicate_client():
+    """
+    Return the process-wide Replicate client.
+
+    The client owns a keep-alive httpx connection pool, so the LLM nodes, image
+    analysis and the Replicate image generator all share one set of connections.
+    """
+    global _replicate_client
+    if not REPLICATE_API_TOKEN:
+        raise ValueError("REPLICATE_API_TOKEN environment variable is not set")
+    with _lock:
+        if _replicate_client is None:
+            import httpx
+            import replicate
+            _replicate_client = replicate.Client(
+                api_token=REPLICATE_API_TOKEN,
+                timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+                transport=httpx.HTTPTransport(
+                    limits=httpx.Limits(
+                        max_connections=HTTP_POOL_SIZE,
+                        max_keepalive_connections=HTTP_POOL_SIZE,
+                    ),
+                    retries=HTTP_MAX_RETRIES,
+                ),
+            )
+        return _replicate_client
+
+
+def _async_limits():
+    import httpx
+    return httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE)
+
+
+def _loop_clients() -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    with _lock:
+        return _async_clients.setdefault(loop, {})
+
+
+def get_async_http_client():
+    """Return the pooled httpx.AsyncClient for the running event loop."""
+    import httpx
+    clients = _loop_clients()
+    if "http" not in clients:
+        clients["http"] = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=_async_limits(),
+            follow_redirects=True,
+        )
+    return clients["http"]
+
+
+def get_async_replicate_client():
+    """Return a Replicate client whose async methods reuse a pooled transport on the running loop."""
+    if not REPLICATE_API_TOKEN:
+        raise ValueError("REPLICATE_API_TOKEN environment variable is not set")
+    clients = _loop_clients()
+    if "replicate" not in clients:
+        import httpx
+        import replicate
+        clients["replicate"] = replicate.Client(
+            api_token=REPLICATE_API_TOKEN,
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            transport=httpx.AsyncHTTPTransport(limits=_async_limits(), retries=HTTP_MAX_RETRIES),
+        )
+    return clients["replicate"]
+
+
+def get_llm_client():
+    """Return the client the LLM nodes and image analysis call: Replicate, or the fake one offline."""
+    if LLM_BACKEND == "fake":
+        from utils.fake_backend import get_fake_llm_client
+        return get_fake_llm_client()
+    return get_replicate_client()
+
+
+def get_async_llm_client():
+    """Async counterpart of get_llm_client."""
+    if LLM_BACKEND == "fake":
+        from utils.fake_backend import get_fake_llm_client
+        return get_fake_llm_client()
+    return get_async_replicate_client()
+
+
+def collect_output(output) -> str:
+    """Join the (possibly streamed) text output of a Replicate language model into one string."""
+    if isinstance(output, str):
+        return output
+    if hasattr(output, "__iter__"):
+        return "".join(str(chunk) for chunk in output)
+    return str(output)
+
+
+async def acollect_output(output) -> str:
+    """Async counterpart of collect_output that also accepts async iterators."""
+    if hasattr(output, "__aiter__"):
+        return "".join([str(chunk) async for chunk in output])
+    return collect_output(output)
@@ -1,83 +1,141 @@
 import os
 import base64
+import asyncio
 from dotenv import load_dotenv
-import replicate
-import requests
+from utils import http_transport
+from utils.http_transport import get_llm_client, get_async_llm_client, collect_output, acollect_output
+from utils.analysis_cache import analysis_cache_key, get_cached_analysis, put_cached_analysis
 from PIL import Image
 import io
+from typing import Tuple
 
 load_dotenv()
 REPLICATE_API_TOKEN = os.environ.get("REPLICATE_API_TOKEN")
 
+ANALYSIS_MODEL = "yorickvp/llava-13b:80537f9eead1a5bfa72d5ac6ea6414379be41d4d4f6679fd776e9535d1eb58bb"
+ANALYSIS_PROMPT = (
+    "Analyze this image as a work of art. Describe:\n"
+    "1. The main visual elements and subjects\n"
+    "2. The composition and structure\n"
+    "3. The color palette and lighting\n"
+    "4. The style and technique\n"
+    "5. The mood and emotional impact\n"
+    "6. Areas with potential for artistic development or refinement\n\n"
+    "Provide specific details that would be useful for guiding further artistic iterations."
+)
+# Everything sent to the model besides the image; part of the analysis cache key.
+ANALYSIS_PARAMS = {
+    "prompt": ANALYSIS_PROMPT,
+    "temperature": 0.5,
+    "max_tokens": 500
+}
+# LLaVA-1.5 sees images through a 336px CLIP encoder, so larger uploads add bytes but no detail.
+ANALYSIS_MAX_SIDE = int(os.environ.get("ARTISELF_ANALYSIS_MAX_SIDE", 336))
+ANALYSIS_JPEG_QUALITY = 90
+
+
+def _encode_for_analysis(image_path: str) -> Tuple[bytes, str]:
+    """
+    Downscale an image to the model's input resolution and re-encode it as JPEG.
+
+    Returns:
+        (encoded bytes, MIME type)
+    """
+    with Image.open(image_path) as img:
+        img.thumbnail((ANALYSIS_MAX_SIDE, ANALYSIS_MAX_SIDE), Image.Resampling.LANCZOS)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=ANALYSIS_JPEG_QUALITY)
+    return buffer.getvalue(), "image/jpeg"
+
+
+def _raw_image(image_path: str) -> Tuple[bytes, str]:
+    """Read an image file as-is, for files PIL cannot decode."""
+    with open(image_path, "rb") as f:
+        image_data = f.read()
+    ext = os.path.splitext(image_path)[1].lower().lstrip(".")
+    return image_data, f"image/{'jpeg' if ext == 'jpg' else ext or 'png'}"
+
+
+def _cache_params() -> dict:
+    # The preprocessing changes what the model sees, so it is part of the cache key.
+    return {**ANALYSIS_PARAMS, "max_side": ANALYSIS_MAX_SIDE, "jpeg_quality": ANALYSIS_JPEG_QUALITY}
+
+
+def _cache_key(image_path: str):
+    return analysis_cache_key(image_path, http_transport.LLM_BACKEND, ANALYSIS_MODEL, _cache_params())
+
+
+def _analysis_input(image_path: str) -> dict:
+    """Build the LLaVA input for a local file (as a data URI) or a remote URL."""
+    # Check if image_path is a local file
+    if os.path.isfile(image_path):
+        try:
+            image_data, mime_type = _encode_for_analysis(image_path)
+        except Exception as e:
+            print(f"Could not downscale {image_path} for analysis, sending it unchanged: {e}")
+            image_data, mime_type = _raw_image(image_path)
+
+        # Convert to base64 for upload
+        image_b64 = base64.b64encode(image_data).decode("utf-8")
+
+        # Use the data URI scheme which is supported by the API
+        image = f"data:{mime_type};base64,{image_b64}"
+    else:
+        # If it's not a local file, assume it's a URL
+        if not image_path.startswith(("http://", "https://")):
+            image_path = f"https://{image_path}" if not image_path.startswith("//") else f"https:{image_path}"
+        image = image_path
+
+    return {"image": image, **ANALYSIS_PARAMS}
+
+
 def analyze_image(image_path: str) -> str:
     """
     Analyze an image to extract artistic elements useful for further modifications.
-    
+
+    Analyses of local files are cached by image content, so an image that was
+    analyzed before (e.g. in a reloaded collection) is not sent again.
+
     Args:
         image_path (str): The local file path to the image.
-    
+
     Returns:
         str: A detailed analysis of the image.
     """
-    if not REPLICATE_API_TOKEN:
-        raise ValueError("REPLICATE_API_TOKEN environment variable is not set")
-    
-    client = replicate.Client(api_token=REPLICATE_API_TOKEN)
-    
-    analysis_prompt = (
-        "Analyze this image as a work of art. Describe:\n"
-        "1. The main visual elements and subjects\n"
-        "2. The composition and structure\n"
-        "3. The color palette and lighting\n"
-        "4. The style and technique\n"
-        "5. The mood and emotional impact\n"
-        "6. Areas with potential for artistic development or refinement\n\n"
-        "Provide specific details that would be useful for guiding further artistic iterations."
-    )
-    
+    # Look up the cache first, so a hit needs no API client (or token)
+    cache_key = _cache_key(image_path)
+    cached = get_cached_analysis(cache_key)
+    if cached:
+        return cached
+
+    client = get_llm_client()
+
+    try:
+        output = client.run(ANALYSIS_MODEL, input=_analysis_input(image_path))
+        analysis = collect_output(output)
+        put_cached_analysis(cache_key, ANALYSIS_MODEL, analysis)
+        return analysis
+    except Exception as e:
+        return f"Error analyzing image: {str(e)}. Proceeding with modification based on textual concept only."
+
+
+async def aanalyze_image(image_path: str) -> str:
+    """Async counterpart of analyze_image; hashing, encoding and cache I/O run on worker threads."""
+    # Look up the cache first, so a hit needs no API client (or token)
+    cache_key = await asyncio.to_thread(_cache_key, image_path)
+    cached = await asyncio.to_thread(get_cached_analysis, cache_key)
+    if cached:
+        return cached
+
+    client = get_async_llm_client()
+
     try:
-        # Check if image_path is a local file
-        if os.path.isfile(image_path):
-            # Create a temporary upload to get a valid URL
-            with open(image_path, "rb") as f:
-                image_data = f.read()
-            
-            # Convert to base64 for upload
-            image_b64 = base64.b64encode(image_data).decode("utf-8")
-            
-            # Use the data URI scheme which is supported by the API
-            image_uri = f"data:image/png;base64,{image_b64}"
-            
-            output = client.run(
-                "yorickvp/llava-13b:80537f9eead1a5bfa72d5ac6ea6414379be41d4d4f6679fd776e9535d1eb58bb",
-                input={
-                    "image": image_uri,
-                    "prompt": analysis_prompt,
-                    "temperature": 0.5,
-                    "max_tokens": 500
-                }
-            )
-        else:
-            # If it's not a local file, assume it's a URL
-            if not image_path.startswith(("http://", "https://")):
-                image_path = f"https://{image_path}" if not image_path.startswith("//") else f"https:{image_path}"
-            
-            output = client.run(
-                "yorickvp/llava-13b:80537f9eead1a5bfa72d5ac6ea6414379be41d4d4f6679fd776e9535d1eb58bb",
-                input={
-                    "image": image_path,
-                    "prompt": analysis_prompt,
-                    "temperature": 0.5,
-                    "max_tokens": 500
-                }
-            )
-        
-        if hasattr(output, '__iter__') and not isinstance(output, (str, list)):
-            analysis = "".join([chunk for chunk in output])
-        elif isinstance(output, list):
-            analysis = "".join(output)
-        else:
-            analysis = str(output)
+        model_input = await asyncio.to_thread(_analysis_input, image_path)
+        output = await client.async_run(ANALYSIS_MODEL, input=model_input)
+        analysis = await acollect_output(output)
+        await asyncio.to_thread(put_cached_analysis, cache_key, ANALYSIS_MODEL, analysis)
         return analysis
     except Exception as e:
-        return f"Error analyzing image: {str(e)}. Proceeding with modification based on textual concept only."
\ No newline at end of file
+        return f"Error analyzing image: {str(e)}. Proceeding with modification based on textual concept only."
@@ -0,0 +1,166 @@
+import os
+from typing import Any, Dict, List, Optional
+import numpy as np
+from PIL import Image
+
+# Images are downsampled before measuring; composition and palette survive, fine texture is irrelevant.
+FEATURE_SIZE = 128
+NUM_COLORS = 5
+KMEANS_ITERATIONS = 12
+# Gradient magnitude (on a 0-1 luminance scale) above which a pixel counts as an edge
+EDGE_THRESHOLD = 0.05
+
+# Rec. 709 luma weights
+_LUMA = np.array([0.2126, 0.7152, 0.0722])
+
+
+def _load_pixels(image_path: str) -> np.ndarray:
+    """Return the downsampled image as a float array in [0, 1] of shape (h, w, 3)."""
+    with Image.open(image_path) as img:
+        img.draft("RGB", (FEATURE_SIZE * 2, FEATURE_SIZE * 2))
+        img = img.convert("RGB")
+        img.thumbnail((FEATURE_SIZE, FEATURE_SIZE), Image.Resampling.BILINEAR)
+        return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def _dominant_colors(pixels: np.ndarray, k: int = NUM_COLORS) -> List[Dict[str, Any]]:
+    """K-means over the pixel colors, returning the cluster centers by share of the image."""
+    samples = pixels.reshape(-1, 3)
+    k = min(k, len(samples))
+    # Seed with evenly spaced pixels in luminance order so results are deterministic.
+    order = np.argsort(samples @ _LUMA)
+    centers = samples[order[np.linspace(0, len(samples) - 1, k).astype(int)]].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        distances = ((samples[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, samples)
+        occupied = counts > 0
+        new_centers = centers.copy()
+        new_centers[occupied] = sums[occupied] / counts[occupied, None]
+        if np.allclose(new_centers, centers, atol=1e-4):
+            break
+        centers = new_centers
+    shares = counts / counts.sum()
+    colors = []
+    for index in np.argsort(-shares):
+        if shares[index] == 0:
+            continue
+        r, g, b = (centers[index] * 255).round().astype(int)
+        colors.append({"hex": f"#{r:02x}{g:02x}{b:02x}", "share": round(float(shares[index]), 3)})
+    return colors
+
+
+def _luminance_features(luminance: np.ndarray) -> Dict[str, Any]:
+    histogram, _ = np.histogram(luminance, bins=8, range=(0.0, 1.0))
+    return {
+        "brightness": round(float(luminance.mean()), 3),
+        "contrast": round(float(luminance.std()), 3),
+        "shadows": round(float((luminance < 0.2).mean()), 3),
+        "highlights": round(float((luminance > 0.8).mean()), 3),
+        "luminance_histogram": [round(float(v), 3) for v in histogram / histogram.sum()],
+    }
+
+
+def _color_features(pixels: np.ndarray) -> Dict[str, Any]:
+    high = pixels.max(axis=2)
+    low = pixels.min(axis=2)
+    saturation = np.where(high > 0, (high - low) / np.maximum(high, 1e-6), 0.0)
+    return {
+        "saturation": round(float(saturation.mean()), 3),
+        # Positive values lean red/orange, negative values lean blue.
+        "warmth": round(float((pixels[..., 0] - pixels[..., 2]).mean()), 3),
+    }
+
+
+def _edge_density(luminance: np.ndarray) -> float:
+    grad_y, grad_x = np.gradient(luminance)
+    magnitude = np.hypot(grad_x, grad_y)
+    return round(float((magnitude > EDGE_THRESHOLD).mean()), 3)
+
+
+def _symmetry(luminance: np.ndarray) -> Dict[str, float]:
+    """1.0 means the image is a perfect mirror of itself along that axis."""
+    return {
+        "horizontal_symmetry": round(1.0 - float(np.abs(luminance - luminance[:, ::-1]).mean()), 3),
+        "vertical_symmetry": round(1.0 - float(np.abs(luminance - luminance[::-1, :]).mean()), 3),
+    }
+
+
+def _saliency_centroid(pixels: np.ndarray) -> Dict[str, float]:
+    """
+    Weighted center of the visually distinctive regions.
+
+    Uses frequency-tuned saliency: each pixel's distance from the image's mean
+    color, after a light blur to suppress noise.
+    """
+    blurred = pixels.copy()
+    for axis in (0, 1):
+        blurred = (np.roll(blurred, 1, axis=axis) + blurred * 2 + np.roll(blurred, -1, axis=axis)) / 4
+    saliency = np.sqrt(((blurred - pixels.reshape(-1, 3).mean(axis=0)) ** 2).sum(axis=2))
+    total = saliency.sum()
+    height, width = saliency.shape
+    if total <= 0:
+        return {"saliency_x": 0.5, "saliency_y": 0.5}
+    ys, xs = np.mgrid[0:height, 0:width]
+    return {
+        "saliency_x": round(float((saliency * xs).sum() / total / max(width - 1, 1)), 3),
+        "saliency_y": round(float((saliency * ys).sum() / total / max(height - 1, 1)), 3),
+    }
+
+
+def extract_image_features(image_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Measure palette, lighting and composition features of an image locally.
+
+    Args:
+        image_path: Local path to the image
+
+    Returns:
+        dict: Dominant colors, luminance statistics, saturation and warmth,
+        edge density, symmetry and the saliency centroid (as fractions of the
+        width/height), or None if the image cannot be read.
+    """
+    if not os.path.isfile(image_path):
+        return None
+    try:
+        pixels = _load_pixels(image_path)
+    except Exception as e:
+        print(f"Error reading {image_path} for feature extraction: {e}")
+        return None
+    luminance = pixels @ _LUMA
+    features = {"dominant_colors": _dominant_colors(pixels)}
+    features.update(_luminance_features(luminance))
+    features.update(_color_features(pixels))
+    features["edge_density"] = _edge_density(luminance)
+    features.update(_symmetry(luminance))
+    features.update(_saliency_centroid(pixels))
+    return features
+
+
+def _position_label(x: float, y: float) -> str:
+    vertical = "upper" if y < 0.4 else "lower" if y > 0.6 else "middle"
+    horizontal = "left" if x < 0.4 else "right" if x > 0.6 else "center"
+    return "center" if (vertical, horizontal) == ("middle", "center") else f"{vertical} {horizontal}"
+
+
+def describe_image_features(features: Dict[str, Any]) -> str:
+    """Render extracted features as plain text for an LLM prompt or the UI."""
+    colors = ", ".join(f"{c['hex']} ({c['share']:.0%})" for c in features["dominant_colors"])
+    brightness = features["brightness"]
+    key = "low-key (dark)" if brightness < 0.35 else "high-key (bright)" if brightness > 0.65 else "mid-key"
+    temperature = "warm" if features["warmth"] > 0.05 else "cool" if features["warmth"] < -0.05 else "neutral"
+    detail = "busy, highly detailed" if features["edge_density"] > 0.25 else \
+        "sparse, minimal" if features["edge_density"] < 0.05 else "moderately detailed"
+    return (
+        f"Dominant colors: {colors}\n"
+        f"Lighting: {key}, brightness {brightness:.2f}, contrast {features['contrast']:.2f}, "
+        f"{features['shadows']:.0%} deep shadows, {features['highlights']:.0%} highlights\n"
+        f"Color: saturation {features['saturation']:.2f}, {temperature} palette\n"
+        f"Texture: edge density {features['edge_density']:.2f} ({detail})\n"
+        f"Balance: left-right symmetry {features['horizontal_symmetry']:.2f}, "
+        f"top-bottom symmetry {features['vertical_symmetry']:.2f}\n"
+        f"Focal point: {_position_label(features['saliency_x'], features['saliency_y'])} "
+        f"(x={features['saliency_x']:.2f}, y={features['saliency_y']:.2f})"
+    )
@@ -0,0 +1,67 @@
+import abc
+import asyncio
+from typing import Any, Dict, List, Optional
+
+FALLBACK_IMAGE = "images/example_image.png"
+
+
+class BaseImageGenerator(abc.ABC):
+    """
+    Common interface of all image generator backends.
+
+    Backends implement `generate_image`; the batch and async methods have
+    defaults built on it, which backends with native batch or async APIs
+    override. Every method accepts the same optional size and seed arguments;
+    backends whose capability flags say they don't support them ignore them.
+    """
+    name = "base"
+    # Capability flags, read by callers (and the hedged generator) without instantiating the backend
+    max_width = 1024
+    max_height = 1024
+    max_outputs = 1
+    supports_seed = False
+    supports_size = False
+    native_async = False
+
+    @classmethod
+    def capabilities(cls) -> Dict[str, Any]:
+        """Return the backend's capability flags."""
+        return {
+            "max_width": cls.max_width,
+            "max_height": cls.max_height,
+            "max_outputs": cls.max_outputs,
+            "supports_seed": cls.supports_seed,
+            "supports_size": cls.supports_size,
+            "native_async": cls.native_async,
+        }
+
+    @abc.abstractmethod
+    def generate_image(self, prompt: str, width: Optional[int] = None, height: Optional[int] = None,
+                       seed: Optional[int] = None) -> str:
+        """
+        Generate one image.
+
+        Returns:
+            str: Local path of the saved image, or FALLBACK_IMAGE on failure.
+        """
+
+    def generate_images(self, prompt: str, num_outputs: int = 1, width: Optional[int] = None,
+                        height: Optional[int] = None, seed: Optional[int] = None) -> List[str]:
+        """
+        Generate up to `num_outputs` variants (at most `max_outputs`).
+
+        The default returns a single image: repeating the same prompt would
+        only hit the generation cache and return duplicates.
+        """
+        return [self.generate_image(prompt, width=width, height=height, seed=seed)]
+
+    async def agenerate_image(self, prompt: str, width: Optional[int] = None, height: Optional[int] = None,
+                              seed: Optional[int] = None) -> str:
+        """Async counterpart of generate_image; runs the sync call in a worker thread by default."""
+        return await asyncio.to_thread(self.generate_image, prompt, width=width, height=height, seed=seed)
+
+    async def agenerate_images(self, prompt: str, num_outputs: int = 1, width: Optional[int] = None,
+                               height: Optional[int] = None, seed: Optional[int] = None) -> List[str]:
+        """Async counterpart of generate_images."""
+        return await asyncio.to_thread(self.generate_images, prompt, num_outputs=num_outputs,
+                                       width=width, height=height, seed=seed)
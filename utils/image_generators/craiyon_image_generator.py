@@ -1,18 +1,30 @@
-import os
-import time
-import requests
-from PIL import Image
+from typing import Optional
 from craiyon import Craiyon
+from utils.image_generators.base import BaseImageGenerator, FALLBACK_IMAGE
+from utils.image_generators.generation_cache import GenerationCache, get_generation_cache
+from utils.image_generators.downloader import download_image
+
+class ImageGenerator(BaseImageGenerator):
+    name = "craiyon"
 
-class ImageGenerator:
     def __init__(self):
         # Initialize the Craiyon API client.
         self.generator = Craiyon()
 
-    def generate_image(self, prompt: str) -> str:
+    def generate_image(self, prompt: str, width: Optional[int] = None, height: Optional[int] = None,
+                       seed: Optional[int] = None) -> str:
         """
         Generate an image using the Craiyon API and return the local path to the saved image.
+        Size and seed are not supported and ignored.
         """
+        cache = get_generation_cache()
+        cache_key = GenerationCache.make_key("craiyon", "craiyon", prompt)
+        if cache:
+            cached_path = cache.get(cache_key)
+            if cached_path:
+                print(f"Generation cache hit: {cached_path}")
+                return cached_path
+
         try:
             # Generate images from the prompt
             result = self.generator.generate(prompt)
@@ -20,36 +32,24 @@ class ImageGenerator:
             # Check if we have images in the result
             if not hasattr(result, 'images') or not result.images:
                 print("No images returned from Craiyon API")
-                return "images/example_image.png"
+                return FALLBACK_IMAGE
             
             # Use the first generated image URL
             image_url = result.images[0]
             print(f"Image URL: {image_url}")
-            image_path = f"images/generated_images/generated_{int(time.time())}.png"
             
-            # Download the image from the URL
-            response = requests.get(image_url, stream=True)
-            if response.status_code == 200:
-                with open(image_path, 'wb') as f:
-                    for chunk in response.iter_content(1024):
-                        f.write(chunk)
-                
-                # Verify the image was saved correctly
-                try:
-                    Image.open(image_path).verify()  # Verify it's a valid image
-                    print(f"Image successfully downloaded and saved to {image_path}")
-                    return image_path
-                except Exception as e:
-                    print(f"Downloaded file is not a valid image: {e}")
-                    if os.path.exists(image_path):
-                        os.remove(image_path)  # Remove invalid file
-            else:
-                print(f"Failed to download image: HTTP {response.status_code}")
+            # Download the image from the URL; failed or invalid downloads return None
+            image_path = download_image(image_url)
+            if image_path:
+                print(f"Image successfully downloaded and saved to {image_path}")
+                if cache:
+                    cache.put(cache_key, image_path)
+                return image_path
             
             # If we get here, something went wrong
             print("Falling back to example image")
-            return "images/example_image.png"
+            return FALLBACK_IMAGE
 
         except Exception as e:
             print(f"Error generating image with Craiyon API: {e}")
-            return "images/example_image.png"
\ No newline at end of file
+            return FALLBACK_IMAGE
\ No newline at end of file
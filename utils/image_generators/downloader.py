@@ -0,0 +1,94 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from utils.http_transport import get_session, get_async_http_client
+from utils.image_generators.image_store import IMAGE_DIR, save_image_chunks, asave_image_chunks
+
+# Large reads keep per-chunk overhead (syscalls, hashing calls) negligible for multi-megabyte renders.
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+DOWNLOAD_WORKERS = int(os.environ.get("ARTISELF_DOWNLOAD_WORKERS", 8))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix="download")
+        return _executor
+
+
+def _expected_size(headers) -> Optional[int]:
+    # With a content encoding the body is decoded on the fly, so its length won't match the header.
+    if headers.get("Content-Encoding"):
+        return None
+    try:
+        return int(headers["Content-Length"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def save_response(response, directory: str = IMAGE_DIR) -> Optional[str]:
+    """
+    Stream an HTTP response body (requests) into the image store.
+
+    Returns:
+        str: Path of the saved image, or None if the request failed or the body is not a valid image.
+    """
+    try:
+        if response.status_code != 200:
+            print("Failed to download image, HTTP status code:", response.status_code)
+            return None
+        return save_image_chunks(response.iter_content(DOWNLOAD_CHUNK_SIZE), directory,
+                                 expected_size=_expected_size(response.headers))
+    finally:
+        response.close()
+
+
+def download_image(image_url: str, directory: str = IMAGE_DIR) -> Optional[str]:
+    """
+    Download one image into the image store.
+
+    Returns:
+        str: Path of the saved image, or None if the download failed.
+    """
+    try:
+        return save_response(get_session().get(image_url, stream=True), directory)
+    except Exception as e:
+        print(f"Error downloading image {image_url}: {e}")
+        return None
+
+
+def download_images(image_urls: List[str], directory: str = IMAGE_DIR) -> List[Optional[str]]:
+    """
+    Download several images concurrently over the shared connection pool.
+
+    Returns:
+        list: One path (or None for a failed download) per URL, in input order.
+    """
+    if len(image_urls) == 1:
+        return [download_image(image_urls[0], directory)]
+    return list(_get_executor().map(lambda url: download_image(url, directory), image_urls))
+
+
+async def adownload_image(image_url: str, directory: str = IMAGE_DIR) -> Optional[str]:
+    """Async counterpart of download_image."""
+    try:
+        async with get_async_http_client().stream("GET", image_url) as response:
+            if response.status_code != 200:
+                print("Failed to download image, HTTP status code:", response.status_code)
+                return None
+            return await asave_image_chunks(response.aiter_bytes(DOWNLOAD_CHUNK_SIZE), directory,
+                                            expected_size=_expected_size(response.headers))
+    except Exception as e:
+        print(f"Error downloading image {image_url}: {e}")
+        return None
+
+
+async def adownload_images(image_urls: List[str], directory: str = IMAGE_DIR) -> List[Optional[str]]:
+    """Async counterpart of download_images; all downloads share the event loop."""
+    return list(await asyncio.gather(*(adownload_image(url, directory) for url in image_urls)))
@@ -0,0 +1,84 @@
+import io
+import asyncio
+from typing import List, Optional
+import numpy as np
+from PIL import Image
+from utils.fake_backend import FAKE_IMAGE_LATENCY, simulate_call, asimulate_call, prompt_seed
+from utils.image_generators.base import BaseImageGenerator, FALLBACK_IMAGE
+from utils.image_generators.image_store import IMAGE_DIR, save_image_bytes
+
+OUTPUT_DIR = IMAGE_DIR
+DEFAULT_SIZE = 512
+MAX_OUTPUTS = 4
+
+
+def render_image(prompt: str, width: int = DEFAULT_SIZE, height: int = DEFAULT_SIZE,
+                 seed: Optional[int] = None, index: int = 0) -> bytes:
+    """
+    Procedurally render a PNG that is fully determined by its arguments.
+
+    A two-color gradient with a few soft discs and some grain, so the image
+    features and thumbnails have something realistic to work on.
+    """
+    rng = np.random.default_rng(prompt_seed(prompt, width, height, seed, index))
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    angle = rng.uniform(0, 2 * np.pi)
+    t = (x * np.cos(angle) + y * np.sin(angle)) / max(width, height)
+    t = (t - t.min()) / max(float(t.max() - t.min()), 1e-6)
+    start, end = rng.uniform(0, 255, size=(2, 3)).astype(np.float32)
+    pixels = start + t[..., None] * (end - start)
+    for _ in range(rng.integers(3, 7)):
+        cx, cy = rng.uniform(0, width), rng.uniform(0, height)
+        radius = rng.uniform(0.05, 0.25) * min(width, height)
+        mask = np.clip(1 - np.hypot(x - cx, y - cy) / radius, 0, 1)[..., None]
+        pixels = pixels * (1 - mask) + rng.uniform(0, 255, size=3).astype(np.float32) * mask
+    pixels += rng.normal(0, 6, size=pixels.shape).astype(np.float32)
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, format="PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+class ImageGenerator(BaseImageGenerator):
+    """Offline image backend for local runs and benchmarks; see utils.fake_backend."""
+    name = "fake"
+    max_outputs = MAX_OUTPUTS
+    supports_seed = True
+    supports_size = True
+    native_async = True
+
+    def _render(self, prompt: str, width: Optional[int], height: Optional[int], seed: Optional[int],
+                index: int) -> str:
+        width = min(width or DEFAULT_SIZE, self.max_width)
+        height = min(height or DEFAULT_SIZE, self.max_height)
+        image_path = save_image_bytes(render_image(prompt, width, height, seed, index), OUTPUT_DIR)
+        return image_path or FALLBACK_IMAGE
+
+    def generate_images(self, prompt: str, num_outputs: int = 1, width: Optional[int] = None,
+                        height: Optional[int] = None, seed: Optional[int] = None) -> List[str]:
+        num_outputs = max(1, min(num_outputs, MAX_OUTPUTS))
+        try:
+            simulate_call(FAKE_IMAGE_LATENCY)
+            return [self._render(prompt, width, height, seed, i) for i in range(num_outputs)]
+        except Exception as e:
+            print(f"Error generating image with the fake backend: {e}")
+            return [FALLBACK_IMAGE]
+
+    async def agenerate_images(self, prompt: str, num_outputs: int = 1, width: Optional[int] = None,
+                               height: Optional[int] = None, seed: Optional[int] = None) -> List[str]:
+        num_outputs = max(1, min(num_outputs, MAX_OUTPUTS))
+        try:
+            await asimulate_call(FAKE_IMAGE_LATENCY)
+            # Rendering and encoding are CPU-bound; keep them off the event loop like a real download
+            return await asyncio.gather(*(asyncio.to_thread(self._render, prompt, width, height, seed, i)
+                                          for i in range(num_outputs)))
+        except Exception as e:
+            print(f"Error generating image with the fake backend: {e}")
+            return [FALLBACK_IMAGE]
+
+    def generate_image(self, prompt: str, width: Optional[int] = None, height: Optional[int] = None,
+                       seed: Optional[int] = None) -> str:
+        return self.generate_images(prompt, 1, width, height, seed)[0]
+
+    async def agenerate_image(self, prompt: str, width: Optional[int] = None, height: Optional[int] = None,
+                              seed: Optional[int] = None) -> str:
+        return (await self.agenerate_images(prompt, 1, width, height, seed))[0]
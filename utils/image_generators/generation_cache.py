@@ -0,0 +1,157 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+from utils.image_generators.image_store import IMAGE_DIR, store_image_file
+
+CACHE_DIR = os.environ.get("ARTISELF_GENERATION_CACHE_DIR", "images/generation_cache")
+MAX_CACHE_BYTES = int(os.environ.get("ARTISELF_GENERATION_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+MAX_CACHE_ENTRIES = int(os.environ.get("ARTISELF_GENERATION_CACHE_MAX_ENTRIES", 2000))
+CACHE_ENABLED = os.environ.get("ARTISELF_GENERATION_CACHE", "1") != "0"
+
+
+class GenerationCache:
+    """
+    On-disk, content-addressed cache of generated images.
+
+    Entries are keyed by a hash of everything that determines the render
+    (backend, model id, prompt, size and seed) and evicted least-recently-used
+    first once the cache exceeds its byte or entry budget.
+    """
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES,
+                 max_entries: int = MAX_CACHE_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> size in bytes, ordered from least to most recently used
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._load()
+
+    @staticmethod
+    def make_key(backend: str, model: str, prompt: str, width: Optional[int] = None,
+                 height: Optional[int] = None, seed: Optional[int] = None) -> str:
+        """Build the cache key for a single render request."""
+        payload = json.dumps(
+            {"backend": backend, "model": model, "prompt": prompt,
+             "width": width, "height": height, "seed": seed},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def _load(self):
+        """Rebuild the LRU order from the files already on disk (oldest mtime first)."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".png"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            files.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    def get(self, key: str, output_dir: str = IMAGE_DIR) -> Optional[str]:
+        """
+        Copy the cached image for `key` into `output_dir`.
+
+        Returns:
+            str: Path of the copy on a hit, None on a miss.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            cached_path = self._path(key)
+            try:
+                output_path = store_image_file(cached_path, output_dir)
+                os.utime(cached_path, None)
+            except OSError:
+                # The file vanished underneath us; treat it as a miss.
+                self._total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            if output_path is None:
+                # Corrupt entry; drop it so it is regenerated.
+                self._total_bytes -= self._entries.pop(key)
+                self._remove_file(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return output_path
+
+    def put(self, key: str, image_path: str):
+        """Store a freshly generated image under `key`, evicting old entries as needed."""
+        with self._lock:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                cached_path = self._path(key)
+                tmp_path = f"{cached_path}.tmp"
+                shutil.copyfile(image_path, tmp_path)
+                os.replace(tmp_path, cached_path)
+                size = os.path.getsize(cached_path)
+            except OSError as e:
+                print(f"Error writing generation cache entry: {e}")
+                return
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+            self._entries[key] = size
+            self._total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (self._total_bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            self._remove_file(key)
+
+    def _remove_file(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
+
+
+_cache: Optional[GenerationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_generation_cache() -> Optional[GenerationCache]:
+    """Return the process-wide generation cache, or None if caching is disabled."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = GenerationCache()
+        return _cache
@@ -0,0 +1,209 @@
+import os
+import bisect
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, List, Optional, Tuple
+from utils.image_generators.base import BaseImageGenerator, FALLBACK_IMAGE
+
+# Hedge once the primary has run longer than this percentile of its recent latencies.
+HEDGE_PERCENTILE = float(os.environ.get("ARTISELF_HEDGE_PERCENTILE", 0.95))
+# Until a backend has this many samples, hedge after a fixed delay instead.
+HEDGE_MIN_SAMPLES = 10
+HEDGE_DEFAULT_DELAY = float(os.environ.get("ARTISELF_HEDGE_DEFAULT_DELAY", 20))
+# Never hedge sooner than this, so a fast backend with a tight histogram doesn't double every request.
+HEDGE_MIN_DELAY = 2.0
+HEDGE_WORKERS = int(os.environ.get("ARTISELF_HEDGE_WORKERS", 8))
+
+# Histogram bucket upper bounds in seconds: 0.1s growing by 25% per bucket up to ~10 minutes.
+_BUCKET_BOUNDS = [0.1 * 1.25 ** i for i in range(40)]
+
+
+class LatencyHistogram:
+    """Thread-safe histogram of request latencies with fixed log-spaced buckets."""
+    def __init__(self):
+        self._counts = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        index = bisect.bisect_left(_BUCKET_BOUNDS, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._total += 1
+
+    @property
+    def count(self) -> int:
+        return self._total
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Return the bucket upper bound below which `fraction` of samples fall, or None if empty."""
+        with self._lock:
+            if not self._total:
+                return None
+            target = fraction * self._total
+            seen = 0
+            for index, count in enumerate(self._counts):
+                seen += count
+                if seen >= target:
+                    return _BUCKET_BOUNDS[min(index, len(_BUCKET_BOUNDS) - 1)]
+        return _BUCKET_BOUNDS[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"count": self.count, "p50": self.percentile(0.5),
+                "p95": self.percentile(0.95), "p99": self.percentile(0.99)}
+
+
+def _is_success(image_paths: List[str]) -> bool:
+    return bool(image_paths) and image_paths[0] != FALLBACK_IMAGE
+
+
+class HedgedImageGenerator(BaseImageGenerator):
+    """
+    Image generator that races a secondary backend against a slow primary.
+
+    Every prompt goes to the primary backend first. If it has not answered
+    within its recent HEDGE_PERCENTILE latency, the same prompt is sent to the
+    secondary and whichever returns a real image first wins. Latencies of every
+    completed request, hedged or not, feed the per-backend histograms that set
+    the threshold.
+
+    Sync calls cannot cancel the losing request (it finishes in the background
+    and its image still lands in the generation cache); async calls cancel it.
+    Capabilities are the primary's; the secondary ignores what it can't do.
+    """
+    name = "hedged"
+
+    def __init__(self, primary: Tuple[str, BaseImageGenerator], secondary: Tuple[str, BaseImageGenerator],
+                 hedge_percentile: float = HEDGE_PERCENTILE):
+        self.primary_name, self.primary = primary
+        self.secondary_name, self.secondary = secondary
+        for flag, value in self.primary.capabilities().items():
+            setattr(self, flag, value)
+        self.hedge_percentile = hedge_percentile
+        self.histograms = {self.primary_name: LatencyHistogram(), self.secondary_name: LatencyHistogram()}
+        self.hedges = 0
+        self.hedge_wins = 0
+        # Concurrent generations share this instance, so the counters need the same care as the histograms
+        self._counter_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="hedge")
+
+    def capabilities(self) -> Dict[str, Any]:
+        return self.primary.capabilities()
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on the primary before sending the hedged request."""
+        histogram = self.histograms[self.primary_name]
+        if histogram.count < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(histogram.percentile(self.hedge_percentile), HEDGE_MIN_DELAY)
+
+    def latency_stats(self) -> Dict[str, Any]:
+        """Return per-backend latency percentiles and hedge counters."""
+        with self._counter_lock:
+            hedges, hedge_wins = self.hedges, self.hedge_wins
+        return {
+            "backends": {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+            "hedges": hedges,
+            "hedge_wins": hedge_wins,
+            "hedge_delay": self.hedge_delay(),
+        }
+
+    def _count_hedge(self):
+        with self._counter_lock:
+            self.hedges += 1
+
+    def _count_hedge_win(self):
+        with self._counter_lock:
+            self.hedge_wins += 1
+
+    def _call(self, name: str, backend: BaseImageGenerator, prompt: str, num_outputs: int,
+              kwargs: Dict[str, Any]) -> List[str]:
+        start = time.perf_counter()
+        try:
+            return backend.generate_images(prompt, num_outputs=num_outputs, **kwargs)
+        finally:
+            self.histograms[name].record(time.perf_counter() - start)
+
+    async def _acall(self, name: str, backend: BaseImageGenerator, prompt: str, num_outputs: int,
+                     kwargs: Dict[str, Any]) -> List[str]:
+        start = time.perf_counter()
+        try:
+            return await backend.agenerate_images(prompt, num_outputs=num_outputs, **kwargs)
+        finally:
+            # A cancelled loser records how long it had run so far, a lower bound on its latency;
+            # otherwise a backend that always loses would never be measured.
+            self.histograms[name].record(time.perf_counter() - start)
+
+    def generate_images(self, prompt: str, num_outputs: int = 1, width: Optional[int] = None,
+                        height: Optional[int] = None, seed: Optional[int] = None) -> List[str]:
+        """Generate images for `prompt`, hedging to the secondary backend if the primary is slow."""
+        kwargs = {"width": width, "height": height, "seed": seed}
+        primary = self._executor.submit(self._call, self.primary_name, self.primary, prompt, num_outputs, kwargs)
+        done, _ = wait([primary], timeout=self.hedge_delay())
+        if done and _is_success(self._result(primary)):
+            return primary.result()
+
+        self._count_hedge()
+        print(f"Hedging image generation: {self.primary_name} is slow or failed, trying {self.secondary_name}")
+        secondary = self._executor.submit(self._call, self.secondary_name, self.secondary, prompt, num_outputs,
+                                          kwargs)
+        pending = {primary, secondary}
+        first_result = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = self._result(future)
+                first_result = first_result or result
+                if _is_success(result):
+                    if future is secondary:
+                        self._count_hedge_win()
+                    return result
+        return first_result or [FALLBACK_IMAGE]
+
+    async def agenerate_images(self, prompt: str, num_outputs: int = 1, width: Optional[int] = None,
+                               height: Optional[int] = None, seed: Optional[int] = None) -> List[str]:
+        """Async counterpart of generate_images; the losing request is cancelled."""
+        kwargs = {"width": width, "height": height, "seed": seed}
+        primary = asyncio.ensure_future(self._acall(self.primary_name, self.primary, prompt, num_outputs, kwargs))
+        done, _ = await asyncio.wait([primary], timeout=self.hedge_delay())
+        if done and _is_success(self._result(primary)):
+            return primary.result()
+
+        self._count_hedge()
+        print(f"Hedging image generation: {self.primary_name} is slow or failed, trying {self.secondary_name}")
+        secondary = asyncio.ensure_future(self._acall(self.secondary_name, self.secondary, prompt, num_outputs,
+                                                      kwargs))
+        pending = {primary, secondary}
+        first_result = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = self._result(task)
+                    first_result = first_result or result
+                    if _is_success(result):
+                        if task is secondary:
+                            self._count_hedge_win()
+                        return result
+        finally:
+            for task in pending:
+                task.cancel()
+        return first_result or [FALLBACK_IMAGE]
+
+    @staticmethod
+    def _result(future) -> List[str]:
+        try:
+            return future.result()
+        except Exception as e:
+            print("Error generating image:", e)
+            return [FALLBACK_IMAGE]
+
+    def generate_image(self, prompt: str, width: Optional[int] = None, height: Optional[int] = None,
+                       seed: Optional[int] = None) -> str:
+        return self.generate_images(prompt, 1, width, height, seed)[0]
+
+    async def agenerate_image(self, prompt: str, width: Optional[int] = None, height: Optional[int] = None,
+                              seed: Optional[int] = None) -> str:
+        return (await self.agenerate_images(prompt, 1, width, height, seed))[0]
@@ -0,0 +1,143 @@
+import io
+import os
+import asyncio
+import uuid
+import hashlib
+from typing import AsyncIterable, Iterable, Optional
+from PIL import Image
+
+IMAGE_DIR = "images/generated_images"
+# In-progress downloads; hidden so directory listings and globs never pick them up.
+TEMP_PREFIX = ".incoming-"
+COPY_CHUNK_SIZE = 1024 * 1024
+EXTENSIONS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp", "GIF": ".gif"}
+# Bytes kept in memory from the start of each file; enough for PIL to parse the header,
+# including JPEGs with sizeable EXIF blocks.
+HEADER_BYTES = 64 * 1024
+# Every complete file of these formats ends with a fixed marker, which catches truncated downloads.
+TRAILERS = {"PNG": b"IEND\xaeB`\x82", "JPEG": b"\xff\xd9"}
+
+
+class _TempImage:
+    """
+    A uniquely named temp file in the target directory.
+
+    The data is hashed as it is written, and the header and trailer bytes are
+    kept in memory so the image can be validated without reading the file back.
+    """
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, f"{TEMP_PREFIX}{uuid.uuid4().hex}")
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self._header = bytearray()
+        self._tail = b""
+        self._file = open(self.path, "wb")
+
+    def write(self, chunk: bytes):
+        if chunk:
+            self._file.write(chunk)
+            self.digest.update(chunk)
+            self.size += len(chunk)
+            if len(self._header) < HEADER_BYTES:
+                self._header += chunk[:HEADER_BYTES - len(self._header)]
+            self._tail = (self._tail + chunk[-16:])[-16:]
+
+    def _validate(self, expected_size: Optional[int]) -> str:
+        """Check the buffered header and trailer; return the image format or raise ValueError."""
+        if expected_size is not None and self.size != expected_size:
+            raise ValueError(f"expected {expected_size} bytes, received {self.size}")
+        try:
+            with Image.open(io.BytesIO(bytes(self._header))) as im:
+                image_format = im.format
+                width, height = im.size
+        except Exception as e:
+            raise ValueError(f"unrecognized image data ({e})")
+        if width <= 0 or height <= 0:
+            raise ValueError(f"invalid image size {width}x{height}")
+        trailer = TRAILERS.get(image_format)
+        # Allow a few bytes of padding after the end marker.
+        if trailer and trailer not in self._tail:
+            raise ValueError(f"truncated {image_format} data")
+        return image_format
+
+    def commit(self, expected_size: Optional[int] = None) -> Optional[str]:
+        """
+        Validate the finished file and atomically rename it to its content-hash name.
+
+        Returns:
+            str: The final path, or None if the data is not a valid image.
+        """
+        self._file.close()
+        try:
+            image_format = self._validate(expected_size)
+        except ValueError as e:
+            print("Error verifying the image file:", e)
+            self.discard()
+            return None
+        extension = EXTENSIONS.get(image_format, ".png")
+        final_path = os.path.join(self.directory, f"generated_{self.digest.hexdigest()[:24]}{extension}")
+        # Identical content maps to the same name, so replacing an existing file is harmless.
+        os.replace(self.path, final_path)
+        return final_path
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def save_image_chunks(chunks: Iterable[bytes], directory: str = IMAGE_DIR,
+                      expected_size: Optional[int] = None) -> Optional[str]:
+    """
+    Write an image to `directory` without ever exposing a partial file.
+
+    The data goes to a temp file first and is only renamed to its final,
+    content-addressed name (generated_<sha256>.png) once it has been verified,
+    so concurrent generations never overwrite each other and readers never
+    see half-written images. If `expected_size` is given (e.g. from a
+    Content-Length header), a short read is rejected as well.
+
+    Returns:
+        str: Path of the saved image, or None if the data is not a valid image.
+    """
+    temp = _TempImage(directory)
+    try:
+        for chunk in chunks:
+            temp.write(chunk)
+    except BaseException:
+        temp.discard()
+        raise
+    return temp.commit(expected_size)
+
+
+async def asave_image_chunks(chunks: AsyncIterable[bytes], directory: str = IMAGE_DIR,
+                             expected_size: Optional[int] = None) -> Optional[str]:
+    """
+    Async counterpart of save_image_chunks, e.g. for an httpx response stream.
+
+    The file writes and the final validation run on worker threads, so a
+    download never stalls the event loop on disk I/O or image decoding.
+    """
+    temp = await asyncio.to_thread(_TempImage, directory)
+    try:
+        async for chunk in chunks:
+            await asyncio.to_thread(temp.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(temp.discard)
+        raise
+    return await asyncio.to_thread(temp.commit, expected_size)
+
+
+def save_image_bytes(data: bytes, directory: str = IMAGE_DIR) -> Optional[str]:
+    """Save an image that is already in memory."""
+    return save_image_chunks([data], directory)
+
+
+def store_image_file(source_path: str, directory: str = IMAGE_DIR) -> Optional[str]:
+    """Copy an existing image file (e.g. a cache entry) into `directory` atomically."""
+    with open(source_path, "rb") as f:
+        return save_image_chunks(iter(lambda: f.read(COPY_CHUNK_SIZE), b""), directory)
@@ -0,0 +1,123 @@
+import os
+import importlib
+import inspect
+import threading
+from typing import Any, Dict, List, Optional, Type
+from utils.image_generators.base import BaseImageGenerator
+from utils.image_generators.hedged_image_generator import HedgedImageGenerator
+
+# Backend name -> module defining an ImageGenerator class and the environment variable it needs.
+# Modules are imported on first use, so a deployment only needs the SDKs of the backends it selects.
+BACKENDS: Dict[str, Dict[str, Optional[str]]] = {}
+
+# Backend used for every generation; override per deployment with ARTISELF_IMAGE_BACKEND.
+IMAGE_BACKEND = os.environ.get("ARTISELF_IMAGE_BACKEND", "replicate")
+# Backend raced against a slow primary, e.g. ARTISELF_HEDGE_BACKEND=stability. Hedging is opt-in:
+# a hedged request is billed by both providers, so it stays off unless a deployment names a secondary.
+HEDGE_BACKEND = os.environ.get("ARTISELF_HEDGE_BACKEND", "none")
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def register_backend(name: str, module: str, required_env: Optional[str] = None,
+                     class_name: str = "ImageGenerator"):
+    """
+    Register an image generator backend.
+
+    Args:
+        name (str): Name used to select the backend, e.g. in ARTISELF_IMAGE_BACKEND.
+        module (str): Dotted path of the module defining the generator class.
+        required_env (str, optional): Environment variable that must be set for the backend to work.
+        class_name (str): Name of a BaseImageGenerator subclass in `module`.
+    """
+    BACKENDS[name] = {"module": module, "class_name": class_name, "required_env": required_env}
+
+
+register_backend("replicate", "utils.image_generators.replicate_image_generator", "REPLICATE_API_TOKEN")
+register_backend("stability", "utils.image_generators.stability_image_generator", "STABILITY_API_KEY")
+register_backend("craiyon", "utils.image_generators.craiyon_image_generator")
+register_backend("fake", "utils.image_generators.fake_image_generator")
+
+
+def available_backends() -> List[str]:
+    """Return the registered backends whose required environment variable is set."""
+    return [name for name, spec in BACKENDS.items()
+            if not spec["required_env"] or os.environ.get(spec["required_env"])]
+
+
+def get_backend_class(name: str) -> Type[BaseImageGenerator]:
+    """Import and return the generator class of a registered backend, checking it implements the interface."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown image backend '{name}'; registered: {', '.join(BACKENDS)}")
+    spec = BACKENDS[name]
+    cls = getattr(importlib.import_module(spec["module"]), spec["class_name"])
+    if not (inspect.isclass(cls) and issubclass(cls, BaseImageGenerator)) or inspect.isabstract(cls):
+        missing = ", ".join(sorted(getattr(cls, "__abstractmethods__", ())))
+        raise TypeError(f"Image backend '{name}' is not a complete BaseImageGenerator"
+                        + (f" (missing {missing})" if missing else ""))
+    return cls
+
+
+def create_backend(name: str) -> BaseImageGenerator:
+    """Instantiate a registered backend, checking its required environment variable first."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown image backend '{name}'; registered: {', '.join(BACKENDS)}")
+    required_env = BACKENDS[name]["required_env"]
+    if required_env and not os.environ.get(required_env):
+        raise ValueError(f"{required_env} not set in environment")
+    return get_backend_class(name)()
+
+
+def _create_hedge_backend() -> Optional[BaseImageGenerator]:
+    if HEDGE_BACKEND in ("", "none") or HEDGE_BACKEND == IMAGE_BACKEND:
+        return None
+    if HEDGE_BACKEND not in BACKENDS:
+        print(f"Unknown hedge backend '{HEDGE_BACKEND}', hedging disabled")
+        return None
+    try:
+        return create_backend(HEDGE_BACKEND)
+    except Exception as e:
+        print(f"Hedge backend '{HEDGE_BACKEND}' unavailable, hedging disabled: {e}")
+        return None
+
+
+def get_capabilities() -> Dict[str, Any]:
+    """Return the capability flags of the configured backend without instantiating it."""
+    return get_backend_class(IMAGE_BACKEND).capabilities()
+
+
+def get_image_generator() -> BaseImageGenerator:
+    """
+    Return the process-wide image generator used by the graphs.
+
+    This is the IMAGE_BACKEND generator, wrapped in a HedgedImageGenerator
+    when the hedge backend is configured, so slow primary requests are raced
+    against a second provider. The instance is shared so its latency
+    histograms accumulate across requests.
+    """
+    global _generator
+    with _generator_lock:
+        if _generator is None:
+            primary = create_backend(IMAGE_BACKEND)
+            secondary = _create_hedge_backend()
+            if secondary is None:
+                _generator = primary
+            else:
+                _generator = HedgedImageGenerator((IMAGE_BACKEND, primary), (HEDGE_BACKEND, secondary))
+        return _generator
+
+
+def get_latency_stats() -> Optional[Dict[str, Any]]:
+    """
+    Return the hedging latency stats of the shared generator.
+
+    Returns:
+        dict: See HedgedImageGenerator.latency_stats, or None if hedging is off
+        or nothing has been generated in this process yet.
+    """
+    with _generator_lock:
+        generator = _generator
+    if isinstance(generator, HedgedImageGenerator):
+        return generator.latency_stats()
+    return None
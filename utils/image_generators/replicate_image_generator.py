@@ -1,74 +1,180 @@
 import os
-import time
-import requests
-import replicate
-from PIL import Image
+import asyncio
+from typing import List, Optional
+from utils.http_transport import get_replicate_client, get_async_replicate_client
+from utils.image_generators.base import BaseImageGenerator, FALLBACK_IMAGE
+from utils.image_generators.generation_cache import GenerationCache, get_generation_cache
+from utils.image_generators.image_store import IMAGE_DIR
+from utils.image_generators.downloader import download_images, adownload_images
+
+MODEL_ID = "black-forest-labs/flux-schnell"
+OUTPUT_DIR = IMAGE_DIR
+# flux-schnell returns at most four images per prediction
+MAX_OUTPUTS = 4
+DEFAULT_SIZE = 512
+
+class ImageGenerator(BaseImageGenerator):
+    name = "replicate"
+    max_width = 1440
+    max_height = 1440
+    max_outputs = MAX_OUTPUTS
+    supports_seed = True
+    supports_size = True
+    native_async = True
 
-class ImageGenerator:
     def __init__(self):
         # Ensure that the REPLICATE_API_TOKEN environment variable is set.
         self.api_token = os.getenv("REPLICATE_API_TOKEN")
         if not self.api_token:
             raise ValueError("REPLICATE_API_TOKEN not set in environment")
 
-    def generate_image(self, prompt: str, width: int = 512, height: int = 512, num_outputs: int = 1) -> str:
+    def _model_input(self, prompt: str, width: int, height: int, num_outputs: int, seed: Optional[int]) -> dict:
+        model_input = {
+            "prompt": prompt,
+            "width": width,
+            "height": height,
+            "num_outputs": num_outputs
+        }
+        if seed is not None:
+            model_input["seed"] = seed
+        return model_input
+
+    def _cache_key(self, prompt: str, width: int, height: int, seed: Optional[int], index: int) -> str:
+        # Variant 0 shares its key with single-image requests, so earlier renders are reused.
+        model = MODEL_ID if index == 0 else f"{MODEL_ID}#variant{index}"
+        return GenerationCache.make_key("replicate", model, prompt, width, height, seed)
+
+    def _cached_images(self, cache, cache_keys: List[str]) -> List[Optional[str]]:
+        if not cache:
+            return [None] * len(cache_keys)
+        cached_paths = [cache.get(cache_key, OUTPUT_DIR) for cache_key in cache_keys]
+        for cached_path in filter(None, cached_paths):
+            print("Generation cache hit:", cached_path)
+        return cached_paths
+
+    def _record_saved_image(self, image_path: Optional[str], cache, cache_key: str) -> Optional[str]:
+        """Record a verified image in the generation cache (the store has already checked it)."""
+        if not image_path:
+            return None
+        print("Image successfully saved to:", image_path)
+        if cache:
+            cache.put(cache_key, image_path)
+        return image_path
+
+    def _merge_results(self, cached_paths: List[Optional[str]], new_paths: List[Optional[str]],
+                       cache, cache_keys: List[str]) -> List[str]:
+        """Fill the cache misses with the new renders, in variant order, and drop failures."""
+        new_paths = iter(new_paths)
+        paths = []
+        for cached_path, cache_key in zip(cached_paths, cache_keys):
+            path = cached_path or self._record_saved_image(next(new_paths, None), cache, cache_key)
+            if path:
+                paths.append(path)
+        return paths or [FALLBACK_IMAGE]
+
+    def generate_images(self, prompt: str, num_outputs: int = 1, width: Optional[int] = None,
+                        height: Optional[int] = None, seed: Optional[int] = None) -> List[str]:
         """
-        Generate an image using the Replicate API.
-        
+        Generate several variants of a prompt with a single Replicate call.
+
+        Only the variants missing from the generation cache are requested, and
+        all of them are downloaded concurrently.
+
         Parameters:
             prompt (str): The text prompt for image generation.
-            width (int): Width of the generated image.
-            height (int): Height of the generated image.
-            num_outputs (int): Number of images to generate (default is 1).
-        
+            num_outputs (int): Number of variants, up to MAX_OUTPUTS.
+            width (int, optional): Width of the generated images (default 512).
+            height (int, optional): Height of the generated images (default 512).
+            seed (int, optional): Seed for reproducible renders.
+
         Returns:
-            str: Local file path to the saved image.
+            list: Local file paths of the saved images, or [FALLBACK_IMAGE] if none could be generated.
         """
+        num_outputs = max(1, min(num_outputs, MAX_OUTPUTS))
+        width, height = width or DEFAULT_SIZE, height or DEFAULT_SIZE
+        cache = get_generation_cache()
+        cache_keys = [self._cache_key(prompt, width, height, seed, i) for i in range(num_outputs)]
+        cached_paths = self._cached_images(cache, cache_keys)
+        missing = cached_paths.count(None)
+        if not missing:
+            return cached_paths
+
+        new_paths = []
         try:
-            output = replicate.run(
-                "black-forest-labs/flux-schnell",
-                input={
-                    "prompt": prompt,
-                    "width": width,
-                    "height": height,
-                    "num_outputs": num_outputs
-                }
+            output = get_replicate_client().run(
+                MODEL_ID, input=self._model_input(prompt, width, height, missing, seed)
             )
-            
+
             # Expecting output to be a list of image URLs.
             if not output or not isinstance(output, list):
                 print("No image URL returned from Replicate API.")
-                return "images/example_image.png"
-            
-            image_url = output[0]
-            print("Generated image URL:", image_url)
-            
-            # Download the image from the URL.
-            response = requests.get(image_url, stream=True)
-            if response.status_code != 200:
-                print("Failed to download image, HTTP status code:", response.status_code)
-                return "images/example_image.png"
-            
-            # Create the directory if it does not exist.
-            output_dir = "images/generated_images"
-            os.makedirs(output_dir, exist_ok=True)
-            image_path = os.path.join(output_dir, f"generated_{int(time.time())}.png")
-            
-            # Save the downloaded image.
-            with open(image_path, "wb") as f:
-                for chunk in response.iter_content(1024):
-                    f.write(chunk)
-            
-            # Verify the image using PIL.
-            try:
-                with Image.open(image_path) as im:
-                    im.verify()
-                print("Image successfully saved to:", image_path)
-                return image_path
-            except Exception as e:
-                print("Error verifying the image file:", e)
-                return "images/example_image.png"
-        
+            else:
+                image_urls = [str(url) for url in output[:missing]]
+                print("Generated image URLs:", image_urls)
+                new_paths = download_images(image_urls, OUTPUT_DIR)
+
+        except Exception as e:
+            print("Error generating image using Replicate API:", e)
+
+        return self._merge_results(cached_paths, new_paths, cache, cache_keys)
+
+    async def agenerate_images(self, prompt: str, num_outputs: int = 1, width: Optional[int] = None,
+                               height: Optional[int] = None, seed: Optional[int] = None) -> List[str]:
+        """
+        Async counterpart of generate_images; the downloads run concurrently on the event loop.
+
+        Generation cache lookups and writes copy files, so they run on worker threads.
+        """
+        num_outputs = max(1, min(num_outputs, MAX_OUTPUTS))
+        width, height = width or DEFAULT_SIZE, height or DEFAULT_SIZE
+        cache = get_generation_cache()
+        cache_keys = [self._cache_key(prompt, width, height, seed, i) for i in range(num_outputs)]
+        cached_paths = await asyncio.to_thread(self._cached_images, cache, cache_keys)
+        missing = cached_paths.count(None)
+        if not missing:
+            return cached_paths
+
+        new_paths = []
+        try:
+            output = await get_async_replicate_client().async_run(
+                MODEL_ID, input=self._model_input(prompt, width, height, missing, seed)
+            )
+
+            if not output or not isinstance(output, list):
+                print("No image URL returned from Replicate API.")
+            else:
+                image_urls = [str(url) for url in output[:missing]]
+                print("Generated image URLs:", image_urls)
+                new_paths = await adownload_images(image_urls, OUTPUT_DIR)
+
         except Exception as e:
             print("Error generating image using Replicate API:", e)
-            return "images/example_image.png"
+
+        return await asyncio.to_thread(self._merge_results, cached_paths, new_paths, cache, cache_keys)
+
+    def generate_image(self, prompt: str, width: Optional[int] = None, height: Optional[int] = None,
+                       seed: Optional[int] = None, num_outputs: int = 1) -> str:
+        """
+        Generate an image using the Replicate API.
+
+        Parameters:
+            prompt (str): The text prompt for image generation.
+            width (int, optional): Width of the generated image (default 512).
+            height (int, optional): Height of the generated image (default 512).
+            seed (int, optional): Seed for reproducible renders.
+            num_outputs (int): Number of images to generate (default is 1); see generate_images.
+
+        Returns:
+            str: Local file path to the first saved image.
+        """
+        return self.generate_images(prompt, num_outputs, width, height, seed)[0]
+
+    async def agenerate_image(self, prompt: str, width: Optional[int] = None, height: Optional[int] = None,
+                              seed: Optional[int] = None, num_outputs: int = 1) -> str:
+        """
+        Async counterpart of generate_image.
+
+        The prediction and the download both run on the event loop, so many
+        generations can be in flight without a blocked thread per request.
+        """
+        return (await self.agenerate_images(prompt, num_outputs, width, height, seed))[0]
@@ -1,21 +1,39 @@
-import requests
 import os
-import time
+from typing import Optional
 from dotenv import load_dotenv
+from utils.http_transport import get_session
+from utils.image_generators.base import BaseImageGenerator, FALLBACK_IMAGE
+from utils.image_generators.generation_cache import GenerationCache, get_generation_cache
+from utils.image_generators.downloader import save_response
 
 # Load environment variables
 load_dotenv()
 
-class ImageGenerator:
+class ImageGenerator(BaseImageGenerator):
+    # The request below always renders a single 1024x1024 image without a seed.
+    name = "stability"
+    max_width = 1024
+    max_height = 1024
+
     def __init__(self):
         self.api_key = os.environ.get("STABILITY_API_KEY")
         self.endpoint = "https://api.stability.ai/v2beta/stable-image/generate/sd3"
 
-    def generate_image(self, prompt: str) -> str:
+    def generate_image(self, prompt: str, width: Optional[int] = None, height: Optional[int] = None,
+                       seed: Optional[int] = None) -> str:
         """
         Generate an image using Stability AI's DreamStudio API.
+        Size and seed are not supported and ignored.
         Returns the local path to the saved image.
         """
+        cache = get_generation_cache()
+        cache_key = GenerationCache.make_key("stability", self.endpoint, prompt, 1024, 1024)
+        if cache:
+            cached_path = cache.get(cache_key)
+            if cached_path:
+                print(f"Generation cache hit: {cached_path}")
+                return cached_path
+
         try:
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
@@ -33,30 +51,29 @@ class ImageGenerator:
             }
             
             # Make the API request
-            response = requests.post(
+            response = get_session().post(
                 self.endpoint,
                 headers=headers,
                 files=files,
-                data=form_data
+                data=form_data,
+                stream=True
             )
             
             if response.status_code != 200:
                 print(f"API request failed with status code {response.status_code}")
                 print(f"Response body: {response.text}")
-                return "images/example_image.png"
-            
-            # Create images directory if it doesn't exist
-            if not os.path.exists("images/generated_images"):
-                os.makedirs("images/generated_images")
+                return FALLBACK_IMAGE
             
-            # Save the image directly from response content
-            image_path = f"images/generated_images/generated_{int(time.time())}.png"
-            with open(image_path, "wb") as f:
-                f.write(response.content)
+            # Stream the image from the response body into the image store
+            image_path = save_response(response)
+            if not image_path:
+                return FALLBACK_IMAGE
             
             print(f"Image saved to {image_path}")
+            if cache:
+                cache.put(cache_key, image_path)
             return image_path
             
         except Exception as e:
             print(f"Error generating image with DreamStudio API: {e}")
-            return "images/example_image.png"
+            return FALLBACK_IMAGE
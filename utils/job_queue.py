@@ -0,0 +1,306 @@
+import os
+import json
+import uuid
+import sqlite3
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+JOBS_DB = os.environ.get("ARTISELF_JOBS_DB", "data/jobs.sqlite3")
+JOB_WORKERS = int(os.environ.get("ARTISELF_JOB_WORKERS", 4))
+MAX_CONCURRENT_PER_HOST = int(os.environ.get("ARTISELF_MAX_CONCURRENT_PER_HOST", 4))
+# Finished jobs kept in memory (with their full results) before the oldest are dropped
+MAX_JOBS_IN_MEMORY = 200
+
+REPLICATE_HOST = "api.replicate.com"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+INTERRUPTED = "interrupted"
+FINISHED_STATUSES = (SUCCEEDED, FAILED, INTERRUPTED)
+
+
+class JobContext:
+    """Handed to a job handler so it can report progress while it runs."""
+    def __init__(self, queue: "JobQueue", job_id: str):
+        self._queue = queue
+        self.job_id = job_id
+        self._persisted = (0.0, "")
+
+    def set_progress(self, progress: float, message: str = ""):
+        """Record progress as a fraction between 0 and 1 with a short status message."""
+        progress = max(0.0, min(progress, 1.0))
+        # Progress may be reported per token; only write through to SQLite on meaningful changes.
+        last_progress, last_message = self._persisted
+        persist = message != last_message or progress - last_progress >= 0.1
+        if persist:
+            self._persisted = (progress, message)
+        self._queue._update(self.job_id, persist=persist, progress=progress, message=message)
+
+    def on_token(self, token: str):
+        """Append a streamed LLM token to the job's partial output."""
+        self._queue._append_partial(self.job_id, token)
+
+    def checkpoint(self, result: Any):
+        """Persist an intermediate result, so a long job keeps its finished work if it is interrupted."""
+        self._queue._update(self.job_id, result=result)
+
+
+class JobQueue:
+    """
+    Background job queue for long-running generations.
+
+    Jobs run on a bounded thread pool outside the Streamlit script thread, so
+    they survive reruns and page navigation. Job status is persisted to SQLite;
+    results (which may hold non-JSON objects such as LangChain messages) are
+    also kept in memory for the lifetime of the process.
+    """
+    def __init__(self, db_path: str = JOBS_DB, max_workers: int = JOB_WORKERS,
+                 max_per_host: int = MAX_CONCURRENT_PER_HOST):
+        self.db_path = db_path
+        self.max_per_host = max_per_host
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="artiself-job")
+        self._handlers: Dict[str, Dict[str, Any]] = {}
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, check_same_thread=False)
+
+    def _init_db(self):
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = self._connect()
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT NOT NULL DEFAULT '',
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            # Jobs that were in flight when the previous process stopped can never finish.
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status IN (?, ?)",
+                (INTERRUPTED, datetime.datetime.now().isoformat(), QUEUED, RUNNING)
+            )
+
+    def register(self, kind: str, handler: Callable[..., Any], host: Optional[str] = None):
+        """
+        Register a handler for a job kind.
+
+        Args:
+            kind: Name used when submitting jobs
+            handler: Called as handler(context, **payload); its return value is the job result
+            host: Remote host the handler talks to; concurrent jobs per host are capped
+        """
+        self._handlers[kind] = {"handler": handler, "host": host}
+        if host and host not in self._host_slots:
+            self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+
+    def submit(self, kind: str, **payload) -> str:
+        """Queue a job and return its id."""
+        if kind not in self._handlers:
+            raise ValueError(f"No job handler registered for '{kind}'")
+        job_id = uuid.uuid4().hex
+        now = datetime.datetime.now().isoformat()
+        job = {
+            "id": job_id, "kind": kind, "status": QUEUED, "progress": 0.0, "message": "Waiting to start",
+            "partial": "", "result": None, "error": None, "created_at": now, "updated_at": now
+        }
+        with self._lock:
+            self._prune()
+            self._jobs[job_id] = job
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, progress, message, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, 0.0, job["message"], now, now)
+            )
+        self._executor.submit(self._run, job_id, kind, payload)
+        return job_id
+
+    def _prune(self):
+        # Dicts keep insertion order, so the first finished jobs are the oldest.
+        excess = len(self._jobs) - MAX_JOBS_IN_MEMORY
+        for job_id in [jid for jid, job in self._jobs.items() if job["status"] in FINISHED_STATUSES][:max(excess, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job_id: str, kind: str, payload: Dict[str, Any]):
+        spec = self._handlers[kind]
+        slot = self._host_slots.get(spec["host"])
+        context = JobContext(self, job_id)
+        try:
+            if slot:
+                slot.acquire()
+            try:
+                self._update(job_id, status=RUNNING, message="Running")
+                result = spec["handler"](context, **payload)
+            finally:
+                if slot:
+                    slot.release()
+            self._update(job_id, status=SUCCEEDED, progress=1.0, message="Done", result=result)
+        except Exception as e:
+            print(f"Job {job_id} ({kind}) failed: {e}")
+            self._update(job_id, status=FAILED, message="Failed", error=str(e))
+
+    def _update(self, job_id: str, persist: bool = True, **fields):
+        now = datetime.datetime.now().isoformat()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields, updated_at=now)
+        if not persist:
+            return
+        columns = {k: v for k, v in fields.items() if k in ("status", "progress", "message", "error")}
+        if "result" in fields:
+            columns["result"] = _serialize_result(fields["result"])
+        columns["updated_at"] = now
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._db_lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*columns.values(), job_id))
+
+    def _append_partial(self, job_id: str, token: str):
+        # Partial output changes per token, so it is kept in memory only.
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job["partial"] += token
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a snapshot of a job's status, progress, partial output and result.
+
+        Jobs from an earlier process are read back from SQLite with their
+        JSON-serialized result.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT id, kind, status, progress, message, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ["id", "kind", "status", "progress", "message", "result", "error", "created_at", "updated_at"]
+        job = dict(zip(keys, row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["partial"] = ""
+        return job
+
+
+def _serialize_result(result: Any) -> Optional[str]:
+    if result is None:
+        return None
+    if isinstance(result, dict):
+        # Chat messages are only needed in-process; everything else is plain data.
+        result = {k: v for k, v in result.items() if k != "messages"}
+    return json.dumps(result, default=str)
+
+
+# ===============================
+# BUILT-IN JOB HANDLERS
+# ===============================
+def _generate_artwork_job(context: JobContext, concept: str, num_variants: int = 1,
+                          session_id: Optional[str] = None):
+    from utils.art_graph import generate_artwork, CONCEPT_LLM_INPUT
+
+    expected_tokens = CONCEPT_LLM_INPUT["max_new_tokens"]
+    token_count = 0
+
+    def on_token(token: str):
+        nonlocal token_count
+        token_count += 1
+        context.on_token(token)
+        context.set_progress(0.8 * min(token_count / expected_tokens, 1.0), "Refining your concept")
+
+    context.set_progress(0.05, "Refining your concept")
+    return generate_artwork(concept, on_token=on_token, num_variants=num_variants, session_id=session_id)
+
+
+def _modify_artwork_job(context: JobContext, **kwargs):
+    from utils.modification_engine import generate_artwork_with_modification
+
+    def on_token(token: str):
+        context.on_token(token)
+        context.set_progress(0.5, "Writing the modified concept")
+
+    context.set_progress(0.05, "Analyzing your artwork")
+    return generate_artwork_with_modification(on_token=on_token, **kwargs)
+
+
+def _evolve_artwork_job(context: JobContext, iterations: int, **kwargs):
+    from utils.modification_engine import evolve_artwork
+
+    state = None
+    context.set_progress(0.0, f"Running iteration 1 of {iterations}")
+    for completed, state in enumerate(evolve_artwork(iterations=iterations, **kwargs), start=1):
+        context.checkpoint(state)
+        message = f"Running iteration {completed + 1} of {iterations}" if completed < iterations else "Finishing"
+        context.set_progress(completed / iterations, message)
+    if state is None:
+        raise RuntimeError("Evolution run finished without producing an artwork")
+    return state
+
+
+def _explore_strategies_job(context: JobContext, **kwargs):
+    from utils.modification_engine import explore_all_strategies, STRATEGY_NODES, EXPLORE_MAX_WORKERS
+
+    total = len(kwargs.get("strategies") or STRATEGY_NODES)
+    candidates = []
+    context.set_progress(0.05, "Analyzing your artwork")
+    # The job holds one host slot but renders in parallel; keep that within the per-host cap
+    for state in explore_all_strategies(max_workers=min(EXPLORE_MAX_WORKERS, MAX_CONCURRENT_PER_HOST), **kwargs):
+        candidates.append(state["modification_history"][-1])
+        context.checkpoint({"candidates": list(candidates)})
+        context.set_progress(len(candidates) / total, f"Rendered {len(candidates)} of {total} candidates")
+    if not candidates:
+        raise RuntimeError("No strategy produced a candidate")
+    return {"candidates": candidates}
+
+
+def _index_collections_job(context: JobContext):
+    from utils.collection_util import sync_search_index
+    from utils.concept_index import refresh_concept_index
+
+    context.set_progress(0.1, "Indexing saved collections")
+    sync_search_index()
+    context.set_progress(0.8, "Indexing saved concepts")
+    refresh_concept_index()
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue with the built-in generation handlers registered."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+            _queue.register("generate_artwork", _generate_artwork_job, host=REPLICATE_HOST)
+            _queue.register("modify_artwork", _modify_artwork_job, host=REPLICATE_HOST)
+            _queue.register("evolve_artwork", _evolve_artwork_job, host=REPLICATE_HOST)
+            _queue.register("explore_strategies", _explore_strategies_job, host=REPLICATE_HOST)
+            _queue.register("index_collections", _index_collections_job)
+            # Build the search and concept indexes at startup rather than on the first request that needs them
+            _queue.submit("index_collections")
+        return _queue
@@ -1,16 +1,31 @@
-from typing import List, TypedDict, Optional, Dict, Any
+from typing import List, TypedDict, Optional, Dict, Any, Iterator, Callable
+import asyncio
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 from dotenv import load_dotenv
-import replicate
 from langchain.schema import BaseMessage, HumanMessage, AIMessage
 from langgraph.graph import StateGraph, END
-from utils.image_generators.replicate_image_generator import ImageGenerator
-from utils.image_analysis import analyze_image
+from langchain_core.runnables import RunnableConfig
+from utils.image_generators.base import FALLBACK_IMAGE
+from utils.image_generators.registry import get_image_generator
+from utils.image_analysis import analyze_image, aanalyze_image
+from utils.image_features import extract_image_features, describe_image_features
+from utils.graph_registry import get_compiled_graph
+from utils.checkpointing import get_checkpointer, invoke_resumable, stream_resumable, run_thread_id
+from utils.thumbnails import create_thumbnail
+from utils.concept_index import SIMILAR_CONCEPTS, similar_concepts
+from utils.token_stream import TokenCallback, get_token_callback, token_config, stream_llm, astream_llm
+from utils.http_transport import get_llm_client, get_async_llm_client, collect_output, acollect_output
 
 # Load environment variables
 load_dotenv()
 REPLICATE_API_TOKEN = os.environ.get("REPLICATE_API_TOKEN")
+LLM_MODEL = "ibm-granite/granite-3.2-8b-instruct"
+# Upper bound on strategies rendered at once in "explore all" mode
+EXPLORE_MAX_WORKERS = int(os.environ.get("ARTISELF_EXPLORE_MAX_WORKERS", 4))
+# Fast analysis describes images from locally measured features only, skipping the LLaVA call.
+FAST_ANALYSIS = os.environ.get("ARTISELF_FAST_ANALYSIS", "0") == "1"
 
 
 # ===============================
@@ -22,32 +37,59 @@ class ModificationState(TypedDict):
     refined_concept: str
     current_image_url: str
     previous_images: List[str]
+    # Strategy the user asked for (None lets the AI choose every round); modification_type is the one applied
+    requested_strategy: Optional[str]
     modification_type: str
     iteration: int
     modification_history: List[Dict[str, Any]]
     feedback: str
     image_analysis: Optional[str]
+    image_features: Optional[Dict[str, Any]]
+    fast_analysis: bool
+    remaining_iterations: int
 
 
 # ===============================
 # HELPER FUNCTIONS
 # ===============================
 def get_llm():
-    if not REPLICATE_API_TOKEN:
-        raise ValueError("REPLICATE_API_TOKEN environment variable is not set")
-    return replicate.Client(api_token=REPLICATE_API_TOKEN)
+    return get_llm_client()
 
 
-def _process_modification(state: ModificationState, prompt: str, temperature: float, max_new_tokens: int = 500) -> ModificationState:
+def get_async_llm():
+    return get_async_llm_client()
+
+
+def _process_modification(state: ModificationState, prompt: str, temperature: float, max_new_tokens: int = 500,
+                          on_token: Optional[TokenCallback] = None) -> ModificationState:
     """
     Helper to run the modification prompt and update the concept.
+    When `on_token` is given, the output is streamed to it token by token.
     """
     client = get_llm()
-    output = client.run(
-        "ibm-granite/granite-3.2-8b-instruct",
-        input={"prompt": prompt, "max_new_tokens": max_new_tokens, "temperature": temperature}
-    )
-    modified_concept = "".join(output) if isinstance(output, list) else str(output)
+    model_input = {"prompt": prompt, "max_new_tokens": max_new_tokens, "temperature": temperature}
+    if on_token:
+        modified_concept = stream_llm(client, LLM_MODEL, model_input, on_token)
+    else:
+        modified_concept = collect_output(client.run(LLM_MODEL, input=model_input))
+    return _apply_modified_concept(state, prompt, modified_concept)
+
+
+async def _aprocess_modification(state: ModificationState, prompt: str, temperature: float, max_new_tokens: int = 500,
+                                 on_token: Optional[TokenCallback] = None) -> ModificationState:
+    """
+    Async counterpart of _process_modification.
+    """
+    client = get_async_llm()
+    model_input = {"prompt": prompt, "max_new_tokens": max_new_tokens, "temperature": temperature}
+    if on_token:
+        modified_concept = await astream_llm(client, LLM_MODEL, model_input, on_token)
+    else:
+        modified_concept = await acollect_output(await client.async_run(LLM_MODEL, input=model_input))
+    return _apply_modified_concept(state, prompt, modified_concept)
+
+
+def _apply_modified_concept(state: ModificationState, prompt: str, modified_concept: str) -> ModificationState:
     state["refined_concept"] = modified_concept
     state["messages"].append(HumanMessage(content=prompt))
     state["messages"].append(AIMessage(content=modified_concept))
@@ -57,16 +99,27 @@ def _process_modification(state: ModificationState, prompt: str, temperature: fl
 # ===============================
 # MODIFICATION STRATEGIES
 # ===============================
+def _record_strategy(state: ModificationState, strategy: str):
+    """
+    Record the strategy being applied.
+
+    LangGraph discards state changes made in a router, so the strategy the
+    router picked is written by the strategy node itself.
+    """
+    state["modification_type"] = strategy
+    state["messages"].append(AIMessage(content=f"Selected modification strategy: {strategy}"))
+
+
 def no_modification(state: ModificationState) -> ModificationState:
     """Strategy: Reproduce - Create a similar version of your current artwork."""
+    _record_strategy(state, "no_modification")
     state["messages"].append(AIMessage(content="Applying reproduction strategy - creating a refined version of your current artwork."))
     return state
 
 
-def unsystematic_change(state: ModificationState) -> ModificationState:
-    """Strategy: Experimental Play - Introduce random, unexpected elements."""
+def _unsystematic_change_prompt(state: ModificationState) -> str:
     current_concept = state["refined_concept"]
-    prompt = f"""
+    return f"""
 Take this artistic concept and introduce playful, experimental modifications:
 
 Original concept: {current_concept}
@@ -79,16 +132,30 @@ Create a playful variation by:
 
 The changes should feel fresh and surprising while maintaining a connection to the original concept.
     """
-    return _process_modification(state, prompt, temperature=0.9)
 
 
-def idea_based_change(state: ModificationState) -> ModificationState:
-    """Strategy: Build on Previous Ideas - Develop concepts from your artistic journey."""
+def unsystematic_change(state: ModificationState, config: Optional[RunnableConfig] = None) -> ModificationState:
+    """Strategy: Experimental Play - Introduce random, unexpected elements."""
+    return _run_strategy(state, "unsystematic_change", config)
+
+
+def _related_ideas(state: ModificationState) -> List[Dict[str, Any]]:
+    """
+    Earlier iterations most similar to the current concept, from this session and saved collections.
+
+    Falls back to the latest iterations when none share any terms with the current concept.
+    """
+    history = [entry for entry in state["modification_history"] if entry.get("concept")]
+    related = similar_concepts(state["refined_concept"], history)
+    return related or history[-SIMILAR_CONCEPTS:]
+
+
+def _idea_based_change_prompt(state: ModificationState) -> str:
     current_concept = state["refined_concept"]
-    # Use the last three iterations from history for context
-    previous_ideas = [entry.get("concept", "") for entry in state["modification_history"] if "concept" in entry]
-    previous_ideas_text = "\n".join(previous_ideas[-3:])
-    prompt = f"""
+    # Use the earlier ideas (this session's and saved collections') most related to the current concept
+    previous_ideas = [entry["concept"] for entry in _related_ideas(state)]
+    previous_ideas_text = "\n".join(previous_ideas)
+    return f"""
 Develop a new artistic concept by building on ideas from your creative journey:
 
 Current concept: {current_concept}
@@ -104,13 +171,16 @@ Create a new concept that:
 
 This should feel like a natural progression in your artistic development.
     """
-    return _process_modification(state, prompt, temperature=0.7)
 
 
-def quantitative_modification(state: ModificationState) -> ModificationState:
-    """Strategy: Change Scale or Materials - Modify proportions, textures, or elements."""
+def idea_based_change(state: ModificationState, config: Optional[RunnableConfig] = None) -> ModificationState:
+    """Strategy: Build on Previous Ideas - Develop concepts from your artistic journey."""
+    return _run_strategy(state, "idea_based_change", config)
+
+
+def _quantitative_modification_prompt(state: ModificationState) -> str:
     current_concept = state["refined_concept"]
-    prompt = f"""
+    return f"""
 Transform this artistic concept by changing scale, proportions, or material qualities:
 
 Current concept: {current_concept}
@@ -124,13 +194,16 @@ Consider modifications such as:
 
 Keep the core subject and concept intact while transforming these physical aspects.
     """
-    return _process_modification(state, prompt, temperature=0.6)
 
 
-def subject_modification(state: ModificationState) -> ModificationState:
-    """Strategy: New Subject, Same Style - Apply your technique to different content."""
+def quantitative_modification(state: ModificationState, config: Optional[RunnableConfig] = None) -> ModificationState:
+    """Strategy: Change Scale or Materials - Modify proportions, textures, or elements."""
+    return _run_strategy(state, "quantitative_modification", config)
+
+
+def _subject_modification_prompt(state: ModificationState) -> str:
     current_concept = state["refined_concept"]
-    prompt = f"""
+    return f"""
 Apply your current artistic approach to an entirely new subject:
 
 Current concept: {current_concept}
@@ -143,13 +216,16 @@ To create this transformation:
 
 This should feel like seeing your artistic voice applied to fresh content.
     """
-    return _process_modification(state, prompt, temperature=0.7)
 
 
-def subject_with_method_refinement(state: ModificationState) -> ModificationState:
-    """Strategy: New Subject with Style Refinements - Evolve both content and technique."""
+def subject_modification(state: ModificationState, config: Optional[RunnableConfig] = None) -> ModificationState:
+    """Strategy: New Subject, Same Style - Apply your technique to different content."""
+    return _run_strategy(state, "subject_modification", config)
+
+
+def _subject_with_method_refinement_prompt(state: ModificationState) -> str:
     current_concept = state["refined_concept"]
-    prompt = f"""
+    return f"""
 Transform both your subject matter and refine your artistic technique:
 
 Current concept: {current_concept}
@@ -162,14 +238,17 @@ Create this evolution by:
 
 This should feel like a natural evolution of both what you create and how you create it.
     """
-    return _process_modification(state, prompt, temperature=0.7)
 
 
-def structure_modification(state: ModificationState) -> ModificationState:
-    """Strategy: New Approach, Same Theme - Reimagine your method while keeping the concept."""
+def subject_with_method_refinement(state: ModificationState, config: Optional[RunnableConfig] = None) -> ModificationState:
+    """Strategy: New Subject with Style Refinements - Evolve both content and technique."""
+    return _run_strategy(state, "subject_with_method_refinement", config)
+
+
+def _structure_modification_prompt(state: ModificationState) -> str:
     current_concept = state["refined_concept"]
     original_concept = state["original_concept"]
-    prompt = f"""
+    return f"""
 Reimagine your artistic approach while maintaining your core thematic focus:
 
 Original concept: {original_concept}
@@ -183,21 +262,24 @@ Create this transformation by:
 
 This should feel like seeing your artistic vision through an entirely new lens.
     """
-    return _process_modification(state, prompt, temperature=0.7)
 
 
-def concept_modification(state: ModificationState) -> ModificationState:
-    """Strategy: Artistic Breakthrough - Create something significantly new but connected."""
+def structure_modification(state: ModificationState, config: Optional[RunnableConfig] = None) -> ModificationState:
+    """Strategy: New Approach, Same Theme - Reimagine your method while keeping the concept."""
+    return _run_strategy(state, "structure_modification", config)
+
+
+def _concept_modification_prompt(state: ModificationState) -> str:
     original_concept = state["original_concept"]
     current_concept = state["refined_concept"]
-    # Summarize last three modification entries for context
+    # Summarize the most related earlier iterations for context
     history_summary = ""
-    for entry in state["modification_history"][-3:]:
-        mod_type = entry.get("modification_type", "unknown")
+    for entry in _related_ideas(state):
+        mod_type = entry.get("modification_type") or "unknown"
         concept_snippet = entry.get("concept", "")
         concept_summary = (concept_snippet[:100] + "...") if len(concept_snippet) > 100 else concept_snippet
         history_summary += f"- {mod_type}: {concept_summary}\n"
-    prompt = f"""
+    return f"""
 Create a breakthrough artistic concept that represents significant creative evolution:
 
 Original concept: {original_concept}
@@ -214,7 +296,52 @@ Create a breakthrough by:
 
 This should feel like a significant moment of creative growth and discovery, similar to Picasso's transition to Cubism or Kandinsky's move to abstraction.
     """
-    return _process_modification(state, prompt, temperature=0.8)
+
+
+def concept_modification(state: ModificationState, config: Optional[RunnableConfig] = None) -> ModificationState:
+    """Strategy: Artistic Breakthrough - Create something significantly new but connected."""
+    return _run_strategy(state, "concept_modification", config)
+
+
+# Prompt builder and sampling temperature for every LLM-backed strategy
+STRATEGY_PROMPTS = {
+    "unsystematic_change": (_unsystematic_change_prompt, 0.9),
+    "idea_based_change": (_idea_based_change_prompt, 0.7),
+    "quantitative_modification": (_quantitative_modification_prompt, 0.6),
+    "subject_modification": (_subject_modification_prompt, 0.7),
+    "subject_with_method_refinement": (_subject_with_method_refinement_prompt, 0.7),
+    "structure_modification": (_structure_modification_prompt, 0.7),
+    "concept_modification": (_concept_modification_prompt, 0.8),
+}
+
+
+def _features_prompt(state: ModificationState) -> str:
+    """Measured features of the current image, appended to strategy prompts when available."""
+    features = state.get("image_features")
+    if not features:
+        return ""
+    return f"""
+Measured visual features of the current artwork (use them to ground your changes to palette, lighting and composition):
+{describe_image_features(features)}
+    """
+
+
+def _run_strategy(state: ModificationState, strategy: str, config: Optional[RunnableConfig] = None) -> ModificationState:
+    build_prompt, temperature = STRATEGY_PROMPTS[strategy]
+    _record_strategy(state, strategy)
+    return _process_modification(state, build_prompt(state) + _features_prompt(state), temperature=temperature,
+                                 on_token=get_token_callback(config))
+
+
+def _make_async_strategy(strategy: str):
+    """Build the async graph node for an LLM-backed strategy."""
+    async def run_strategy(state: ModificationState, config: Optional[RunnableConfig] = None) -> ModificationState:
+        build_prompt, temperature = STRATEGY_PROMPTS[strategy]
+        _record_strategy(state, strategy)
+        return await _aprocess_modification(state, build_prompt(state) + _features_prompt(state), temperature=temperature,
+                                            on_token=get_token_callback(config))
+    run_strategy.__name__ = f"a{strategy}"
+    return run_strategy
 
 
 # ===============================
@@ -223,8 +350,19 @@ This should feel like a significant moment of creative growth and discovery, sim
 def create_image(state: ModificationState) -> ModificationState:
     """Generate an image based on the refined concept and update state memory."""
     concept = state["refined_concept"]
-    image_generator = ImageGenerator()
+    image_generator = get_image_generator()
     image_url = image_generator.generate_image(concept)
+    create_thumbnail(image_url)
+    state["current_image_url"] = image_url
+    state["messages"].append(AIMessage(content=f"Generated image: {image_url}"))
+    return update_memory(state)
+
+
+async def acreate_image(state: ModificationState) -> ModificationState:
+    """Async counterpart of create_image."""
+    image_generator = get_image_generator()
+    image_url = await image_generator.agenerate_image(state["refined_concept"])
+    await asyncio.to_thread(create_thumbnail, image_url)
     state["current_image_url"] = image_url
     state["messages"].append(AIMessage(content=f"Generated image: {image_url}"))
     return update_memory(state)
@@ -234,7 +372,7 @@ def update_memory(state: ModificationState) -> ModificationState:
     """Record the latest artwork and modification details."""
     memory_entry = {
         "iteration": state["iteration"],
-        "modification_type": state["modification_type"],
+        "modification_type": state.get("modification_type"),
         "concept": state["refined_concept"],
         "image_url": state["current_image_url"],
         "feedback": state.get("feedback", ""),
@@ -245,37 +383,71 @@ def update_memory(state: ModificationState) -> ModificationState:
         state["previous_images"].append(state["current_image_url"])
     state["modification_history"].append(memory_entry)
     state["iteration"] += 1
+    state["remaining_iterations"] = state.get("remaining_iterations", 1) - 1
+    # check_completion ends the run on a failed render; routers can't write state, so say why here
+    if state["current_image_url"] == FALLBACK_IMAGE and state["remaining_iterations"] > 0:
+        state["messages"].append(AIMessage(content="Image generation failed, stopping the evolution run."))
     return state
 
 
-def analyze_current_state(state: ModificationState) -> ModificationState:
-    """Analyze the current image unless it's the initial iteration."""
-    if state["iteration"] == 0:
-        state["messages"].append(AIMessage(content="Initial concept created, proceeding to modification."))
-        return state
-    analysis = analyze_image(state["current_image_url"])
+def _record_analysis(state: ModificationState, analysis: str) -> ModificationState:
     state["image_analysis"] = analysis
     state["messages"].append(AIMessage(content=f"Image analysis: {analysis}"))
     return state
 
 
-def select_modification_type(state: ModificationState):
+def _measure_features(state: ModificationState) -> Optional[str]:
     """
-    If a strategy is provided, use it; otherwise, select one based on image analysis and history.
+    Measure the current image locally and store the features in the state.
+
+    Returns:
+        str: The features as text when fast analysis should stand in for the
+        remote model, otherwise None.
     """
-    if state["modification_type"]:
-        return state["modification_type"]
+    features = extract_image_features(state["current_image_url"])
+    state["image_features"] = features
+    if features and state.get("fast_analysis"):
+        return describe_image_features(features)
+    return None
+
+
+def analyze_current_state(state: ModificationState) -> ModificationState:
+    """Analyze the current image unless it's the initial iteration."""
+    if state["iteration"] == 0:
+        state["messages"].append(AIMessage(content="Initial concept created, proceeding to modification."))
+        return state
+    fast_analysis = _measure_features(state)
+    return _record_analysis(state, fast_analysis or analyze_image(state["current_image_url"]))
+
+
+async def aanalyze_current_state(state: ModificationState) -> ModificationState:
+    """Async counterpart of analyze_current_state."""
+    if state["iteration"] == 0:
+        state["messages"].append(AIMessage(content="Initial concept created, proceeding to modification."))
+        return state
+    # Feature extraction decodes the image, so it runs on a worker thread rather than the event loop
+    fast_analysis = await asyncio.to_thread(_measure_features, state)
+    return _record_analysis(state, fast_analysis or await aanalyze_image(state["current_image_url"]))
+
+
+def _preselected_strategy(state: ModificationState) -> Optional[str]:
+    """Return the strategy to use without consulting the LLM, if there is one."""
+    # Checkpoints omit keys whose value is None, so a resumed run may not have this key at all.
+    if state.get("requested_strategy"):
+        return state["requested_strategy"]
     if state["iteration"] == 0:
         return "no_modification"
+    return None
 
-    client = get_llm()
+
+def _strategy_selection_prompt(state: ModificationState) -> str:
     analysis = state.get("image_analysis", "")
     history_summary = "".join(
         f"- Iteration {entry.get('iteration', 0)}: {entry.get('modification_type', 'unknown')}\n"
         for entry in state["modification_history"]
     )
     feedback_text = f"\nUser feedback: {state.get('feedback', '')}" if state.get("feedback", "") else ""
-    prompt = f"""
+    return f"""
 Based on the current image analysis and modification history, select the most appropriate artistic process modification strategy from the options below:
 
 1. No modification (reproduction of previous work)
@@ -294,10 +466,9 @@ Modification history:
 
 Return only the number of the strategy to apply next.
     """
-    output = client.run(
-        "ibm-granite/granite-3.2-8b-instruct",
-        input={"prompt": prompt, "max_new_tokens": 10, "temperature": 0.2}
-    )
+
+
+def _parse_strategy_selection(output: str) -> str:
     strategy_map = {
         "1": "no_modification",
         "2": "unsystematic_change",
@@ -308,55 +479,83 @@ Return only the number of the strategy to apply next.
         "7": "structure_modification",
         "8": "concept_modification"
     }
-    strategy_number = ''.join(filter(str.isdigit, str(output)[:3]))
-    strategy = strategy_map.get(strategy_number, "subject_modification")
-    state["modification_type"] = strategy
-    state["messages"].append(AIMessage(content=f"Selected modification strategy: {strategy}"))
-    return strategy
+    strategy_number = ''.join(filter(str.isdigit, output.strip()[:3]))
+    return strategy_map.get(strategy_number, "subject_modification")
 
 
-def check_completion(state: ModificationState):
-    """Determine if the modification process should continue or end."""
-    return "complete"
+def select_modification_type(state: ModificationState):
+    """
+    If a strategy is provided, use it; otherwise, select one based on image analysis and history.
+    """
+    strategy = _preselected_strategy(state)
+    if strategy:
+        return strategy
+
+    client = get_llm()
+    output = client.run(
+        LLM_MODEL,
+        input={"prompt": _strategy_selection_prompt(state), "max_new_tokens": 10, "temperature": 0.2}
+    )
+    return _parse_strategy_selection(collect_output(output))
+
+
+async def aselect_modification_type(state: ModificationState):
+    """Async counterpart of select_modification_type."""
+    strategy = _preselected_strategy(state)
+    if strategy:
+        return strategy
+
+    client = get_async_llm()
+    output = await client.async_run(
+        LLM_MODEL,
+        input={"prompt": _strategy_selection_prompt(state), "max_new_tokens": 10, "temperature": 0.2}
+    )
+    return _parse_strategy_selection(await acollect_output(output))
+
+
+def check_completion(state: ModificationState, config: Optional[RunnableConfig] = None):
+    """
+    Determine if the modification process should continue or end.
+
+    The run loops back to analysis while it has iterations left, unless the
+    last render failed or the caller's `should_stop(state)` criterion (passed
+    via config["configurable"]) says to stop.
+    """
+    if state.get("remaining_iterations", 0) <= 0:
+        return "complete"
+    if state["current_image_url"] == FALLBACK_IMAGE:
+        return "complete"
+    should_stop = (config or {}).get("configurable", {}).get("should_stop")
+    if should_stop and should_stop(state):
+        return "complete"
+    return "continue"
 
 
 # ===============================
 # GRAPH DEFINITION & EXECUTION
 # ===============================
-def create_modification_graph():
+STRATEGY_NODES = [
+    "no_modification", "unsystematic_change", "idea_based_change",
+    "quantitative_modification", "subject_modification",
+    "subject_with_method_refinement", "structure_modification",
+    "concept_modification"
+]
+
+
+def _build_modification_graph(analyze_node, strategy_nodes: Dict[str, Any], image_node, router, checkpointer=None):
     workflow = StateGraph(ModificationState)
     
     # Nodes for analysis and modification strategies
-    workflow.add_node("analyze_current_state", analyze_current_state)
-    workflow.add_node("no_modification", no_modification)
-    workflow.add_node("unsystematic_change", unsystematic_change)
-    workflow.add_node("idea_based_change", idea_based_change)
-    workflow.add_node("quantitative_modification", quantitative_modification)
-    workflow.add_node("subject_modification", subject_modification)
-    workflow.add_node("subject_with_method_refinement", subject_with_method_refinement)
-    workflow.add_node("structure_modification", structure_modification)
-    workflow.add_node("concept_modification", concept_modification)
-    workflow.add_node("create_image", create_image)
+    workflow.add_node("analyze_current_state", analyze_node)
+    for name in STRATEGY_NODES:
+        workflow.add_node(name, strategy_nodes[name])
+    workflow.add_node("create_image", image_node)
     
     # Conditional routing based on analysis
-    workflow.add_conditional_edges("analyze_current_state", select_modification_type, {
-        "no_modification": "no_modification",
-        "unsystematic_change": "unsystematic_change",
-        "idea_based_change": "idea_based_change",
-        "quantitative_modification": "quantitative_modification",
-        "subject_modification": "subject_modification",
-        "subject_with_method_refinement": "subject_with_method_refinement",
-        "structure_modification": "structure_modification",
-        "concept_modification": "concept_modification"
-    })
+    workflow.add_conditional_edges("analyze_current_state", router, {name: name for name in STRATEGY_NODES})
     
     # All modification strategies lead to image creation
-    for node in [
-        "no_modification", "unsystematic_change", "idea_based_change", 
-        "quantitative_modification", "subject_modification", 
-        "subject_with_method_refinement", "structure_modification", 
-        "concept_modification"
-    ]:
+    for node in STRATEGY_NODES:
         workflow.add_edge(node, "create_image")
     
     # End the process after image creation
@@ -366,39 +565,227 @@ def create_modification_graph():
     })
     
     workflow.set_entry_point("analyze_current_state")
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
 
-def generate_artwork_with_modification(
+STRATEGY_HANDLERS = {
+    "no_modification": no_modification,
+    "unsystematic_change": unsystematic_change,
+    "idea_based_change": idea_based_change,
+    "quantitative_modification": quantitative_modification,
+    "subject_modification": subject_modification,
+    "subject_with_method_refinement": subject_with_method_refinement,
+    "structure_modification": structure_modification,
+    "concept_modification": concept_modification
+}
+
+
+def create_modification_graph():
+    return _build_modification_graph(analyze_current_state, STRATEGY_HANDLERS, create_image, select_modification_type,
+                                     checkpointer=get_checkpointer())
+
+
+def create_async_modification_graph():
+    """
+    Same workflow as create_modification_graph, with nodes that await their remote calls.
+
+    Not checkpointed: the SQLite checkpointer is synchronous and would block the event loop.
+    """
+    strategy_nodes = {name: _make_async_strategy(name) for name in STRATEGY_PROMPTS}
+    # Reproduction makes no remote call, so the sync node is used as-is.
+    strategy_nodes["no_modification"] = no_modification
+    return _build_modification_graph(aanalyze_current_state, strategy_nodes, acreate_image, aselect_modification_type)
+
+
+def get_modification_graph():
+    """Return the compiled modification graph, building it once per process."""
+    return get_compiled_graph("modification", create_modification_graph)
+
+
+def get_async_modification_graph():
+    """Return the compiled async modification graph, building it once per process."""
+    return get_compiled_graph("modification_async", create_async_modification_graph)
+
+
+def _initial_state(
     original_concept: str,
     current_concept: str,
     current_image_url: str,
-    modification_type: Optional[str] = None,
-    iteration: int = 0,
-    feedback: str = "",
-    modification_history: List[Dict[str, Any]] = None
-):
-    """
-    Initialize state and run the modification graph to generate a new artwork.
-    """
-    state: ModificationState = {
+    modification_type: Optional[str],
+    iteration: int,
+    feedback: str,
+    modification_history: Optional[List[Dict[str, Any]]],
+    iterations: int = 1,
+    fast_analysis: bool = FAST_ANALYSIS
+) -> ModificationState:
+    return {
         "messages": [],
         "original_concept": original_concept,
         "refined_concept": current_concept,
         "current_image_url": current_image_url,
         "previous_images": [current_image_url] if current_image_url else [],
+        "requested_strategy": modification_type,
         "modification_type": modification_type,
         "iteration": iteration,
         "modification_history": modification_history or [],
         "feedback": feedback,
-        "image_analysis": None
+        "image_analysis": None,
+        "image_features": None,
+        "fast_analysis": fast_analysis,
+        "remaining_iterations": iterations
     }
+
+
+def generate_artwork_with_modification(
+    original_concept: str,
+    current_concept: str,
+    current_image_url: str,
+    modification_type: Optional[str] = None,
+    iteration: int = 0,
+    feedback: str = "",
+    modification_history: List[Dict[str, Any]] = None,
+    on_token: Optional[TokenCallback] = None,
+    fast_analysis: bool = FAST_ANALYSIS,
+    session_id: Optional[str] = None
+):
+    """
+    Initialize state and run the modification graph to generate a new artwork.
+    If `on_token` is given, the strategy LLM output is streamed to it as it is generated.
+    With `fast_analysis`, the image is described from locally measured features
+    instead of the remote LLaVA analysis.
+
+    Runs are checkpointed after every node; retrying a run that was interrupted
+    from the same `session_id` resumes it from the last completed node (e.g.
+    only the image is regenerated if the strategy LLM had already answered).
+    """
+    state = _initial_state(original_concept, current_concept, current_image_url,
+                           modification_type, iteration, feedback, modification_history,
+                           fast_analysis=fast_analysis)
+    thread_id = run_thread_id("modification", session_id, original_concept, current_concept, current_image_url,
+                              modification_type, iteration, feedback, modification_history, fast_analysis)
     
-    graph = create_modification_graph()
-    result = graph.invoke(state)
+    graph = get_modification_graph()
+    result = invoke_resumable(graph, state, thread_id, config=token_config(on_token))
     
     # Print the final state machine content for debugging
     # from pprint import pprint
     # print("\n--- Final State Machine Content ---")
     # pprint(result)
     return result
+
+
+async def agenerate_artwork_with_modification(
+    original_concept: str,
+    current_concept: str,
+    current_image_url: str,
+    modification_type: Optional[str] = None,
+    iteration: int = 0,
+    feedback: str = "",
+    modification_history: List[Dict[str, Any]] = None,
+    on_token: Optional[TokenCallback] = None,
+    fast_analysis: bool = FAST_ANALYSIS
+):
+    """
+    Async counterpart of generate_artwork_with_modification, run via ainvoke.
+    """
+    state = _initial_state(original_concept, current_concept, current_image_url,
+                           modification_type, iteration, feedback, modification_history,
+                           fast_analysis=fast_analysis)
+    graph = get_async_modification_graph()
+    return await graph.ainvoke(state, config=token_config(on_token))
+
+
+def _run_candidate(base_state: ModificationState, strategy: str) -> ModificationState:
+    """Apply one strategy and render its image on a private copy of the state."""
+    state: ModificationState = {
+        **base_state,
+        "messages": list(base_state["messages"]),
+        "previous_images": list(base_state["previous_images"]),
+        "modification_history": list(base_state["modification_history"]),
+        "requested_strategy": strategy,
+        "modification_type": strategy,
+    }
+    state = STRATEGY_HANDLERS[strategy](state)
+    return create_image(state)
+
+
+def explore_all_strategies(
+    original_concept: str,
+    current_concept: str,
+    current_image_url: str,
+    iteration: int = 0,
+    feedback: str = "",
+    modification_history: List[Dict[str, Any]] = None,
+    strategies: Optional[List[str]] = None,
+    max_workers: int = EXPLORE_MAX_WORKERS,
+    fast_analysis: bool = FAST_ANALYSIS
+) -> Iterator[ModificationState]:
+    """
+    Render a candidate artwork for every strategy concurrently.
+
+    The current image is analyzed once and shared by all candidates. Each
+    candidate runs on its own copy of the state, so `modification_history` is
+    never mutated; the chosen candidate's last history entry is the one to keep.
+
+    Yields:
+        The final state of each candidate, in order of completion.
+    """
+    base_state = _initial_state(original_concept, current_concept, current_image_url,
+                                None, iteration, feedback, list(modification_history or []),
+                                fast_analysis=fast_analysis)
+    base_state = analyze_current_state(base_state)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="explore")
+    try:
+        futures = {
+            executor.submit(_run_candidate, base_state, strategy): strategy
+            for strategy in (strategies or STRATEGY_NODES)
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                print(f"Error exploring strategy {futures[future]}: {e}")
+    finally:
+        # If the caller stops early, don't start the strategies still queued.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def evolve_artwork(
+    original_concept: str,
+    current_concept: str,
+    current_image_url: str,
+    iterations: int,
+    modification_type: Optional[str] = None,
+    iteration: int = 0,
+    feedback: str = "",
+    modification_history: List[Dict[str, Any]] = None,
+    should_stop: Optional[Callable[[ModificationState], bool]] = None,
+    fast_analysis: bool = FAST_ANALYSIS,
+    session_id: Optional[str] = None
+) -> Iterator[ModificationState]:
+    """
+    Run up to `iterations` modification rounds in a single graph invocation.
+
+    Each round analyzes the latest image, applies the strategy (or lets the AI
+    pick one when `modification_type` is None) and renders a new image. The run
+    ends early if a render fails or `should_stop(state)` returns True.
+
+    Yields:
+        The state after each completed iteration, so callers can checkpoint
+        and report progress as the run goes.
+    """
+    state = _initial_state(original_concept, current_concept, current_image_url,
+                           modification_type, iteration, feedback, modification_history, iterations,
+                           fast_analysis=fast_analysis)
+    config = {
+        "configurable": {"should_stop": should_stop},
+        # Each iteration takes three steps: analysis, strategy and image creation.
+        "recursion_limit": 3 * iterations + 10
+    }
+    thread_id = run_thread_id("evolution", session_id, original_concept, current_concept, current_image_url,
+                              modification_type, iteration, feedback, modification_history, iterations, fast_analysis)
+    graph = get_modification_graph()
+    for update in stream_resumable(graph, state, thread_id, config=config):
+        if "create_image" in update:
+            yield update["create_image"]
@@ -0,0 +1,209 @@
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+SEARCH_DB = os.environ.get("ARTISELF_SEARCH_DB", os.path.join("collections", "_search.sqlite3"))
+# Art history fields that are searchable, in the order of the FTS columns
+SEARCH_FIELDS = ("concept", "feedback", "image_analysis", "modification_type")
+SEARCH_LIMIT = 50
+
+_connection = None
+_available = True
+_lock = threading.Lock()
+# Bumped on every change, so in-memory views of the index (see utils.concept_index) know to refresh
+_version = 0
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    """Open the index on first use; returns None if this SQLite build has no FTS5."""
+    global _connection, _available
+    if _connection is None and _available:
+        db_dir = os.path.dirname(SEARCH_DB)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        connection = sqlite3.connect(SEARCH_DB, check_same_thread=False)
+        try:
+            with connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                # One row per art history item; the FTS index below points at these rows
+                connection.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS iteration_docs (
+                        id INTEGER PRIMARY KEY,
+                        collection_id TEXT NOT NULL,
+                        iteration INTEGER NOT NULL,
+                        image_url TEXT NOT NULL,
+                        {", ".join(f"{field} TEXT NOT NULL" for field in SEARCH_FIELDS)}
+                    )
+                    """
+                )
+                connection.execute("CREATE INDEX IF NOT EXISTS iteration_docs_collection "
+                                   "ON iteration_docs (collection_id, iteration)")
+                # Porter-stemmed words, with prefix indexes so "water*" style lookups stay fast
+                connection.execute(
+                    f"""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS iterations USING fts5(
+                        {", ".join(SEARCH_FIELDS)},
+                        content = 'iteration_docs',
+                        content_rowid = 'id',
+                        tokenize = 'porter unicode61 remove_diacritics 2',
+                        prefix = '2 3'
+                    )
+                    """
+                )
+                # Keep the FTS index in step with iteration_docs
+                connection.execute(
+                    f"""
+                    CREATE TRIGGER IF NOT EXISTS iteration_docs_insert AFTER INSERT ON iteration_docs BEGIN
+                        INSERT INTO iterations (rowid, {", ".join(SEARCH_FIELDS)})
+                        VALUES (new.id, {", ".join(f"new.{field}" for field in SEARCH_FIELDS)});
+                    END
+                    """
+                )
+                connection.execute(
+                    f"""
+                    CREATE TRIGGER IF NOT EXISTS iteration_docs_delete AFTER DELETE ON iteration_docs BEGIN
+                        INSERT INTO iterations (iterations, rowid, {", ".join(SEARCH_FIELDS)})
+                        VALUES ('delete', old.id, {", ".join(f"old.{field}" for field in SEARCH_FIELDS)});
+                    END
+                    """
+                )
+        except sqlite3.OperationalError as e:
+            print(f"Collection search unavailable (SQLite FTS5 missing?): {e}")
+            connection.close()
+            _available = False
+            return None
+        _connection = connection
+    return _connection
+
+
+def _field_text(value: Any) -> str:
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def _insert_rows(connection: sqlite3.Connection, collection_id: str, start: int, items: List[Dict[str, Any]]):
+    global _version
+    _version += 1
+    connection.executemany(
+        f"INSERT INTO iteration_docs (collection_id, iteration, image_url, {', '.join(SEARCH_FIELDS)}) "
+        f"VALUES ({', '.join('?' * (len(SEARCH_FIELDS) + 3))})",
+        [(collection_id, start + offset, item.get("image_url") or "",
+          *(_field_text(item.get(field)) for field in SEARCH_FIELDS))
+         for offset, item in enumerate(items)]
+    )
+
+
+def index_collection(collection_id: str, art_history: List[Dict[str, Any]]):
+    """
+    Replace everything indexed for a collection with its current art history.
+
+    Args:
+        collection_id: ID of the collection
+        art_history: The collection's art history, image paths relative to the collection directory
+    """
+    with _lock:
+        connection = _connect()
+        if connection is None:
+            return
+        with connection:
+            connection.execute("DELETE FROM iteration_docs WHERE collection_id = ?", (collection_id,))
+            _insert_rows(connection, collection_id, 0, art_history)
+
+
+def index_iterations(collection_id: str, start: int, items: List[Dict[str, Any]]):
+    """
+    Index iterations appended to a collection, without touching the ones before them.
+
+    Args:
+        collection_id: ID of the collection
+        start: Position of the first new item in the art history
+        items: The new art history items
+    """
+    with _lock:
+        connection = _connect()
+        if connection is None:
+            return
+        with connection:
+            connection.execute("DELETE FROM iteration_docs WHERE collection_id = ? AND iteration >= ?",
+                               (collection_id, start))
+            _insert_rows(connection, collection_id, start, items)
+
+
+def remove_collection(collection_id: str):
+    """Drop a collection from the index."""
+    global _version
+    with _lock:
+        connection = _connect()
+        if connection is None:
+            return
+        _version += 1
+        with connection:
+            connection.execute("DELETE FROM iteration_docs WHERE collection_id = ?", (collection_id,))
+
+
+def indexed_collections() -> Dict[str, int]:
+    """Return the artwork count indexed for each collection, to spot collections that need (re)indexing."""
+    with _lock:
+        connection = _connect()
+        if connection is None:
+            return {}
+        return dict(connection.execute("SELECT collection_id, count(*) FROM iteration_docs GROUP BY collection_id"))
+
+
+def index_version() -> int:
+    """Return a counter that changes whenever this process changes the index."""
+    return _version
+
+
+def indexed_concepts() -> List[Dict[str, Any]]:
+    """Return every distinct concept in the index with the modification type that produced it."""
+    with _lock:
+        connection = _connect()
+        if connection is None:
+            return []
+        rows = connection.execute(
+            "SELECT concept, max(modification_type) FROM iteration_docs WHERE concept != '' GROUP BY concept"
+        ).fetchall()
+    return [{"concept": concept, "modification_type": modification_type or None}
+            for concept, modification_type in rows]
+
+
+def _match_expression(query: str) -> str:
+    # Every word must match, as a prefix; quoting keeps FTS5 operators in user input from being parsed.
+    return " ".join(f'"{token}"*' for token in re.findall(r"\w+", query))
+
+
+def search(query: str, limit: int = SEARCH_LIMIT) -> List[Dict[str, Any]]:
+    """
+    Find the iterations whose concept, feedback, image analysis or modification type match a query.
+
+    Args:
+        query: Words to look for; each must appear (as a word prefix) in the same iteration
+        limit: Maximum number of hits
+
+    Returns:
+        List of hits, best first, with the collection ID, iteration position, image path
+        (relative to the collection directory), modification type and a snippet of the
+        best matching field with the matching words in bold
+    """
+    match = _match_expression(query)
+    if not match:
+        return []
+    with _lock:
+        connection = _connect()
+        if connection is None:
+            return []
+        rows = connection.execute(
+            "SELECT d.collection_id, d.iteration, d.image_url, d.modification_type, "
+            "snippet(iterations, -1, '**', '**', '…', 16) "
+            "FROM iterations JOIN iteration_docs AS d ON d.id = iterations.rowid "
+            "WHERE iterations MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit)
+        ).fetchall()
+    return [{"collection_id": collection_id, "iteration": int(iteration), "image_url": image_url,
+             "modification_type": modification_type, "snippet": snippet}
+            for collection_id, iteration, image_url, modification_type, snippet in rows]
@@ -0,0 +1,74 @@
+import os
+import uuid
+from typing import Iterable, Optional
+from PIL import Image, features
+
+THUMBNAIL_SIZE = (320, 320)
+THUMBS_DIRNAME = "thumbs"
+# WebP is much smaller than JPEG at the same quality; fall back if Pillow was built without it.
+THUMBNAIL_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+THUMBNAIL_EXT = ".webp" if THUMBNAIL_FORMAT == "WEBP" else ".jpg"
+THUMBNAIL_QUALITY = 80
+
+
+def thumbnail_path(image_path: str) -> str:
+    """
+    Return where the thumbnail for `image_path` lives.
+
+    Thumbnails sit in a `thumbs/` directory beside the image's own directory,
+    e.g. collections/<id>/images/a.png -> collections/<id>/thumbs/a.webp.
+    """
+    image_dir = os.path.dirname(image_path)
+    # Top-level image directories (e.g. images/) keep their thumbs/ inside themselves.
+    thumbs_parent = os.path.dirname(image_dir) or image_dir
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(thumbs_parent, THUMBS_DIRNAME, stem + THUMBNAIL_EXT)
+
+
+def create_thumbnail(image_path: str) -> Optional[str]:
+    """
+    Render the fixed-size thumbnail for an image.
+
+    Returns:
+        str: Path to the thumbnail, or None if the image could not be read.
+    """
+    thumb_path = thumbnail_path(image_path)
+    try:
+        os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+        with Image.open(image_path) as img:
+            img.thumbnail(THUMBNAIL_SIZE)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            # Unique per writer: identical renders share a thumbnail and may be thumbnailed concurrently.
+            tmp_path = f"{thumb_path}.{uuid.uuid4().hex[:8]}.tmp"
+            img.save(tmp_path, format=THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+        os.replace(tmp_path, thumb_path)
+        return thumb_path
+    except Exception as e:
+        print(f"Error creating thumbnail for {image_path}: {e}")
+        return None
+
+
+def create_thumbnails(image_paths: Iterable[str]):
+    """Render thumbnails for several images, e.g. when a collection is saved."""
+    for image_path in image_paths:
+        if image_path and os.path.exists(image_path):
+            create_thumbnail(image_path)
+
+
+def get_thumbnail(image_path: str) -> str:
+    """
+    Return a thumbnail path to display in place of `image_path`.
+
+    Missing or stale thumbnails are rendered on demand, which backfills
+    collections saved before thumbnails existed. Falls back to the original
+    image if no thumbnail can be made.
+    """
+    thumb_path = thumbnail_path(image_path)
+    try:
+        if os.path.getmtime(thumb_path) >= os.path.getmtime(image_path):
+            return thumb_path
+    except OSError:
+        if not os.path.exists(image_path):
+            return image_path
+    return create_thumbnail(image_path) or image_path
@@ -4,6 +4,7 @@ import networkx as nx
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
+from utils.thumbnails import get_thumbnail
 
 class TimelineVisualization:
     """
@@ -62,7 +63,7 @@ class TimelineVisualization:
                     iteration_idx = selected_iterations[idx]
                     artwork = self.art_history[iteration_idx]
                     with cols[c]:
-                        st.image(artwork["image_url"],
+                        st.image(get_thumbnail(artwork["image_url"]),
                                  caption=f"Iteration {iteration_idx}",
                                  use_container_width=True)
                         if show_details:
@@ -211,7 +212,7 @@ class TimelineVisualization:
         cols = st.columns(len(self.art_history))
         for i, (col, artwork) in enumerate(zip(cols, self.art_history)):
             with col:
-                st.image(artwork["image_url"], caption=f"{i}", width=100)
+                st.image(get_thumbnail(artwork["image_url"]), caption=f"{i}", width=100)
 
     def display_main_interface(self):
         """Render the main interface with tabs for different visualizations."""
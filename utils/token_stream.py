@@ -0,0 +1,44 @@
+from typing import Any, Callable, Dict, Optional
+
+TokenCallback = Callable[[str], None]
+
+
+def get_token_callback(config: Optional[Dict[str, Any]]) -> Optional[TokenCallback]:
+    """Return the `on_token` callback passed to a graph run via config["configurable"], if any."""
+    if not config:
+        return None
+    return config.get("configurable", {}).get("on_token")
+
+
+def token_config(on_token: Optional[TokenCallback]) -> Optional[Dict[str, Any]]:
+    """Build the graph run config that hands `on_token` to the LLM nodes."""
+    return {"configurable": {"on_token": on_token}} if on_token else None
+
+
+def stream_llm(client, model: str, model_input: Dict[str, Any], on_token: TokenCallback) -> str:
+    """
+    Run a Replicate language model in streaming mode.
+
+    Each token is passed to `on_token` as soon as it arrives.
+
+    Returns:
+        str: The full generated text.
+    """
+    tokens = []
+    for event in client.stream(model, input=model_input):
+        token = str(event)
+        if token:
+            tokens.append(token)
+            on_token(token)
+    return "".join(tokens)
+
+
+async def astream_llm(client, model: str, model_input: Dict[str, Any], on_token: TokenCallback) -> str:
+    """Async counterpart of stream_llm."""
+    tokens = []
+    async for event in await client.async_stream(model, input=model_input):
+        token = str(event)
+        if token:
+            tokens.append(token)
+            on_token(token)
+    return "".join(tokens)